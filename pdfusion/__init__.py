@@ -10,6 +10,13 @@ Example
 >>> output_path, num_files = merge_pdfs("/path/to/pdfs", "merged.pdf")
 >>> print(f"Successfully merged {num_files} files into {output_path}")
 
+>>> from pdfusion import merge_streams
+>>> result = merge_streams([pdf_bytes_1, pdf_bytes_2])
+>>> merged = result.output.getbuffer()
+
+>>> from pdfusion import inspect_pdfs
+>>> print(inspect_pdfs("/path/to/pdfs").total_pages)
+
 Author: Bjorn Melin
 Date: 11/23/2024
 """
@@ -22,8 +29,17 @@ except PackageNotFoundError:  # pragma: no cover
     # Package is not installed
     __version__ = "unknown"
 
+from .catalog import Catalog, PdfInput, discover_pdfs, open_input
+from .crypto import PasswordMap
+from .exceptions import PDFusionPasswordError, PDFusionQuarantineError
+from .inspection import InspectResult, inspect_pdfs
+from .metrics import MergeMetrics, Registry
+from .options import MergeOptions
+from .readers import ReaderCache
+from .sources import InputSource, LocalSource, ObjectStoreSource
 from .pdfusion import (
     merge_pdfs,
+    merge_streams,
     PDFusionError,
     NoPDFsFoundError,
     PDFusionMergeError,
@@ -31,9 +47,26 @@ from .pdfusion import (
 
 __all__ = [
     "merge_pdfs",
+    "merge_streams",
+    "inspect_pdfs",
+    "InspectResult",
+    "discover_pdfs",
+    "open_input",
+    "Catalog",
+    "PdfInput",
+    "InputSource",
+    "LocalSource",
+    "ObjectStoreSource",
+    "MergeOptions",
+    "ReaderCache",
+    "MergeMetrics",
+    "Registry",
+    "PasswordMap",
     "PDFusionError",
     "NoPDFsFoundError",
     "PDFusionMergeError",
+    "PDFusionPasswordError",
+    "PDFusionQuarantineError",
 ]
 
 __author__ = "Bjorn Melin"
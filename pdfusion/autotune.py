@@ -0,0 +1,238 @@
+"""
+Adaptive tuning of parallel merges for the PDFusion package.
+
+The best worker count and batch size for a tree merge depend on the inputs:
+thousands of tiny invoices want many workers each merging a large batch, so
+that starting a task costs little next to its work, while a few giant scans
+want small batches and as few workers as memory allows, and a handful of
+small inputs want no workers at all. This module picks both from the input
+size distribution, then adjusts them from the throughput measured as batches
+finish, and logs each decision.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+from statistics import median
+from time import perf_counter
+from typing import Final, List, Optional, Sequence
+
+from . import logging as log_utils
+from .parallel import resolve_workers
+from .scheduler import BASE_FOOTPRINT, PARSE_OVERHEAD
+
+# Constants
+TARGET_TASK_SECONDS: Final[float] = 2.0
+# Input bytes one worker merges per second before any are measured; low, so
+# that first batches are small and measurements come early
+PRIOR_BYTES_PER_SECOND: Final[int] = 8 * 1024 * 1024
+MIN_BATCH: Final[int] = 2
+MAX_BATCH: Final[int] = 1024
+# Tasks per worker that batches are kept small enough to make, so that the
+# workers stay busy to the end and throughput is measured early
+TASKS_PER_WORKER: Final[int] = 4
+# Batch sizes within this factor of the current one are not worth a change
+BATCH_HYSTERESIS: Final[float] = 1.25
+# Throughput gain that must be seen before moving on to more or fewer workers
+CONCURRENCY_GAIN: Final[float] = 1.05
+# Fewer and smaller inputs than these merge in the calling process sooner than
+# a worker pool starts and its parts are assembled; the size takes about eight
+# seconds at the prior throughput
+MIN_PARALLEL_INPUTS: Final[int] = 256
+MIN_PARALLEL_BYTES: Final[int] = 64 * 1024 * 1024
+
+logger = log_utils.get_logger(__name__)
+
+
+def _workers(count: int) -> str:
+    return f"{count} worker" if count == 1 else f"{count} workers"
+
+
+def _percentile(values: Sequence[int], fraction: float) -> int:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def worth_parallel(inputs: int, nbytes: int) -> bool:
+    """
+    Decide whether a merge is large enough for a tree merge to pay off.
+
+    Parameters
+    ----------
+    inputs : int
+        Number of inputs.
+    nbytes : int
+        Combined size of the inputs in bytes.
+
+    Returns
+    -------
+    bool
+        True to merge as a tree, False to merge in the calling process.
+    """
+    if inputs > MIN_BATCH and (
+        inputs >= MIN_PARALLEL_INPUTS or nbytes >= MIN_PARALLEL_BYTES
+    ):
+        return True
+    logger.info(
+        f"Auto-tuning: {inputs} inputs of {nbytes:,} bytes: "
+        f"merging in one process"
+    )
+    return False
+
+
+class AutoTuner:
+    """
+    Batch size and concurrency for the tasks of a tree merge.
+
+    The first batch size makes a task of median-sized inputs take about
+    ``TARGET_TASK_SECONDS`` at a conservative prior throughput, but leaves
+    at least ``TASKS_PER_WORKER`` tasks per worker and keeps a batch of
+    large inputs within ``memory_budget``. As tasks finish, each one's input
+    bytes per second updates a moving average, from which the batch size is
+    recomputed.
+
+    Concurrency starts at ``workers``, capped so that as many batches of
+    large inputs fit ``memory_budget``. After every window of as many
+    finished tasks as are running, the merge's pages per second is compared
+    with the best window so far; the first window, which includes starting
+    the pool, is only a warm-up. Concurrency then steps down, one worker at
+    a time, while that keeps helping, as it does when tasks contend for
+    disks or memory; a step that does not help is undone and the search
+    stops.
+
+    Parameters
+    ----------
+    sizes : Sequence[int]
+        Sizes in bytes of the inputs, as recorded at discovery.
+    workers : int, optional
+        Most worker processes to use; 0 means one per CPU.
+    memory_budget : int, optional
+        Memory in bytes that batches in flight may take; 0 means no limit.
+
+    Attributes
+    ----------
+    batch : int
+        Number of inputs to give the next task.
+    concurrency : int
+        Number of tasks to keep running.
+    max_workers : int
+        Size of the worker pool to start.
+    decisions : List[str]
+        The decisions made so far, in order, as logged.
+    """
+
+    def __init__(
+        self, sizes: Sequence[int], *, workers: int = 0, memory_budget: int = 0
+    ) -> None:
+        self.decisions: List[str] = []
+        self._inputs = len(sizes)
+        self._typical = max(int(median(sizes)), 1) if sizes else 1
+        self._rate: Optional[float] = None
+        self._memory_budget = memory_budget
+        large = _percentile(sizes, 0.9) if sizes else 0
+        self._footprint = BASE_FOOTPRINT + int(large * PARSE_OVERHEAD)
+        self.max_workers = self.concurrency = resolve_workers(workers)
+        self.batch = self._batch_for(PRIOR_BYTES_PER_SECOND)
+        if memory_budget > 0:
+            fits = memory_budget // (self.batch * self._footprint)
+            self.max_workers = max(1, min(self.max_workers, fits))
+        self.concurrency = self.max_workers
+        self._decide(
+            f"{len(sizes)} inputs of median {self._typical:,} bytes "
+            f"(90th percentile {large:,}): batches of {self.batch} on "
+            f"{_workers(self.concurrency)}"
+        )
+
+        # Throughput windows for the concurrency search
+        self._window_start = perf_counter()
+        self._window_tasks = 0
+        self._window_pages = 0
+        self._warmed_up = False
+        self._best: Optional[float] = None
+        self._best_concurrency = self.concurrency
+        self._searching = self.concurrency > 1
+
+    def _batch_for(self, rate: float) -> int:
+        batch = round(TARGET_TASK_SECONDS * rate / self._typical)
+        if self.max_workers > 1:
+            tasks = self.max_workers * TASKS_PER_WORKER
+            batch = min(batch, -(-self._inputs // tasks))
+        if self._memory_budget > 0:
+            batch = min(batch, self._memory_budget // self._footprint)
+        return max(MIN_BATCH, min(MAX_BATCH, batch))
+
+    def _decide(self, message: str) -> None:
+        self.decisions.append(message)
+        logger.info(f"Auto-tuning: {message}")
+
+    def record(self, nbytes: int, pages: int, seconds: float) -> None:
+        """
+        Record a finished task.
+
+        Parameters
+        ----------
+        nbytes : int
+            Total size of the task's inputs.
+        pages : int
+            Pages the task merged.
+        seconds : float
+            Time the task took in its worker.
+
+        Returns
+        -------
+        None
+        """
+        rate = nbytes / max(seconds, 1e-6)
+        self._rate = rate if self._rate is None else (self._rate + rate) / 2
+        batch = self._batch_for(self._rate)
+        if not self.batch / BATCH_HYSTERESIS <= batch <= self.batch * BATCH_HYSTERESIS:
+            self._decide(
+                f"measured {self._rate / 1e6:.1f} MB/s per worker: "
+                f"batches of {batch} instead of {self.batch}"
+            )
+            self.batch = batch
+
+        self._window_tasks += 1
+        self._window_pages += pages
+        if self._searching and self._window_tasks >= self.concurrency:
+            self._close_window()
+
+    def _close_window(self) -> None:
+        elapsed = max(perf_counter() - self._window_start, 1e-6)
+        throughput = self._window_pages / elapsed
+        if not self._warmed_up:
+            # Any later window would look faster than one that started the
+            # pool, whatever the concurrency
+            self._warmed_up = True
+            self._decide(f"{throughput:.0f} pages/s while warming up; not compared")
+        elif self._best is None or throughput > self._best * CONCURRENCY_GAIN:
+            self._best, self._best_concurrency = throughput, self.concurrency
+            if self.concurrency > 1:
+                self.concurrency -= 1
+                self._decide(
+                    f"{throughput:.0f} pages/s; trying {_workers(self.concurrency)}"
+                )
+            else:
+                self._searching = False
+        else:
+            self.concurrency = self._best_concurrency
+            self._searching = False
+            self._decide(
+                f"{throughput:.0f} pages/s is no better than {self._best:.0f}; "
+                f"keeping {_workers(self.concurrency)}"
+            )
+        self._window_start = perf_counter()
+        self._window_tasks = self._window_pages = 0
+
+
+__all__ = [
+    "AutoTuner",
+    "MAX_BATCH",
+    "MIN_BATCH",
+    "MIN_PARALLEL_BYTES",
+    "MIN_PARALLEL_INPUTS",
+    "TARGET_TASK_SECONDS",
+    "worth_parallel",
+]
@@ -0,0 +1,256 @@
+"""
+Output cache for the PDFusion package.
+
+This module keeps merged outputs keyed by the inputs and options that
+produced them, so that merging the same input set again links or copies the
+earlier output instead of redoing the merge. Entries are evicted least
+recently used first once the cache exceeds its size cap.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from PyPDF2 import __version__ as pypdf2_version
+
+from . import __version__
+from . import logging as log_utils
+from .options import MergeOptions
+
+# Constants
+CACHE_ENV: Final[str] = "PDFUSION_CACHE_DIR"
+OUTPUTS_DIR: Final[str] = "outputs"
+ENTRY_VERSION: Final[int] = 1
+
+logger = log_utils.get_logger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """
+    Get the directory PDFusion keeps its caches in.
+
+    Returns
+    -------
+    Path
+        ``$PDFUSION_CACHE_DIR`` if set, otherwise ``pdfusion`` under
+        ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+    if os.environ.get(CACHE_ENV):
+        return Path(os.environ[CACHE_ENV])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pdfusion"
+
+
+def cache_key(input_dir: Path, fingerprint: str, options: MergeOptions) -> str:
+    """
+    Identify a merge by its inputs and the options that shape its output.
+
+    Parameters
+    ----------
+    input_dir : Path
+        Directory the inputs were discovered in.
+    fingerprint : str
+        Fingerprint of the ordered input files; see
+        :func:`pdfusion.checkpoint.fingerprint_inputs`.
+    options : MergeOptions
+        The merge options. Only those that change the output's bytes or the
+        reported result are part of the key.
+
+    Returns
+    -------
+    str
+        Hex digest naming the cache entry.
+    """
+    parts = [
+        __version__,
+        pypdf2_version,
+        str(input_dir.resolve()),
+        fingerprint,
+        str(options.digest),
+        str(options.page_tree_fanout),
+        str(options.collect_garbage),
+        str(options.checkpoint_every),
+        str(options.reduce_fanout),
+        str(options.autotune),
+        # Limits decide which inputs are quarantined
+        str(options.parse_timeout),
+        str(options.parse_memory),
+        str(options.image_dpi),
+        options.image_encoding,
+        str(options.image_quality),
+        str(options.drop_duplicate_pages),
+        str(options.compress_level),
+        str(options.bookmarks),
+        str(options.bookmark_fanout),
+    ]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def _place(source: Path, target: Path) -> None:
+    # Hard link when possible, copy across file systems; either way the
+    # target appears atomically
+    temp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        try:
+            os.link(source, temp)
+        except OSError:
+            shutil.copyfile(source, temp)
+        os.replace(temp, target)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+class OutputCache:
+    """
+    Merged outputs kept by cache key, with a size cap and LRU eviction.
+
+    Each entry is a PDF and a JSON sidecar holding the merge result and the
+    PDF's size and modification time when stored. An entry whose PDF has
+    changed since, for example through a hard-linked output edited in
+    place, is discarded instead of served. Using an entry marks it recently
+    used by touching its sidecar.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory holding the cache; outputs live in its ``outputs``
+        subdirectory.
+    max_bytes : int
+        Total size of cached outputs to keep.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = Path(directory) / OUTPUTS_DIR
+        self.max_bytes = max_bytes
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.directory / f"{key}.pdf", self.directory / f"{key}.json"
+
+    def fetch(self, key: str, target: Path) -> Optional[Dict[str, Any]]:
+        """
+        Place the cached output for a key at ``target``.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        target : Path
+            Where the output should appear.
+
+        Returns
+        -------
+        Dict[str, Any], optional
+            The cached merge result, or None on a miss.
+        """
+        pdf, meta = self._paths(key)
+        try:
+            entry = json.loads(meta.read_text())
+            stat = pdf.stat()
+            if entry.get("version") != ENTRY_VERSION or entry["stat"] != [
+                stat.st_size,
+                stat.st_mtime_ns,
+            ]:
+                self._discard(key)
+                return None
+            _place(pdf, target)
+            os.utime(meta)
+        except (OSError, ValueError, KeyError):
+            return None
+        return entry["result"]
+
+    def store(self, key: str, output: Path, result: Dict[str, Any]) -> None:
+        """
+        Add a merged output to the cache, then evict down to the size cap.
+
+        Failures are logged and otherwise ignored: the cache never fails a
+        merge.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+        output : Path
+            The merged output file.
+        result : Dict[str, Any]
+            The merge result to return on later hits.
+
+        Returns
+        -------
+        None
+        """
+        pdf, meta = self._paths(key)
+        try:
+            if output.stat().st_size > self.max_bytes:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _place(output, pdf)
+            stat = pdf.stat()
+            entry = {
+                "version": ENTRY_VERSION,
+                "stat": [stat.st_size, stat.st_mtime_ns],
+                "result": result,
+            }
+            temp = meta.with_name(f".{meta.name}.{uuid.uuid4().hex}.tmp")
+            temp.write_text(json.dumps(entry))
+            os.replace(temp, meta)
+            self.evict()
+        except OSError as e:
+            logger.warning(f"Could not cache merged output: {e}")
+
+    def entries(self) -> List[Tuple[str, int, int]]:
+        """
+        List the cached entries.
+
+        Returns
+        -------
+        List[Tuple[str, int, int]]
+            Key, output size and last use (ns) of each entry, least recently
+            used first.
+        """
+        found = []
+        for meta in self.directory.glob("*.json"):
+            try:
+                used = meta.stat().st_mtime_ns
+                size = meta.with_suffix(".pdf").stat().st_size
+            except OSError:
+                continue
+            found.append((meta.stem, size, used))
+        return sorted(found, key=lambda entry: entry[2])
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits its cap.
+
+        Returns
+        -------
+        None
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(key)
+            total -= size
+
+    def _discard(self, key: str) -> None:
+        for path in self._paths(key)[::-1]:
+            path.unlink(missing_ok=True)
+
+
+__all__ = [
+    "OutputCache",
+    "cache_key",
+    "default_cache_dir",
+    "CACHE_ENV",
+]
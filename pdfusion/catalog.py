@@ -0,0 +1,651 @@
+"""
+Input catalog for the PDFusion package.
+
+This module records what is known about each input file as it is discovered,
+so that ordering, validation, scheduling and merging read sizes and
+modification times from one place instead of asking the file system again.
+A catalog keeps its entries in flat arrays, which keeps a million inputs
+within a few tens of megabytes. Inputs may also be the members of a ZIP or
+tar archive, which are read without extracting them, or the objects of an
+input source such as an object store, which are read in ranges.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import posixpath
+import re
+import sys
+import tarfile
+import zipfile
+from array import array
+from enum import IntEnum
+from itertools import repeat
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Collection,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    overload,
+)
+
+from .archives import is_archive, list_members, open_member
+from .exceptions import NoPDFsFoundError, PDFusionError
+from .sources import InputSource
+
+# Constants
+PDF_PATTERN: Final[str] = "*.pdf"
+UNKNOWN_PAGES: Final[int] = -1
+VERSION_PATTERN: Final[re.Pattern[str]] = re.compile(r"([1-9])\.(\d)")
+
+
+class InputStatus(IntEnum):
+    """
+    What validation found out about an input.
+
+    Attributes
+    ----------
+    UNKNOWN
+        The input has not been validated.
+    VALID
+        The input is a readable, unencrypted PDF.
+    ENCRYPTED
+        The input is an encrypted PDF.
+    INVALID
+        The input could not be read as a PDF.
+    """
+    UNKNOWN = 0
+    VALID = 1
+    ENCRYPTED = 2
+    INVALID = 3
+
+
+class PdfInput(NamedTuple):
+    """
+    One input file, with the facts recorded about it.
+
+    A ``PdfInput`` is path-like, so it can be passed to ``open`` and
+    ``os.stat`` wherever a path is expected, except for a member of an
+    archive or an object of a source, which are opened with
+    :func:`open_input`.
+
+    Attributes
+    ----------
+    directory : Path
+        Directory holding the file, or the archive it is stored in. For an
+        object of a source, the directory outputs are written to.
+    name : str
+        File name, or path of the member within the archive, or name of the
+        object within the source.
+    size : int
+        Size in bytes when discovered.
+    mtime_ns : int
+        Modification time in nanoseconds when discovered.
+    pages : int, optional
+        Number of pages, or None if not validated.
+    version : str, optional
+        PDF version from the file header, such as ``"1.7"``, or None if not
+        validated.
+    status : InputStatus
+        Validation status.
+    archive : str, optional
+        File name of the archive in ``directory`` that the file is a member
+        of, or None for a file of its own.
+    source : InputSource, optional
+        Source the file is an object of, or None for a file of its own.
+    """
+    directory: Path
+    name: str
+    size: int
+    mtime_ns: int
+    pages: Optional[int] = None
+    version: Optional[str] = None
+    status: InputStatus = InputStatus.UNKNOWN
+    archive: Optional[str] = None
+    source: Optional[InputSource] = None
+
+    @property
+    def path(self) -> Path:
+        """Path: The file's path, below its archive's for a member."""
+        return Path(self.__fspath__())
+
+    @property
+    def is_file(self) -> bool:
+        """bool: Whether the input is a file of its own, opened by path."""
+        return self.archive is None and self.source is None
+
+    @property
+    def fingerprint(self) -> str:
+        """str: Name, size and modification time, which change with the file."""
+        if self.source is not None:
+            name = self.source.locate(self.name)
+        else:
+            name = f"{self.archive}/{self.name}" if self.archive else self.name
+        return f"{name}\0{self.size}\0{self.mtime_ns}"
+
+    def __fspath__(self) -> str:
+        if self.source is not None:
+            return self.source.locate(self.name)
+        # A member's path lies below its archive, where nothing can be
+        # opened by mistake
+        if self.archive:
+            return os.path.join(self.directory, self.archive, self.name)
+        return os.path.join(self.directory, self.name)
+
+    def __str__(self) -> str:
+        return self.__fspath__()
+
+
+def as_input(path: str | os.PathLike[str]) -> PdfInput:
+    """
+    Describe a file as a ``PdfInput``, reading its status only if needed.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        A path, or a ``PdfInput`` which is returned as is.
+
+    Returns
+    -------
+    PdfInput
+        The file's record.
+    """
+    if isinstance(path, PdfInput):
+        return path
+    path = Path(path)
+    stat = path.stat()
+    return PdfInput(path.parent, path.name, stat.st_size, stat.st_mtime_ns)
+
+
+def open_input(path: str | os.PathLike[str]) -> BinaryIO:
+    """
+    Open an input for reading, whether a file, a member of an archive or an
+    object of a source.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        A path, or a ``PdfInput``.
+
+    Returns
+    -------
+    BinaryIO
+        A seekable binary stream, which the caller closes.
+
+    Raises
+    ------
+    OSError
+        If the file or archive cannot be read.
+    """
+    if isinstance(path, PdfInput) and not path.is_file:
+        if path.source is not None:
+            return path.source.open(path.name, path.size)
+        return open_member(path.directory / path.archive, path.name)
+    return open(path, "rb")
+
+
+def _encode_version(version: Optional[str]) -> int:
+    # "1.7" -> 17, stored in one byte; 0 when unknown or unusual
+    match = VERSION_PATTERN.match(version or "")
+    if match is None:
+        return 0
+    return int(match[1]) * 10 + int(match[2])
+
+
+# Names are stored as os.fsencode stores them
+_ENCODING: Final[str] = sys.getfilesystemencoding()
+_ERRORS: Final[str] = sys.getfilesystemencodeerrors()
+# Decoded forms of the one-byte version and status fields
+_VERSIONS: Final[List[Optional[str]]] = [
+    f"{code // 10}.{code % 10}" if code else None for code in range(256)
+]
+_STATUSES: Final[List[InputStatus]] = [
+    InputStatus(code) for code in range(len(InputStatus))
+]
+
+
+class Catalog(Sequence[PdfInput]):
+    """
+    Array-backed sequence of the input files of a merge.
+
+    File names are stored back to back in one buffer and every other field
+    in a typed array, so an entry takes about 40 bytes plus its name instead
+    of a ``Path`` and a stat result. Items are ``PdfInput`` records built on
+    access; slices are catalogs.
+
+    Parameters
+    ----------
+    directory : str | Path
+        Directory holding the files, or the archive they are stored in.
+    archive : str, optional
+        File name of the archive in ``directory`` that the files are members
+        of, or None if they are files of their own.
+    source : InputSource, optional
+        Source the files are objects of, or None if they are files of their
+        own.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        archive: Optional[str] = None,
+        source: Optional[InputSource] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.archive = archive
+        self.source = source
+        self._names = bytearray()
+        self._ends = array("Q")
+        self._sizes = array("q")
+        self._mtimes = array("q")
+        self._pages = array("l")
+        self._versions = array("B")
+        self._status = array("B")
+
+    @classmethod
+    def scan(cls, directory: str | Path, pattern: str = PDF_PATTERN) -> Catalog:
+        """
+        Discover the files in a directory, sorted by name ignoring case.
+
+        Each file's size and modification time are recorded from the single
+        status read made while listing the directory. Like ``Path.glob``,
+        every matching entry is listed; entries that are not readable files
+        fail when merged.
+
+        Parameters
+        ----------
+        directory : str | Path
+            Directory to list.
+        pattern : str, optional
+            Glob pattern for file names (default is ``"*.pdf"``).
+
+        Returns
+        -------
+        Catalog
+            The matching entries.
+
+        Raises
+        ------
+        OSError
+            If the directory cannot be listed.
+        """
+        matches = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        found = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not matches(os.path.normcase(entry.name)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # Listed anyway, so that the merge reports it by name
+                    found.append((entry.name, 0, 0))
+                    continue
+                found.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        found.sort(key=lambda entry: entry[0].lower())
+        catalog = cls(directory)
+        catalog.extend(found)
+        return catalog
+
+    @classmethod
+    def scan_archive(
+        cls,
+        archive: str | Path,
+        pattern: str = PDF_PATTERN,
+        *,
+        archive_order: bool = False,
+    ) -> Catalog:
+        """
+        Discover the files stored in a ZIP or tar archive.
+
+        Members anywhere in the archive whose file name matches ``pattern``
+        are listed, by default sorted by path ignoring case, as files in a
+        directory are. Only the archive's index is read.
+
+        Parameters
+        ----------
+        archive : str | Path
+            The archive to list.
+        pattern : str, optional
+            Glob pattern for member file names (default is ``"*.pdf"``).
+        archive_order : bool, optional
+            Whether to keep the order members are stored in instead.
+
+        Returns
+        -------
+        Catalog
+            The matching members.
+
+        Raises
+        ------
+        OSError
+            If the archive cannot be read.
+        """
+        archive = Path(archive)
+        matches = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        found = [
+            (member.name, member.size, member.mtime_ns)
+            for member in list_members(archive)
+            if matches(os.path.normcase(posixpath.basename(member.name)))
+        ]
+        if not archive_order:
+            found.sort(key=lambda entry: entry[0].lower())
+        catalog = cls(archive.parent, archive.name)
+        catalog.extend(found)
+        return catalog
+
+    @classmethod
+    def scan_source(cls, source: InputSource, pattern: str = PDF_PATTERN) -> Catalog:
+        """
+        Discover the objects of an input source, sorted by name ignoring case.
+
+        Objects anywhere in the source whose file name matches ``pattern``
+        are listed, with the size and modification time the listing reports.
+
+        Parameters
+        ----------
+        source : InputSource
+            The source to list.
+        pattern : str, optional
+            Glob pattern for object file names (default is ``"*.pdf"``).
+
+        Returns
+        -------
+        Catalog
+            The matching objects.
+
+        Raises
+        ------
+        OSError
+            If the source cannot be listed.
+        """
+        matches = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+        found = [
+            (item.name, item.size, item.mtime_ns)
+            for item in source.list_objects()
+            if matches(os.path.normcase(posixpath.basename(item.name)))
+        ]
+        found.sort(key=lambda entry: entry[0].lower())
+        catalog = cls(source.directory, source=source)
+        catalog.extend(found)
+        return catalog
+
+    def append(self, name: str, size: int, mtime_ns: int) -> None:
+        """
+        Add a file.
+
+        Parameters
+        ----------
+        name : str
+            File name in the catalog's directory.
+        size : int
+            Size in bytes.
+        mtime_ns : int
+            Modification time in nanoseconds.
+
+        Returns
+        -------
+        None
+        """
+        self.extend([(name, size, mtime_ns)])
+
+    def extend(self, entries: Iterable[Tuple[str, int, int]]) -> None:
+        """
+        Add files in bulk.
+
+        Parameters
+        ----------
+        entries : Iterable[Tuple[str, int, int]]
+            Name, size and modification time in nanoseconds of each file.
+
+        Returns
+        -------
+        None
+        """
+        names, ends = self._names, self._ends
+        sizes, mtimes = self._sizes, self._mtimes
+        start = len(ends)
+        for name, size, mtime_ns in entries:
+            names += os.fsencode(name)
+            ends.append(len(names))
+            sizes.append(size)
+            mtimes.append(mtime_ns)
+        added = len(ends) - start
+        self._pages.extend(repeat(UNKNOWN_PAGES, added))
+        self._versions.frombytes(bytes(added))
+        self._status.frombytes(bytes(added))
+
+    def record(
+        self,
+        index: int,
+        status: InputStatus,
+        *,
+        pages: Optional[int] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        """
+        Record what validating a file found.
+
+        Parameters
+        ----------
+        index : int
+            Position of the file.
+        status : InputStatus
+            The validation status.
+        pages : int, optional
+            Number of pages, if counted.
+        version : str, optional
+            PDF version from the header, if read.
+
+        Returns
+        -------
+        None
+        """
+        self._status[index] = status
+        self._pages[index] = UNKNOWN_PAGES if pages is None else pages
+        self._versions[index] = _encode_version(version)
+
+    def name(self, index: int) -> str:
+        """
+        Get a file name without building its record.
+
+        Parameters
+        ----------
+        index : int
+            Position of the file.
+
+        Returns
+        -------
+        str
+            The file name.
+        """
+        start = self._ends[index - 1] if index else 0
+        return self._names[start:self._ends[index]].decode(_ENCODING, _ERRORS)
+
+    def without(self, names: Collection[str]) -> Catalog:
+        """
+        Get the catalog less some files.
+
+        Parameters
+        ----------
+        names : Collection[str]
+            File names to leave out; names not in the catalog are ignored.
+
+        Returns
+        -------
+        Catalog
+            The other files, in order, with what validation recorded.
+        """
+        return self._take([i for i in range(len(self)) if self.name(i) not in names])
+
+    def _take(self, picked: Sequence[int]) -> Catalog:
+        subset = Catalog(self.directory, self.archive, self.source)
+        subset.extend((self.name(i), self._sizes[i], self._mtimes[i]) for i in picked)
+        subset._pages = array("l", (self._pages[i] for i in picked))
+        subset._versions = array("B", (self._versions[i] for i in picked))
+        subset._status = array("B", (self._status[i] for i in picked))
+        return subset
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @overload
+    def __getitem__(self, index: int) -> PdfInput: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Catalog: ...
+
+    def __getitem__(self, index: int | slice) -> PdfInput | Catalog:
+        if isinstance(index, slice):
+            return self._take(range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("catalog index out of range")
+        pages = self._pages[index]
+        return PdfInput(
+            self.directory,
+            self.name(index),
+            self._sizes[index],
+            self._mtimes[index],
+            None if pages == UNKNOWN_PAGES else pages,
+            _VERSIONS[self._versions[index]],
+            _STATUSES[self._status[index]],
+            self.archive,
+            self.source,
+        )
+
+    def __iter__(self) -> Iterator[PdfInput]:
+        directory, archive, source = self.directory, self.archive, self.source
+        names, start = self._names, 0
+        fields = zip(
+            self._ends,
+            self._sizes,
+            self._mtimes,
+            self._pages,
+            self._versions,
+            self._status,
+        )
+        for end, size, mtime_ns, pages, version, status in fields:
+            yield PdfInput(
+                directory,
+                names[start:end].decode(_ENCODING, _ERRORS),
+                size,
+                mtime_ns,
+                None if pages == UNKNOWN_PAGES else pages,
+                _VERSIONS[version],
+                _STATUSES[status],
+                archive,
+                source,
+            )
+            start = end
+
+    @property
+    def paths(self) -> List[Path]:
+        """
+        List[Path]: The files' paths, in order, below the archive's if any.
+
+        The objects of a source are listed as their records, whose
+        ``os.fspath`` is their location, since a URL is not a path.
+        """
+        if self.source is not None:
+            return list(self)  # type: ignore[arg-type]
+        base = self.directory / self.archive if self.archive else self.directory
+        return [base / self.name(i) for i in range(len(self))]
+
+    @property
+    def total_bytes(self) -> int:
+        """int: Combined size of the files."""
+        return sum(self._sizes)
+
+    def nbytes(self) -> int:
+        """
+        Get the memory taken by the catalog's buffers.
+
+        Returns
+        -------
+        int
+            Allocated bytes of the name buffer and field arrays.
+        """
+        arrays = (
+            self._ends,
+            self._sizes,
+            self._mtimes,
+            self._pages,
+            self._versions,
+            self._status,
+        )
+        return len(self._names) + sum(a.itemsize * len(a) for a in arrays)
+
+
+def discover_pdfs(
+    directory: str | Path | InputSource, *, archive_order: bool = False
+) -> Catalog:
+    """
+    Catalog the PDF files in a directory, archive or source, in merge order.
+
+    Parameters
+    ----------
+    directory : str | Path | InputSource
+        Path to the directory containing PDF files, or to a ZIP or tar
+        archive of them, or an input source such as an object store.
+    archive_order : bool, optional
+        Whether to keep the order the files are stored in an archive instead
+        of sorting them by name (default is False).
+
+    Returns
+    -------
+    Catalog
+        The PDF files, sorted alphabetically ignoring case.
+
+    Raises
+    ------
+    NoPDFsFoundError
+        If no PDF files are found in the directory.
+    PDFusionError
+        If there's an error accessing the directory.
+    """
+    if isinstance(directory, InputSource):
+        location = directory.locate("")
+        try:
+            catalog = Catalog.scan_source(directory)
+        except OSError as e:
+            raise PDFusionError(f"Error listing {location}: {e}")
+        if not catalog:
+            raise NoPDFsFoundError(location)
+        return catalog
+    dir_path = Path(directory)
+    try:
+        if is_archive(dir_path):
+            catalog = Catalog.scan_archive(dir_path, archive_order=archive_order)
+        elif dir_path.is_dir():
+            catalog = Catalog.scan(dir_path)
+        else:
+            raise PDFusionError(f"Not a directory: {directory}")
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise PDFusionError(f"Error accessing directory {directory}: {e}")
+    if not catalog:
+        raise NoPDFsFoundError(str(dir_path))
+    return catalog
+
+
+__all__ = [
+    "Catalog",
+    "InputStatus",
+    "PdfInput",
+    "as_input",
+    "discover_pdfs",
+    "open_input",
+    "PDF_PATTERN",
+]
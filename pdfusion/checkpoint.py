@@ -0,0 +1,1023 @@
+"""
+Checkpointed, resumable merges for the PDFusion package.
+
+Long merges write their inputs in chunks. Each chunk becomes a part file whose
+objects are numbered after those of the previous parts, and a journal line is
+fsynced once the part is on disk. The final output is assembled by copying the
+parts' object bytes verbatim and adding a page tree, outline and catalog that
+tie them together, so no page is parsed twice. A merge that dies can resume
+from the last journaled part.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    ByteStringObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    PdfObject,
+)
+
+from . import logging as log_utils
+from .catalog import as_input
+from .exceptions import PDFusionError
+from .merger import PdfusionMerger
+from .options import MergeOptions
+from .outlines import group_items, link_items
+from .writer import atomic_output
+
+# Constants
+JOURNAL_NAME: Final[str] = "journal.jsonl"
+JOURNAL_VERSION: Final[int] = 2
+PART_PATTERN: Final[str] = "part_{:05d}.pdf"
+
+logger = log_utils.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    A journaled part of a checkpointed merge.
+
+    Attributes
+    ----------
+    part : str
+        File name of the part in the checkpoint directory.
+    first_input : int
+        Index of the part's first input file.
+    num_inputs : int
+        Number of input files in the part.
+    object_base : int
+        Object numbers used by earlier parts; this part's objects follow.
+    object_end : int
+        Highest object number of this part.
+    body_end : int
+        Offset where the part's objects end and its cross-reference begins.
+    pages : int
+        Number of pages in the part.
+    objects_dropped : int
+        Unreferenced objects left out of the part.
+    bytes_dropped : int
+        Serialized size of the unreferenced objects left out.
+    image_bytes_before : int
+        Encoded size of the part's images that were downsampled.
+    image_bytes_after : int
+        Encoded size of those images after downsampling.
+    duplicate_pages : int
+        Pages of the part's inputs left out as duplicates.
+    input_pages : Tuple[int, ...]
+        Number of pages each of the part's inputs contributed.
+    """
+    part: str
+    first_input: int
+    num_inputs: int
+    object_base: int
+    object_end: int
+    body_end: int
+    pages: int
+    objects_dropped: int = 0
+    bytes_dropped: int = 0
+    image_bytes_before: int = 0
+    image_bytes_after: int = 0
+    duplicate_pages: int = 0
+    input_pages: Tuple[int, ...] = ()
+
+
+def checkpoint_dir(output_path: Path) -> Path:
+    """
+    Get the checkpoint directory of an output file.
+
+    Parameters
+    ----------
+    output_path : Path
+        The final output file.
+
+    Returns
+    -------
+    Path
+        A hidden directory next to the output.
+    """
+    return output_path.with_name(f".{output_path.name}.parts")
+
+
+def find_checkpoint(directory: Path, pattern: str) -> Optional[str]:
+    """
+    Find the output name of the most recent checkpoint in a directory.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory holding the outputs.
+    pattern : str
+        Glob pattern for output file names, such as ``"merged_pdf_*.pdf"``.
+
+    Returns
+    -------
+    str, optional
+        The output file name, or ``None`` if there is no checkpoint.
+    """
+    journals = sorted(
+        directory.glob(f".{pattern}.parts/{JOURNAL_NAME}"),
+        key=lambda path: path.stat().st_mtime,
+    )
+    if not journals:
+        return None
+    return journals[-1].parent.name[1:-len(".parts")]
+
+
+def fingerprint_inputs(paths: Sequence[Path]) -> str:
+    """
+    Identify an input set by file names, sizes and modification times.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        The input files, in merge order. Catalogued inputs are not stat'ed
+        again.
+
+    Returns
+    -------
+    str
+        Hex digest of the input set.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(f"{as_input(path).fingerprint}\n".encode())
+    return digest.hexdigest()
+
+
+def part_settings(options: MergeOptions) -> Dict[str, Any]:
+    """
+    Get the options that shape the parts of a checkpointed merge.
+
+    Parameters
+    ----------
+    options : MergeOptions
+        The merge options.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The options, by name, that change a part's bytes or which inputs it
+        holds, so that parts written under other settings are not resumed.
+    """
+    return {
+        "page_tree_fanout": options.page_tree_fanout,
+        "collect_garbage": options.collect_garbage,
+        # Limits decide which inputs are quarantined
+        "parse_timeout": options.parse_timeout,
+        "parse_memory": options.parse_memory,
+        "image_dpi": options.image_dpi,
+        "image_encoding": options.image_encoding,
+        "image_quality": options.image_quality,
+        "drop_duplicate_pages": options.drop_duplicate_pages,
+        "compress_level": options.compress_level,
+        "bookmarks": options.bookmarks,
+        "bookmark_fanout": options.bookmark_fanout,
+    }
+
+
+def document_id_for(fingerprint: str) -> bytes:
+    """
+    Derive the trailer /ID of a merged output from its input fingerprint.
+
+    Parameters
+    ----------
+    fingerprint : str
+        Fingerprint from :func:`fingerprint_inputs`.
+
+    Returns
+    -------
+    bytes
+        The 16-byte identifier, the same for every merge of the same inputs.
+    """
+    return bytes.fromhex(fingerprint)[:16]
+
+
+class Journal:
+    """
+    Append-only record of the parts written by a checkpointed merge.
+
+    Parameters
+    ----------
+    directory : Path
+        The checkpoint directory.
+    header : Dict[str, Any]
+        Identifies the merge: input fingerprint, chunk size and the options
+        that shape the parts.
+    checkpoints : List[Checkpoint]
+        Parts already written.
+    """
+
+    def __init__(
+        self, directory: Path, header: Dict[str, Any], checkpoints: List[Checkpoint]
+    ) -> None:
+        self.directory = directory
+        self.header = header
+        self.checkpoints = checkpoints
+
+    @classmethod
+    def open(
+        cls,
+        directory: Path,
+        paths: Sequence[Path],
+        chunk_size: int,
+        *,
+        resume: bool = False,
+        settings: Optional[Dict[str, Any]] = None,
+    ) -> Journal:
+        """
+        Open the journal of a merge, resuming or starting over.
+
+        Parameters
+        ----------
+        directory : Path
+            The checkpoint directory.
+        paths : Sequence[Path]
+            The input files, in merge order.
+        chunk_size : int
+            Number of inputs per part of a new checkpoint. A resumed merge
+            keeps the size it was started with.
+        resume : bool, optional
+            Whether to continue from an existing journal (default is False).
+            Without it any existing checkpoint is discarded.
+        settings : Dict[str, Any], optional
+            Options that shape the parts, from :func:`part_settings`. A
+            checkpoint made with other settings is not resumed.
+
+        Returns
+        -------
+        Journal
+            The opened journal.
+
+        Raises
+        ------
+        PDFusionError
+            If the existing checkpoint belongs to other inputs or was made
+            with other settings.
+        """
+        header = {
+            "version": JOURNAL_VERSION,
+            "inputs": fingerprint_inputs(paths),
+            "chunk_size": chunk_size,
+            "settings": settings or {},
+        }
+        journal_path = directory / JOURNAL_NAME
+        if resume and journal_path.exists():
+            found, checkpoints = cls._read(journal_path)
+            if (found.get("version"), found.get("inputs")) != (
+                header["version"],
+                header["inputs"],
+            ):
+                raise PDFusionError(
+                    f"Checkpoint in {directory} was made for different inputs; "
+                    "run without resume to start over"
+                )
+            changed = sorted(
+                name
+                for name in {*header["settings"], *found["settings"]}
+                if header["settings"].get(name) != found["settings"].get(name)
+            )
+            if changed:
+                raise PDFusionError(
+                    f"Checkpoint in {directory} was made with different "
+                    f"{', '.join(changed)}; run without resume to start over"
+                )
+            # Parts keep the size the merge started with
+            journal = cls(directory, found, checkpoints)
+            journal._verify_parts()
+            # Written anew, so that a torn last line is not continued by the
+            # next record
+            journal._rewrite()
+            return journal
+
+        if resume:
+            logger.info("No checkpoint to resume from; starting from the beginning")
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True)
+        journal = cls(directory, header, [])
+        journal._append(header)
+        return journal
+
+    @staticmethod
+    def _read(path: Path) -> Tuple[Dict[str, Any], List[Checkpoint]]:
+        lines = path.read_text(encoding="utf-8").splitlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn last line: its part was never acknowledged
+                break
+        if not records:
+            return {}, []
+        return records[0], [Checkpoint(**record) for record in records[1:]]
+
+    def _verify_parts(self) -> None:
+        for index, checkpoint in enumerate(self.checkpoints):
+            part = self.directory / checkpoint.part
+            if not part.is_file() or part.stat().st_size <= checkpoint.body_end:
+                logger.warning(f"Checkpoint part {part.name} is missing or truncated")
+                self.checkpoints = self.checkpoints[:index]
+                return
+
+    def _rewrite(self) -> None:
+        # The header and checkpoints, replacing the journal atomically
+        records = [self.header, *(asdict(kept) for kept in self.checkpoints)]
+        journal_path = self.directory / JOURNAL_NAME
+        with atomic_output(journal_path, digest=None, fsync=True) as f:
+            f.write(
+                "".join(
+                    json.dumps(record, separators=(",", ":")) + "\n"
+                    for record in records
+                ).encode("utf-8")
+            )
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with open(self.directory / JOURNAL_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def next_input(self) -> int:
+        """int: Index of the first input not yet written to a part."""
+        if not self.checkpoints:
+            return 0
+        last = self.checkpoints[-1]
+        return last.first_input + last.num_inputs
+
+    @property
+    def next_object(self) -> int:
+        """int: Object numbers used by the parts written so far."""
+        return self.checkpoints[-1].object_end if self.checkpoints else 0
+
+    def record(self, checkpoint: Checkpoint) -> None:
+        """
+        Durably record a part that is already on disk.
+
+        Parameters
+        ----------
+        checkpoint : Checkpoint
+            The part to record.
+
+        Returns
+        -------
+        None
+        """
+        self._append(asdict(checkpoint))
+        self.checkpoints.append(checkpoint)
+
+    def remove(self) -> None:
+        """
+        Delete the checkpoint directory after a successful merge.
+
+        Returns
+        -------
+        None
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PartsResult(NamedTuple):
+    """
+    Result of a checkpointed merge.
+
+    Attributes
+    ----------
+    total_pages : int
+        The total number of pages in the output.
+    bytes_written : int
+        The size of the output in bytes.
+    digest : str, optional
+        Hex checksum of the output.
+    objects_dropped : int
+        Unreferenced objects left out of the parts.
+    bytes_dropped : int
+        Serialized size of the unreferenced objects left out.
+    image_bytes_before : int
+        Encoded size of the images that were downsampled.
+    image_bytes_after : int
+        Encoded size of those images after downsampling.
+    duplicate_pages : int
+        Pages left out as duplicates.
+    input_pages : Tuple[int, ...]
+        Number of pages each input contributed.
+    """
+    total_pages: int
+    bytes_written: int
+    digest: str | None
+    objects_dropped: int
+    bytes_dropped: int
+    image_bytes_before: int = 0
+    image_bytes_after: int = 0
+    duplicate_pages: int = 0
+    input_pages: Tuple[int, ...] = ()
+
+
+def write_chunk(
+    path: Path,
+    paths: Sequence[Path],
+    first_input: int,
+    object_base: int,
+    options: MergeOptions,
+    *,
+    fsync: bool = False,
+    verbose: bool = False,
+) -> Checkpoint:
+    """
+    Merge a chunk of inputs into a part file numbered after ``object_base``.
+
+    Parameters
+    ----------
+    path : Path
+        The part file to write.
+    paths : Sequence[Path]
+        The chunk's input files.
+    first_input : int
+        Index of the chunk's first input.
+    object_base : int
+        Object numbers to leave below the part's objects.
+    options : MergeOptions
+        Merge options for the part's page tree and object collection.
+    fsync : bool, optional
+        Whether to flush the part to stable storage (default is False).
+    verbose : bool, optional
+        Whether to log each file as it is appended (default is False).
+
+    Returns
+    -------
+    Checkpoint
+        Description of the written part.
+    """
+    # Parts keep their outlines flat, to be grouped when assembled
+    merger = PdfusionMerger(
+        replace(options, bookmark_fanout=0), object_base=object_base
+    )
+    inputs = ExitStack()
+    try:
+        merger.append_files(paths, inputs, verbose=verbose)
+        images = merger.finish_images()
+        pages = len(merger.pages)
+        started = perf_counter()
+        with atomic_output(
+            path, digest=None, fsync=fsync, buffer_size=options.buffer_size
+        ) as stream:
+            merger.write(stream)
+        if options.metrics is not None:
+            options.metrics.write_seconds.observe(perf_counter() - started)
+        writer = merger.output
+        collection = writer.collection
+        return Checkpoint(
+            part=path.name,
+            first_input=first_input,
+            num_inputs=len(paths),
+            object_base=object_base,
+            object_end=len(writer._objects),
+            body_end=writer.xref_location,
+            pages=pages,
+            objects_dropped=collection.objects_dropped if collection else 0,
+            bytes_dropped=collection.bytes_dropped if collection else 0,
+            image_bytes_before=images.bytes_before,
+            image_bytes_after=images.bytes_after,
+            duplicate_pages=merger.duplicate_pages,
+            input_pages=tuple(merger.input_pages),
+        )
+    finally:
+        merger.close()
+        inputs.close()
+
+
+def write_part(
+    journal: Journal,
+    paths: Sequence[Path],
+    first_input: int,
+    options: MergeOptions,
+    *,
+    verbose: bool = False,
+) -> Checkpoint:
+    """
+    Merge a chunk of inputs into a part file and journal it.
+
+    The part's objects are numbered after those of the journaled parts, and
+    the part is fsynced before its journal line is written.
+
+    Parameters
+    ----------
+    journal : Journal
+        The journal of the merge.
+    paths : Sequence[Path]
+        The chunk's input files.
+    first_input : int
+        Index of the chunk's first input.
+    options : MergeOptions
+        Merge options for the part's page tree and object collection.
+    verbose : bool, optional
+        Whether to log each file as it is appended (default is False).
+
+    Returns
+    -------
+    Checkpoint
+        The recorded part.
+    """
+    name = PART_PATTERN.format(len(journal.checkpoints))
+    checkpoint = write_chunk(
+        journal.directory / name,
+        paths,
+        first_input,
+        journal.next_object,
+        options,
+        fsync=True,
+        verbose=verbose,
+    )
+    journal.record(checkpoint)
+    logger.debug(
+        f"Checkpoint {name}: inputs {first_input + 1}-{first_input + len(paths)}"
+    )
+    return checkpoint
+
+
+def _ref(num: int) -> IndirectObject:
+    # Only the number is serialized
+    return IndirectObject(num, 0, None)
+
+
+def _write_object(
+    stream: BinaryIO, num: int, obj: PdfObject, offsets: Dict[int, int]
+) -> None:
+    offsets[num] = stream.tell()
+    stream.write(b"%d 0 obj\n" % num)
+    obj.write_to_stream(stream, None)
+    stream.write(b"\nendobj\n")
+
+
+def _copy_range(source: BinaryIO, stream: BinaryIO, start: int, end: int) -> None:
+    source.seek(start)
+    remaining = end - start
+    while remaining:
+        chunk = source.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise PDFusionError(f"Checkpoint part {source.name} is truncated")
+        stream.write(chunk)
+        remaining -= len(chunk)
+
+
+def _take(container: DictionaryObject, key: str, dropped: Set[int]) -> Any:
+    # Resolve a structural entry whose indirect object gets replaced
+    value = container.get(key)
+    if isinstance(value, IndirectObject):
+        dropped.add(value.idnum)
+        value = value.get_object()
+    return value
+
+
+def _group_nodes(
+    level: List[Tuple[int, DictionaryObject]], fanout: int, allocate: Iterator[int]
+) -> List[Tuple[int, DictionaryObject]]:
+    # Split a level of /Pages nodes evenly under at most `fanout` parents
+    groups = -(-len(level) // fanout)
+    size, extra = divmod(len(level), groups)
+    parents, start = [], 0
+    for index in range(groups):
+        kids = level[start:start + size + (index < extra)]
+        start += len(kids)
+        num = next(allocate)
+        node = DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Pages"),
+                NameObject("/Kids"): ArrayObject([_ref(k) for k, _ in kids]),
+                NameObject("/Count"): NumberObject(
+                    sum(int(kid["/Count"]) for _, kid in kids)
+                ),
+            }
+        )
+        for _, kid in kids:
+            kid[NameObject("/Parent")] = _ref(num)
+        parents.append((num, node))
+    return parents
+
+
+class Assembly(NamedTuple):
+    """
+    Layout of a document assembled from parts.
+
+    Attributes
+    ----------
+    pages : int
+        The total number of pages written.
+    object_end : int
+        Highest object number written.
+    body_end : int
+        Offset where the objects end and the cross-reference table begins.
+    """
+    pages: int
+    object_end: int
+    body_end: int
+
+
+def assemble(
+    directory: Path,
+    parts: Sequence[Checkpoint],
+    stream: BinaryIO,
+    fanout: int,
+    *,
+    next_object: int,
+    document_id: bytes | None = None,
+    sparse_xref: bool = False,
+    outline_fanout: int = 0,
+) -> Assembly:
+    """
+    Write one document from part files whose object numbers do not overlap.
+
+    Each part's objects are copied byte for byte. The parts' page tree roots
+    become subtrees of a new page tree, their top-level outline items are
+    chained under one outline, their named destinations are combined, and a
+    new catalog and cross-reference table are written. The result can itself
+    be assembled again as a part.
+
+    Parameters
+    ----------
+    directory : Path
+        Directory holding the part files.
+    parts : Sequence[Checkpoint]
+        The parts, in page order.
+    stream : BinaryIO
+        Writable binary stream supporting ``tell()``.
+    fanout : int
+        Maximum kids per new /Pages node; 0 puts every part under the root.
+    next_object : int
+        Object numbers in use; the at most ``len(parts) + 2`` new objects,
+        and any outline groups, are numbered after it.
+    document_id : bytes, optional
+        Identifier for the trailer /ID; none is written if not provided.
+    sparse_xref : bool, optional
+        Whether to list only the objects written in the cross-reference
+        table, in subsections, instead of every number from 0 (default is
+        False). Suits intermediate parts, whose numbers are sparse.
+    outline_fanout : int, optional
+        Most top-level outline items; more are gathered under nested groups
+        (default is 0, which leaves them as they are). Only for the final
+        output, since groups take numbers beyond ``len(parts) + 2``.
+
+    Returns
+    -------
+    Assembly
+        Page count and layout of the written document.
+    """
+    offsets: Dict[int, int] = {}
+    part_roots: List[Tuple[int, DictionaryObject]] = []
+    outline: List[Tuple[int, DictionaryObject]] = []
+    outline_count = 0
+    dests: List[Tuple[Any, Any]] = []
+    info: Optional[IndirectObject] = None
+    header = b"%PDF-1.3"
+
+    for index, checkpoint in enumerate(parts):
+        path = directory / checkpoint.part
+        with open(path, "rb") as source:
+            reader = PdfReader(source)
+            header = max(header, reader.pdf_header.encode("latin-1"))
+            if index == 0:
+                stream.write(header + b"\n%\xe2\xe3\xcf\xd3\n")
+            free = reader.xref_free_entry.get(0, {})
+            live = {
+                num: offset
+                for num, offset in reader.xref[0].items()
+                if num and not free.get(num)
+            }
+
+            # Structure that the assembled document replaces
+            dropped = {reader.trailer.raw_get("/Root").idnum}
+            part_info = reader.trailer.raw_get("/Info")
+            if info is None:
+                info = part_info
+            else:
+                dropped.add(part_info.idnum)
+            catalog = reader.trailer["/Root"]
+            pages_ref = catalog.raw_get("/Pages")
+            part_roots.append((pages_ref.idnum, catalog["/Pages"]))
+            first_item = len(outline)
+            root = _take(catalog, "/Outlines", dropped)
+            if root:
+                outline_count += int(root.get("/Count", 0))
+                item = root.raw_get("/First") if "/First" in root else None
+                while item is not None:
+                    node = item.get_object()
+                    outline.append((item.idnum, node))
+                    item = node.raw_get("/Next") if "/Next" in node else None
+            names = _take(catalog, "/Names", dropped)
+            tree = _take(names, "/Dests", dropped) if names else None
+            if tree:
+                entries = _take(tree, "/Names", dropped) or []
+                dests.extend(zip(entries[::2], entries[1::2]))
+
+            # Objects are laid out back to back; copy runs of kept ones
+            replaced = dropped | {pages_ref.idnum}
+            replaced.update(num for num, _ in outline[first_item:])
+            layout = sorted(live.items(), key=lambda entry: entry[1])
+            run_start: Optional[int] = None
+            for num, offset in layout:
+                if num in replaced:
+                    if run_start is not None:
+                        _copy_range(source, stream, run_start, offset)
+                        run_start = None
+                    continue
+                if run_start is None:
+                    run_start, shift = offset, stream.tell() - offset
+                offsets[num] = offset + shift
+            if run_start is not None:
+                _copy_range(source, stream, run_start, checkpoint.body_end)
+
+    allocate = iter(range(next_object + 1, 1 << 62))
+
+    # Page tree over the parts' own (balanced) page trees
+    level = part_roots
+    while fanout >= 2 and len(level) > fanout:
+        new_level = _group_nodes(level, fanout, allocate)
+        for num, node in level:
+            _write_object(stream, num, node, offsets)
+        level = new_level
+    if len(level) == 1:
+        root_num = level[0][0]
+        level[0][1].pop(NameObject("/Parent"), None)
+        _write_object(stream, root_num, level[0][1], offsets)
+    else:
+        (root_num, root), = _group_nodes(level, len(level), allocate)
+        for num, node in level:
+            _write_object(stream, num, node, offsets)
+        _write_object(stream, root_num, root, offsets)
+
+    catalog = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): _ref(root_num),
+        }
+    )
+    if outline:
+        groups: List[Tuple[int, DictionaryObject]] = []
+
+        def add_group(group: DictionaryObject) -> IndirectObject:
+            groups.append((next(allocate), group))
+            return _ref(groups[-1][0])
+
+        top = group_items(
+            [(_ref(num), item) for num, item in outline], outline_fanout, add_group
+        )
+        outline_num = next(allocate)
+        visible = link_items(_ref(outline_num), top)
+        for num, item in [*outline, *groups]:
+            _write_object(stream, num, item, offsets)
+        _write_object(
+            stream,
+            outline_num,
+            DictionaryObject(
+                {
+                    NameObject("/Type"): NameObject("/Outlines"),
+                    NameObject("/First"): top[0][0],
+                    NameObject("/Last"): top[-1][0],
+                    NameObject("/Count"): NumberObject(
+                        visible if groups else outline_count
+                    ),
+                }
+            ),
+            offsets,
+        )
+        catalog[NameObject("/Outlines")] = _ref(outline_num)
+        catalog[NameObject("/PageMode")] = NameObject("/UseOutlines")
+    if dests:
+        # Each part's names are sorted, but a name tree must be sorted as a
+        # whole, as PdfusionMerger writes it
+        dests.sort(key=lambda entry: entry[0])
+        names_array = ArrayObject(value for entry in dests for value in entry)
+        catalog[NameObject("/Names")] = DictionaryObject(
+            {
+                NameObject("/Dests"): DictionaryObject(
+                    {NameObject("/Names"): names_array}
+                )
+            }
+        )
+    root_ref = next(allocate)
+    _write_object(stream, root_ref, catalog, offsets)
+
+    size = root_ref + 1
+    xref_location = stream.tell()
+    if sparse_xref:
+        stream.write(_sparse_xref(offsets).encode())
+    else:
+        # One cross-reference section; replaced and dropped numbers become
+        # free
+        free_nums = [num for num in range(1, size) if num not in offsets]
+        next_free = dict(zip([0] + free_nums, free_nums + [0]))
+        lines = [f"xref\n0 {size}\n{next_free[0]:010} 65535 f \n"]
+        for num in range(1, size):
+            if num in offsets:
+                lines.append(f"{offsets[num]:010} 00000 n \n")
+            else:
+                lines.append(f"{next_free[num]:010} 00001 f \n")
+        stream.write("".join(lines).encode())
+
+    trailer = DictionaryObject(
+        {
+            NameObject("/Size"): NumberObject(size),
+            NameObject("/Root"): _ref(root_ref),
+        }
+    )
+    if info is not None:
+        trailer[NameObject("/Info")] = _ref(info.idnum)
+    if document_id is not None:
+        ident = ByteStringObject(document_id)
+        trailer[NameObject("/ID")] = ArrayObject([ident, ident])
+    stream.write(b"trailer\n")
+    trailer.write_to_stream(stream, None)
+    stream.write(f"\nstartxref\n{xref_location}\n%%EOF\n".encode())
+    return Assembly(
+        sum(checkpoint.pages for checkpoint in parts), root_ref, xref_location
+    )
+
+
+def _sparse_xref(offsets: Dict[int, int]) -> str:
+    # A subsection per run of consecutive object numbers
+    lines = ["xref\n0 1\n0000000000 65535 f \n"]
+    nums = sorted(offsets)
+    start = 0
+    for index in range(1, len(nums) + 1):
+        if index == len(nums) or nums[index] != nums[index - 1] + 1:
+            lines.append(f"{nums[start]} {index - start}\n")
+            lines.extend(f"{offsets[num]:010} 00000 n \n" for num in nums[start:index])
+            start = index
+    return "".join(lines)
+
+
+def assemble_parts(
+    journal: Journal, stream: BinaryIO, fanout: int, outline_fanout: int = 0
+) -> int:
+    """
+    Write the final output from the journaled parts.
+
+    Parameters
+    ----------
+    journal : Journal
+        The journal listing every part, in order.
+    stream : BinaryIO
+        Writable binary stream supporting ``tell()``.
+    fanout : int
+        Maximum kids per new /Pages node; 0 puts every part under the root.
+    outline_fanout : int, optional
+        Most top-level outline items before they are grouped (default is 0,
+        no groups).
+
+    Returns
+    -------
+    int
+        The total number of pages written.
+    """
+    return assemble(
+        journal.directory,
+        journal.checkpoints,
+        stream,
+        fanout,
+        next_object=journal.next_object,
+        document_id=document_id_for(journal.header["inputs"]),
+        outline_fanout=outline_fanout,
+    ).pages
+
+
+def merge_in_parts(
+    paths: Sequence[Path],
+    output_path: Path,
+    options: MergeOptions,
+    *,
+    resume: bool = False,
+    verbose: bool = False,
+) -> PartsResult:
+    """
+    Merge files with a checkpoint after every ``options.checkpoint_every``.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        The input files, in merge order.
+    output_path : Path
+        The final output file.
+    options : MergeOptions
+        Merge options; ``checkpoint_every`` sets the part size of a new
+        checkpoint.
+    resume : bool, optional
+        Whether to continue from the existing checkpoint of ``output_path``
+        (default is False).
+    verbose : bool, optional
+        Whether to log each file as it is appended (default is False).
+
+    Returns
+    -------
+    PartsResult
+        Statistics of the assembled output.
+
+    Raises
+    ------
+    PDFusionError
+        If the checkpoint to resume belongs to other inputs or was made with
+        other options.
+    """
+    journal = Journal.open(
+        checkpoint_dir(output_path),
+        paths,
+        options.checkpoint_every,
+        resume=resume,
+        settings=part_settings(options),
+    )
+    chunk_size = journal.header["chunk_size"]
+    if journal.next_input:
+        logger.info(
+            f"Resuming after {journal.next_input} of {len(paths)} files "
+            f"from checkpoint {journal.directory.name}"
+        )
+
+    for first in range(journal.next_input, len(paths), chunk_size):
+        try:
+            write_part(
+                journal, paths[first:first + chunk_size], first, options, verbose=verbose
+            )
+        except BaseException:
+            if journal.checkpoints:
+                logger.info(
+                    f"Checkpoint saved after {journal.next_input} of {len(paths)} "
+                    "files; resume to continue"
+                )
+            raise
+
+    started = perf_counter()
+    with atomic_output(
+        output_path,
+        digest=options.digest,
+        fsync=options.fsync,
+        buffer_size=options.buffer_size,
+    ) as stream:
+        total_pages = assemble_parts(
+            journal, stream, options.page_tree_fanout, options.bookmark_fanout
+        )
+    if options.metrics is not None:
+        options.metrics.write_seconds.observe(perf_counter() - started)
+    journal.remove()
+
+    return PartsResult(
+        total_pages,
+        stream.bytes_written,
+        stream.hexdigest(),
+        sum(checkpoint.objects_dropped for checkpoint in journal.checkpoints),
+        sum(checkpoint.bytes_dropped for checkpoint in journal.checkpoints),
+        sum(checkpoint.image_bytes_before for checkpoint in journal.checkpoints),
+        sum(checkpoint.image_bytes_after for checkpoint in journal.checkpoints),
+        sum(checkpoint.duplicate_pages for checkpoint in journal.checkpoints),
+        tuple(
+            pages
+            for checkpoint in journal.checkpoints
+            for pages in checkpoint.input_pages
+        ),
+    )
+
+
+__all__ = [
+    "Assembly",
+    "Checkpoint",
+    "Journal",
+    "PartsResult",
+    "assemble",
+    "assemble_parts",
+    "checkpoint_dir",
+    "document_id_for",
+    "find_checkpoint",
+    "fingerprint_inputs",
+    "merge_in_parts",
+    "write_chunk",
+    "write_part",
+]
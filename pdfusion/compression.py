@@ -0,0 +1,261 @@
+"""
+Output stream compression for the PDFusion package.
+
+Inputs written without compression, such as those from some scanners and
+report generators, make merged outputs several times larger than they need
+to be, and deflating their streams one after another makes zlib the slowest
+part of writing the output. This module deflates unfiltered streams in a
+thread pool, since zlib releases the GIL while it works. Large streams are
+split into chunks that are compressed at the same time, each primed with the
+end of the chunk before it, and joined into one valid Flate stream, as pigz
+does.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Final, List, NamedTuple, Optional, Tuple
+
+from PyPDF2.generic import EncodedStreamObject, NameObject
+
+from . import logging as log_utils
+from .parallel import resolve_workers
+
+# Constants
+DEFAULT_COMPRESS_LEVEL: Final[int] = 6
+DEFAULT_CHUNK_SIZE: Final[int] = 256 * 1024
+# Deflate looks back at most this far, so a chunk primed with this much of
+# the data before it compresses as well as if it were not split
+WINDOW_SIZE: Final[int] = 32 * 1024
+# Streams smaller than this rarely shrink once the filter entry is added
+MIN_STREAM_SIZE: Final[int] = 64
+
+_ADLER_BASE: Final[int] = 65521
+
+logger = log_utils.get_logger(__name__)
+
+
+class CompressionStats(NamedTuple):
+    """
+    Streams compressed while writing an output.
+
+    Attributes
+    ----------
+    streams : int
+        Number of streams replaced by compressed ones.
+    bytes_before : int
+        Size of those streams before compression.
+    bytes_after : int
+        Size of those streams after compression.
+    """
+    streams: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def adler32_combine(adler1: int, adler2: int, length2: int) -> int:
+    """
+    Combine the Adler-32 checksums of two consecutive pieces of data.
+
+    Parameters
+    ----------
+    adler1 : int
+        Checksum of the first piece.
+    adler2 : int
+        Checksum of the second piece.
+    length2 : int
+        Length of the second piece.
+
+    Returns
+    -------
+    int
+        Checksum of both pieces, as ``zlib.adler32`` would compute it.
+    """
+    # zlib's adler32_combine, which Python's zlib module does not expose
+    remainder = length2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = remainder * sum1 % _ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + _ADLER_BASE - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - remainder
+    return sum1 % _ADLER_BASE | (sum2 % _ADLER_BASE) << 16
+
+
+def _deflate_chunk(
+    data: memoryview, start: int, end: int, level: int
+) -> Tuple[bytes, int, int]:
+    # Raw deflate of data[start:end] and the chunk's checksum and length.
+    # All but the last chunk end on a byte boundary, so that the next
+    # chunk's output can follow it.
+    dictionary = data[max(0, start - WINDOW_SIZE):start]
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunk = data[start:end]
+    last = end == len(data)
+    deflated = compressor.compress(chunk)
+    deflated += compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return deflated, zlib.adler32(chunk), end - start
+
+
+def deflate(
+    data: bytes,
+    level: int = DEFAULT_COMPRESS_LEVEL,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> bytes:
+    """
+    Compress data into one zlib stream, in chunks compressed in parallel.
+
+    Parameters
+    ----------
+    data : bytes
+        The data to compress.
+    level : int, optional
+        zlib compression level, from 1 to 9 (default is 6).
+    chunk_size : int, optional
+        Bytes compressed per task (default is 256 KiB).
+    pool : ThreadPoolExecutor, optional
+        Threads to compress the chunks in; they are compressed in the
+        calling thread if not provided. The output is the same either way.
+
+    Returns
+    -------
+    bytes
+        A zlib stream that ``zlib.decompress`` and PDF readers decode to
+        ``data``.
+    """
+    return _join(_submit(data, level, chunk_size, pool), level)
+
+
+def _submit(
+    data: bytes,
+    level: int,
+    chunk_size: int,
+    pool: Optional[ThreadPoolExecutor],
+) -> List[Any]:
+    view = memoryview(data)
+    bounds = [
+        (start, min(start + chunk_size, len(data)))
+        for start in range(0, max(len(data), 1), chunk_size)
+    ]
+    if pool is None:
+        return [_deflate_chunk(view, start, end, level) for start, end in bounds]
+    return [
+        pool.submit(_deflate_chunk, view, start, end, level) for start, end in bounds
+    ]
+
+
+def _join(chunks: List[Any], level: int) -> bytes:
+    # A zlib header, the chunks' raw deflate data back to back, and the
+    # checksum of the whole data
+    parts = [zlib.compress(b"", level)[:2]]
+    checksum = 1
+    for chunk in chunks:
+        deflated, adler, length = (
+            chunk.result() if isinstance(chunk, Future) else chunk
+        )
+        parts.append(deflated)
+        checksum = adler32_combine(checksum, adler, length)
+    parts.append(checksum.to_bytes(4, "big"))
+    return b"".join(parts)
+
+
+def compress_streams(
+    objects: List[Any],
+    level: int = DEFAULT_COMPRESS_LEVEL,
+    *,
+    threads: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> CompressionStats:
+    """
+    Flate-compress the unfiltered streams of a writer's objects.
+
+    Every stream is split into chunks, and all chunks of all streams are
+    compressed at once by the thread pool, so that many small streams and a
+    few large ones both keep every thread busy. Chunks do not depend on the
+    number of threads, so the output does not either. Each stream is replaced by
+    a compressed copy only if the copy is smaller; the objects themselves,
+    which may be shared with a cached reader, are left unchanged.
+
+    Parameters
+    ----------
+    objects : List
+        The writer's object list, updated in place; None entries are
+        skipped.
+    level : int, optional
+        zlib compression level, from 1 to 9 (default is 6).
+    threads : int, optional
+        Compression threads; 0 means one per CPU (default is 0).
+    chunk_size : int, optional
+        Bytes compressed per task (default is 256 KiB).
+
+    Returns
+    -------
+    CompressionStats
+        Number and sizes of the streams replaced.
+    """
+    # Only streams have _data; checking for it first avoids isinstance
+    # checks against PyPDF2's slow protocol classes
+    found = []
+    for index, obj in enumerate(objects):
+        if (
+            hasattr(obj, "_data")
+            and "/Filter" not in obj
+            and len(obj._data or b"") >= MIN_STREAM_SIZE
+        ):
+            found.append((index, obj.get_data()))
+    if not found:
+        return CompressionStats()
+
+    threads = resolve_workers(threads)
+    total = sum(len(data) for _, data in found)
+    pool = None
+    if threads > 1 and total > chunk_size:
+        pool = ThreadPoolExecutor(threads, thread_name_prefix="pdfusion-deflate")
+    try:
+        pending = [
+            (index, data, _submit(data, level, chunk_size, pool))
+            for index, data in found
+        ]
+        streams = before = after = 0
+        for index, data, chunks in pending:
+            deflated = _join(chunks, level)
+            if len(deflated) >= len(data):
+                continue
+            original = objects[index]
+            compressed = EncodedStreamObject()
+            dict.update(compressed, original)
+            compressed[NameObject("/Filter")] = NameObject("/FlateDecode")
+            compressed.pop(NameObject("/DecodeParms"), None)
+            compressed._data = deflated
+            compressed.indirect_reference = getattr(
+                original, "indirect_reference", None
+            )
+            objects[index] = compressed
+            streams += 1
+            before += len(data)
+            after += len(deflated)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if streams:
+        logger.debug(
+            f"Compressed {streams} streams from {before:,} to {after:,} bytes"
+        )
+    return CompressionStats(streams, before, after)
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_COMPRESS_LEVEL",
+    "CompressionStats",
+    "adler32_combine",
+    "compress_streams",
+    "deflate",
+]
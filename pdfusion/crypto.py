@@ -0,0 +1,515 @@
+"""
+Encrypted-input support for the PDFusion package.
+
+This module loads password maps, unlocks encrypted inputs with a cache of
+derived document keys, and writes decrypted copies of encrypted files in
+worker processes so they can be merged like any other input.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from PyPDF2 import PdfReader
+from PyPDF2._encryption import Encryption, PasswordType
+from PyPDF2.generic import (
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+from .catalog import open_input
+from .exceptions import PDFusionError, PDFusionPasswordError
+from .parallel import ordered_map, resolve_workers
+from .scheduler import estimate_footprint
+
+# Constants
+PASSWORDS_ENV: Final[str] = "PDFUSION_PASSWORDS"
+PASSWORD_FILE_ENV: Final[str] = "PDFUSION_PASSWORD_FILE"
+FALLBACK_KEY: Final[str] = "*"
+SNIFF_WINDOW: Final[int] = 64 * 1024
+
+
+@dataclass
+class PasswordMap:
+    """
+    Passwords to try when unlocking encrypted inputs.
+
+    Attributes
+    ----------
+    files : Dict[str, List[str]]
+        Passwords for specific inputs, keyed by file name.
+    fallback : List[str]
+        Passwords tried for every encrypted input after its own.
+    """
+    files: Dict[str, List[str]] = field(default_factory=dict)
+    fallback: List[str] = field(default_factory=list)
+
+    def candidates(self, name: str) -> Tuple[str, ...]:
+        """
+        Get the passwords to try for an input, most specific first.
+
+        Parameters
+        ----------
+        name : str
+            File name or path of the input.
+
+        Returns
+        -------
+        Tuple[str, ...]
+            The passwords for ``name`` followed by the fallback passwords.
+        """
+        own = self.files.get(Path(name).name, [])
+        return tuple(dict.fromkeys([*own, *self.fallback]))
+
+    def update(self, other: PasswordMap) -> None:
+        """
+        Add the passwords of another map to this one.
+
+        Parameters
+        ----------
+        other : PasswordMap
+            The map to merge in.
+
+        Returns
+        -------
+        None
+        """
+        for name, passwords in other.files.items():
+            self.files.setdefault(name, []).extend(passwords)
+        self.fallback.extend(other.fallback)
+
+    @classmethod
+    def parse(cls, text: str) -> PasswordMap:
+        """
+        Parse a password map.
+
+        A JSON object maps file names to a password or a list of passwords,
+        with ``"*"`` holding passwords to try for every file. A JSON list is a
+        list of passwords to try for every file. Any other text is read as one
+        password per line.
+
+        Parameters
+        ----------
+        text : str
+            The password map source.
+
+        Returns
+        -------
+        PasswordMap
+            The parsed map.
+
+        Raises
+        ------
+        PDFusionError
+            If the JSON is not an object or list of strings.
+        """
+        stripped = text.strip()
+        if not stripped.startswith(("{", "[")):
+            return cls(fallback=[line for line in text.splitlines() if line])
+
+        try:
+            data: Any = json.loads(stripped)
+        except json.JSONDecodeError as e:
+            raise PDFusionError(f"Invalid password map: {e}")
+
+        if isinstance(data, list):
+            return cls(fallback=_as_passwords(data))
+        if not isinstance(data, dict):
+            raise PDFusionError("Invalid password map: expected an object or list")
+        files = {name: _as_passwords(value) for name, value in data.items()}
+        return cls(files=files, fallback=files.pop(FALLBACK_KEY, []))
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> PasswordMap:
+        """
+        Load a password map from a file.
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to a password map; see :meth:`parse` for the format.
+
+        Returns
+        -------
+        PasswordMap
+            The loaded map.
+
+        Raises
+        ------
+        PDFusionError
+            If the file cannot be read or parsed.
+        """
+        try:
+            text = Path(path).read_text(encoding="utf-8")
+        except OSError as e:
+            raise PDFusionError(f"Cannot read password file {path}: {e}")
+        return cls.parse(text)
+
+    @classmethod
+    def from_env(cls, environ: Optional[Dict[str, str]] = None) -> PasswordMap:
+        """
+        Load a password map from the environment.
+
+        ``PDFUSION_PASSWORD_FILE`` names a password map file and
+        ``PDFUSION_PASSWORDS`` holds a password map inline; both are used when
+        set.
+
+        Parameters
+        ----------
+        environ : Dict[str, str], optional
+            Environment to read. Defaults to ``os.environ``.
+
+        Returns
+        -------
+        PasswordMap
+            The loaded map, empty when neither variable is set.
+        """
+        env = os.environ if environ is None else environ
+        passwords = cls()
+        if env.get(PASSWORD_FILE_ENV):
+            passwords.update(cls.from_file(env[PASSWORD_FILE_ENV]))
+        if env.get(PASSWORDS_ENV):
+            passwords.update(cls.parse(env[PASSWORDS_ENV]))
+        return passwords
+
+
+def _as_passwords(value: Any) -> List[str]:
+    values = [value] if isinstance(value, str) else value
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        raise PDFusionError("Invalid password map: passwords must be strings")
+    return list(values)
+
+
+class KeyCache:
+    """
+    Cache of derived document keys.
+
+    Deriving a document key from a password costs up to 50 MD5 rounds (RC4
+    and AES-128) or the iterated SHA-2 hash of AES-256, and every wrong
+    password tried costs the same again. The cache remembers the key for each
+    encryption dictionary it has unlocked, plus the passwords that worked
+    most recently, which statements from the same generator tend to share.
+    Each object is then decrypted with the cached key.
+    """
+
+    def __init__(self) -> None:
+        self._keys: Dict[bytes, Tuple[bytes, PasswordType]] = {}
+        self._recent: List[str] = []
+
+    @staticmethod
+    def fingerprint(encryption: Encryption) -> bytes:
+        """
+        Identify a document key by the encryption dictionary and file ID.
+
+        Parameters
+        ----------
+        encryption : Encryption
+            The encryption handler of a reader.
+
+        Returns
+        -------
+        bytes
+            A digest of everything the document key is derived from.
+        """
+        digest = hashlib.sha256(bytes(encryption.id1_entry or b""))
+        for key in ("/R", "/P", "/Length", "/O", "/U", "/OE", "/UE"):
+            value = encryption.entry.get(key)
+            if value is not None:
+                value = value.get_object()
+                value = getattr(value, "original_bytes", value)
+            digest.update(repr((key, value)).encode("latin-1", "replace"))
+        return digest.digest()
+
+    def unlock(self, reader: PdfReader, candidates: Sequence[str]) -> bool:
+        """
+        Decrypt a reader using a cached key or the candidate passwords.
+
+        Parameters
+        ----------
+        reader : PdfReader
+            An encrypted reader.
+        candidates : Sequence[str]
+            Passwords to try, after those that unlocked recent documents.
+
+        Returns
+        -------
+        bool
+            True if the reader was unlocked.
+        """
+        encryption = reader._encryption
+        if encryption is None or encryption.is_decrypted():
+            # PdfReader already tried the empty user password
+            return True
+        fingerprint = self.fingerprint(encryption)
+        cached = self._keys.get(fingerprint)
+        if cached is not None:
+            encryption._key, encryption._password_type = cached
+            return True
+
+        preferred = [p for p in self._recent if p in candidates]
+        for password in dict.fromkeys([*preferred, *candidates]):
+            if reader.decrypt(password) != PasswordType.NOT_DECRYPTED:
+                self._keys[fingerprint] = (
+                    encryption._key,
+                    encryption._password_type,
+                )
+                if password in self._recent:
+                    self._recent.remove(password)
+                self._recent.insert(0, password)
+                return True
+        return False
+
+
+# Key cache of a worker process, shared by every document it decrypts
+_worker_keys = KeyCache()
+
+
+def is_encrypted(stream: BinaryIO, window: int = SNIFF_WINDOW) -> bool:
+    """
+    Check cheaply whether a PDF stream is encrypted.
+
+    Every trailer or cross-reference stream of an encrypted file names its
+    /Encrypt dictionary, and trailers are never compressed, so scanning the
+    start (linearized files) and the end of the file is enough. A false
+    positive only sends the file down the decryption path.
+
+    Parameters
+    ----------
+    stream : BinaryIO
+        A seekable PDF stream. Its position is reset to the start.
+    window : int, optional
+        Number of bytes scanned at each end of the file.
+
+    Returns
+    -------
+    bool
+        True if the file has an /Encrypt entry.
+    """
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    head = stream.read(min(window, size))
+    tail = b""
+    if size > window:
+        stream.seek(max(window, size - window))
+        tail = stream.read()
+    stream.seek(0)
+    return b"/Encrypt" in head or b"/Encrypt" in tail
+
+
+def unlock_reader(
+    reader: PdfReader,
+    name: str,
+    passwords: Optional[PasswordMap],
+    cache: Optional[KeyCache] = None,
+) -> None:
+    """
+    Decrypt an encrypted reader in place.
+
+    Objects are decrypted one at a time as they are read, using the document
+    key derived once here.
+
+    Parameters
+    ----------
+    reader : PdfReader
+        The reader to unlock. Unencrypted readers are left untouched.
+    name : str
+        File name of the input, used to look up its passwords.
+    passwords : PasswordMap, optional
+        Passwords to try besides the empty user password.
+    cache : KeyCache, optional
+        Key cache to use. Defaults to a new, empty cache.
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    PDFusionPasswordError
+        If no password unlocks the reader.
+    """
+    if not reader.is_encrypted:
+        return
+    candidates = passwords.candidates(name) if passwords else ()
+    if not (cache or KeyCache()).unlock(reader, candidates):
+        raise PDFusionPasswordError(name)
+
+
+def write_decrypted(reader: PdfReader, stream: BinaryIO) -> None:
+    """
+    Write an unlocked reader's document without encryption.
+
+    Objects are read, decrypted and written one at a time under their
+    original numbers, so everything in the document (outlines, forms,
+    structure) is kept as is. Object and cross-reference streams are
+    expanded into plain objects and the /Encrypt dictionary is dropped.
+
+    Parameters
+    ----------
+    reader : PdfReader
+        An unlocked reader.
+    stream : BinaryIO
+        Writable binary stream for the decrypted PDF.
+
+    Returns
+    -------
+    None
+    """
+    skip = set()
+    encrypt = dict.get(reader.trailer, "/Encrypt")
+    if isinstance(encrypt, IndirectObject):
+        skip.add(encrypt.idnum)
+    ids = {(idnum, gen) for gen, entries in reader.xref.items() for idnum in entries}
+    ids.update((idnum, 0) for idnum in reader.xref_objStm)
+
+    stream.write(reader.pdf_header.encode("latin-1") + b"\n%\xe2\xe3\xcf\xd3\n")
+    offset = len(reader.pdf_header) + 7
+    offsets: Dict[int, Tuple[int, int]] = {}
+    for idnum, gen in sorted(ids):
+        if idnum in skip:
+            continue
+        obj = reader.get_object(IndirectObject(idnum, gen, reader))
+        if obj is None or isinstance(obj, NullObject):
+            continue
+        if isinstance(obj, StreamObject) and obj.get("/Type") in ("/ObjStm", "/XRef"):
+            continue
+        offsets[idnum] = (offset, gen)
+        buffer = BytesIO()
+        buffer.write(b"%d %d obj\n" % (idnum, gen))
+        obj.write_to_stream(buffer, None)
+        buffer.write(b"\nendobj\n")
+        offset += stream.write(buffer.getbuffer())
+        # Keep object streams cached, but nothing else once it is written
+        reader.resolved_objects.pop((gen, idnum), None)
+
+    size = max(offsets, default=0) + 1
+    lines = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+    for idnum in range(1, size):
+        position, gen = offsets.get(idnum, (0, 1))
+        kind = b"n" if idnum in offsets else b"f"
+        lines.append(b"%010d %05d %s \n" % (position, gen, kind))
+    stream.write(b"".join(lines))
+
+    trailer = DictionaryObject({NameObject("/Size"): NumberObject(size)})
+    for key in ("/Root", "/Info", "/ID"):
+        if key in reader.trailer:
+            trailer[NameObject(key)] = reader.trailer.raw_get(key)
+    stream.write(b"trailer\n")
+    trailer.write_to_stream(stream, None)
+    stream.write(b"\nstartxref\n%d\n%%%%EOF\n" % offset)
+
+
+def decrypt_file(
+    task: Tuple[str | Path, Optional[PasswordMap]],
+    cache: Optional[KeyCache] = None,
+) -> bytes:
+    """
+    Produce a decrypted copy of an encrypted PDF file.
+
+    Meant to run in a worker process, so that all of a file's decryption
+    happens off the merging process.
+
+    Parameters
+    ----------
+    task : Tuple[str | Path, PasswordMap | None]
+        Path of the encrypted file, or its ``PdfInput``, and the passwords to
+        try.
+    cache : KeyCache, optional
+        Key cache to use. Defaults to the worker process's cache.
+
+    Returns
+    -------
+    bytes
+        The decrypted PDF.
+
+    Raises
+    ------
+    PDFusionPasswordError
+        If no password unlocks the file.
+    """
+    path, passwords = task
+    with open_input(path) as f:
+        reader = PdfReader(BytesIO(f.read()))
+    keys = _worker_keys if cache is None else cache
+    unlock_reader(reader, str(path), passwords, keys)
+    output = BytesIO()
+    write_decrypted(reader, output)
+    return output.getvalue()
+
+
+def decrypt_files(
+    paths: Sequence[str | Path],
+    passwords: Optional[PasswordMap] = None,
+    *,
+    workers: int = 0,
+    memory_budget: int = 0,
+) -> Iterator[bytes]:
+    """
+    Decrypt encrypted PDF files in parallel worker processes.
+
+    Each worker keeps a key cache for its lifetime, which is that of this
+    call; decryption in the calling process uses a cache of its own. With a
+    memory budget, files are handed to workers only while their estimated
+    footprints fit it.
+
+    Parameters
+    ----------
+    paths : Sequence[str | Path]
+        The encrypted files.
+    passwords : PasswordMap, optional
+        Passwords to try besides the empty user password.
+    workers : int, optional
+        Number of worker processes; 0 means one per CPU.
+    memory_budget : int, optional
+        Memory available to files being decrypted, in bytes; 0 means no
+        limit.
+
+    Yields
+    ------
+    bytes
+        The decrypted PDF of each file, in the order of ``paths``.
+    """
+    tasks = [(path, passwords) for path in paths]
+    if min(resolve_workers(workers), len(tasks)) <= 1:
+        cache = KeyCache()
+        return (decrypt_file(task, cache) for task in tasks)
+    costs = [estimate_footprint(path) for path in paths] if memory_budget else None
+    return ordered_map(
+        decrypt_file, tasks, workers=workers, costs=costs, budget=memory_budget
+    )
+
+
+__all__ = [
+    "PasswordMap",
+    "KeyCache",
+    "decrypt_file",
+    "decrypt_files",
+    "is_encrypted",
+    "unlock_reader",
+    "write_decrypted",
+    "PASSWORDS_ENV",
+    "PASSWORD_FILE_ENV",
+]
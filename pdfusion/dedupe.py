@@ -0,0 +1,191 @@
+"""
+Duplicate page detection for the PDFusion package.
+
+Statements and reports often repeat identical pages, such as the same
+disclaimer at the end of every input. This module hashes each appended page
+canonically, over its content streams and everything its resources reach,
+so that a page identical to one merged earlier can be left out.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Final, FrozenSet, List, Set
+
+from PyPDF2._merger import _MergedPage
+from PyPDF2.generic import DictionaryObject, IndirectObject, NameObject, NumberObject
+
+from . import logging as log_utils
+
+# Constants
+DIGEST_SIZE: Final[int] = 16
+
+# Keys that tie a page to its place in its document, not to what it shows
+_PLACEMENT_KEYS: Final[FrozenSet[str]] = frozenset({"/Parent", "/StructParents"})
+
+logger = log_utils.get_logger(__name__)
+
+
+class PageHasher:
+    """
+    Canonical hashes of pages and the objects they reach.
+
+    Two pages hash alike when their dictionaries, content streams and
+    resources are equal object for object, wherever the objects are numbered
+    and whichever document they come from. Stream data is hashed as stored,
+    so the same content compressed differently hashes differently. Objects
+    shared by several pages, such as fonts, are hashed once.
+    """
+
+    def __init__(self) -> None:
+        self._digests: Dict[int, bytes] = {}
+        self._active: Set[int] = set()
+
+    def page_digest(self, page: DictionaryObject) -> bytes:
+        """
+        Hash a page.
+
+        Parameters
+        ----------
+        page : DictionaryObject
+            The page object.
+
+        Returns
+        -------
+        bytes
+            The page's digest.
+        """
+        page = page.get_object()
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        self._active.add(id(page))
+        try:
+            for key, value in sorted(dict.items(page)):
+                if key not in _PLACEMENT_KEYS:
+                    hasher.update(key.encode("utf-8", "surrogatepass"))
+                    self._feed(hasher, value)
+        finally:
+            self._active.discard(id(page))
+        return hasher.digest()
+
+    def _digest(self, obj: Any) -> bytes:
+        # Digest of an indirect object, memoized by identity
+        key = id(obj)
+        digest = self._digests.get(key)
+        if digest is not None:
+            return digest
+        if key in self._active:
+            # A cycle, such as an annotation pointing back at its page
+            return b"cycle"
+        self._active.add(key)
+        try:
+            hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            self._feed(hasher, obj)
+            digest = hasher.digest()
+        finally:
+            self._active.discard(key)
+        self._digests[key] = digest
+        return digest
+
+    def _feed(self, hasher: Any, obj: Any) -> None:
+        # PyPDF2's objects are protocol classes, whose isinstance checks are
+        # slow, so dispatch on the builtin types they derive from
+        if type(obj) is IndirectObject:
+            hasher.update(b"R")
+            hasher.update(self._digest(obj.get_object()))
+        elif isinstance(obj, dict):
+            # dict.items keeps indirect references, which DictionaryObject's
+            # own lookups resolve, so shared objects are hashed once
+            hasher.update(b"<<")
+            for key, value in sorted(dict.items(obj)):
+                if key != "/Parent":
+                    hasher.update(key.encode("utf-8", "surrogatepass"))
+                    self._feed(hasher, value)
+            hasher.update(b">>")
+            data = getattr(obj, "_data", None)
+            if data is not None:
+                hasher.update(b"stream%d:" % len(data))
+                hasher.update(data)
+        elif isinstance(obj, list):
+            hasher.update(b"[")
+            for item in obj:
+                self._feed(hasher, item)
+            hasher.update(b"]")
+        else:
+            text = repr(obj)
+            text = f"{type(obj).__name__}{len(text)}:{text}"
+            hasher.update(text.encode("utf-8", "surrogatepass"))
+
+
+class PageDeduplicator:
+    """
+    Drop pages identical to a page merged earlier in the same run.
+
+    The first occurrence of a page is kept. Outline items and named
+    destinations pointing at a dropped page are pointed at the kept one.
+    """
+
+    def __init__(self) -> None:
+        self.hasher = PageHasher()
+        self.dropped = 0
+        self._kept: Dict[bytes, int] = {}
+        self._aliases: Dict[int, int] = {}
+
+    def filter(self, pages: List[_MergedPage]) -> List[_MergedPage]:
+        """
+        Keep the pages not seen before.
+
+        Parameters
+        ----------
+        pages : List[_MergedPage]
+            Pages of an input that was just appended.
+
+        Returns
+        -------
+        List[_MergedPage]
+            The pages to merge, in order.
+        """
+        kept = []
+        for page in pages:
+            digest = self.hasher.page_digest(page.pagedata)
+            first = self._kept.setdefault(digest, page.id)
+            if first == page.id:
+                kept.append(page)
+            else:
+                self._aliases[page.id] = first
+        if len(kept) < len(pages):
+            logger.debug(f"Dropped {len(pages) - len(kept)} duplicate pages")
+        self.dropped += len(pages) - len(kept)
+        return kept
+
+    def retarget(self, outline: List[Any], dests: List[Any]) -> None:
+        """
+        Point outline items and named destinations at kept pages.
+
+        Parameters
+        ----------
+        outline : List
+            Outline items of the appended input, nested in lists.
+        dests : List
+            Named destinations of the appended input.
+
+        Returns
+        -------
+        None
+        """
+        if not self._aliases:
+            return
+        stack = [*outline, *dests]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+                continue
+            page = item.get("/Page")
+            if isinstance(page, int) and page in self._aliases:
+                item[NameObject("/Page")] = NumberObject(self._aliases[page])
+
+
+__all__ = ["PageDeduplicator", "PageHasher"]
@@ -64,3 +64,51 @@ class PDFusionMergeError(PDFusionError):
         super().__init__(
             message or f"Error merging file {filename}: {str(original_error)}"
         )
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        # Keep the message intact when raised inside a worker process
+        return type(self), (self.filename, self.original_error, self.message)
+
+
+class PDFusionPasswordError(PDFusionMergeError):
+    """
+    Raised when none of the configured passwords unlocks an encrypted input.
+
+    Attributes
+    ----------
+    filename : str
+        The name of the encrypted file.
+    """
+
+    def __init__(self, filename: str) -> None:
+        super().__init__(
+            filename, message=f"No valid password for encrypted file {filename}"
+        )
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        # Rebuild from the filename when raised inside a worker process
+        return type(self), (self.filename,)
+
+
+class PDFusionQuarantineError(PDFusionMergeError):
+    """
+    Raised for an input whose parse overran its time or memory limit.
+
+    Quarantined inputs are left out of the merge; see
+    ``MergeOptions.parse_timeout`` and ``MergeOptions.parse_memory``.
+
+    Attributes
+    ----------
+    filename : str
+        The name of the quarantined file.
+    reason : str
+        Which limit the parse overran.
+    """
+
+    def __init__(self, filename: str, reason: str) -> None:
+        self.reason = reason
+        super().__init__(filename, message=f"Quarantined {filename}: {reason}")
+
+    def __reduce__(self):  # type: ignore[no-untyped-def]
+        # Rebuild from the filename and reason when raised inside a worker
+        return type(self), (self.filename, self.reason)
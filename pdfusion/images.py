@@ -0,0 +1,432 @@
+"""
+Image downsampling for the PDFusion package.
+
+Scanned inputs often embed page images at 300 to 600 DPI with little or no
+compression, which makes merged outputs large and slow to write. This module
+finds the image XObjects of appended pages, downsamples those above a target
+resolution and re-encodes them with Flate or JPEG in worker processes while
+later inputs are still being appended.
+
+Images are resampled with Pillow when it is installed (``pip install
+pdfusion[images]``), which averages pixels and can encode JPEG. Without it
+images are subsampled by whole factors and encoded with Flate.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, Final, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from PyPDF2.filters import FlateDecode
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+from . import logging as log_utils
+from .exceptions import PDFusionError
+from .options import MergeOptions
+from .parallel import resolve_workers
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None  # type: ignore[assignment]
+
+# Constants
+IMAGE_ENCODINGS: Final[Tuple[str, ...]] = ("flate", "jpeg")
+POINTS_PER_INCH: Final[float] = 72.0
+FLATE: Final[str] = "/FlateDecode"
+DCT: Final[str] = "/DCTDecode"
+
+_COMPONENTS: Final[Dict[str, int]] = {
+    "/DeviceGray": 1,
+    "/DeviceRGB": 3,
+    "/DeviceCMYK": 4,
+}
+_MODES: Final[Dict[int, str]] = {1: "L", 3: "RGB", 4: "CMYK"}
+
+logger = log_utils.get_logger(__name__)
+
+
+class ImageJob(NamedTuple):
+    """
+    An image to resample, as handed to a worker process.
+
+    Attributes
+    ----------
+    data : bytes
+        The image's encoded stream data.
+    filter : str, optional
+        The stream's filter, ``None`` for raw samples.
+    parms : Dict[str, int]
+        The stream's Flate decode parameters.
+    width : int
+        Width in pixels.
+    height : int
+        Height in pixels.
+    components : int
+        Color components per pixel: 1, 3 or 4.
+    scale : float
+        Factor to scale both dimensions by, below 1.
+    encoding : str
+        Encoding of the result, ``"flate"`` or ``"jpeg"``.
+    quality : int
+        JPEG quality, from 1 to 95.
+    """
+    data: bytes
+    filter: Optional[str]
+    parms: Dict[str, int]
+    width: int
+    height: int
+    components: int
+    scale: float
+    encoding: str
+    quality: int
+
+
+class Resampled(NamedTuple):
+    """
+    A resampled image's new stream data.
+
+    Attributes
+    ----------
+    data : bytes
+        The encoded samples.
+    filter : str
+        The filter that decodes ``data``.
+    width : int
+        Width in pixels.
+    height : int
+        Height in pixels.
+    """
+    data: bytes
+    filter: str
+    width: int
+    height: int
+
+
+class ImageStats(NamedTuple):
+    """
+    Totals of a resampling pass.
+
+    Attributes
+    ----------
+    images : int
+        Number of images replaced by smaller resampled ones.
+    bytes_before : int
+        Encoded size of the replaced images.
+    bytes_after : int
+        Encoded size of their replacements.
+    """
+    images: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+
+
+def _subsample(data: bytes, job: ImageJob) -> Resampled:
+    # Keep every step-th pixel of every step-th row
+    step = max(2, int(1 / job.scale))
+    components = job.components
+    row = job.width * components
+    width = -(-job.width // step)
+    rows = []
+    for y in range(0, job.height, step):
+        line = data[y * row:(y + 1) * row]
+        if components == 1:
+            rows.append(line[::step])
+            continue
+        out = bytearray(width * components)
+        for k in range(components):
+            out[k::components] = line[k::components * step]
+        rows.append(bytes(out))
+    return Resampled(zlib.compress(b"".join(rows)), FLATE, width, len(rows))
+
+
+def _resize(data: bytes, job: ImageJob) -> Optional[Resampled]:
+    # Average pixels with Pillow, encoding JPEG where the colors allow it
+    mode = _MODES[job.components]
+    if job.filter == DCT:
+        image = Image.open(BytesIO(data))
+        if image.mode != mode or image.size != (job.width, job.height):
+            return None
+    else:
+        image = Image.frombytes(mode, (job.width, job.height), data)
+    size = (
+        max(1, round(job.width * job.scale)),
+        max(1, round(job.height * job.scale)),
+    )
+    resample = getattr(Image, "Resampling", Image).BOX
+    image = image.resize(size, resample)
+    if job.encoding == "jpeg" and mode != "CMYK":
+        # CMYK JPEG is stored inverted by some writers; Flate is unambiguous
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=job.quality, optimize=True)
+        return Resampled(buffer.getvalue(), DCT, *size)
+    return Resampled(zlib.compress(image.tobytes()), FLATE, *size)
+
+
+def resample_image(job: ImageJob) -> Optional[Resampled]:
+    """
+    Downsample and re-encode one image.
+
+    Parameters
+    ----------
+    job : ImageJob
+        The image and how to resample it.
+
+    Returns
+    -------
+    Resampled, optional
+        The new stream data, or ``None`` if the image cannot be decoded or
+        the result would not be smaller.
+    """
+    try:
+        if job.filter == FLATE:
+            data = FlateDecode.decode(job.data, job.parms or None)
+        else:
+            data = job.data
+        if job.filter != DCT and len(data) < job.width * job.height * job.components:
+            return None
+        if Image is not None:
+            result = _resize(data, job)
+        else:
+            result = _subsample(data, job)
+    except Exception as e:
+        # A damaged image is copied as it is, like any other object
+        logger.debug(f"Cannot resample image: {e}")
+        return None
+    if result is None or len(result.data) >= len(job.data):
+        return None
+    return result
+
+
+def _components(color_space: Any) -> int:
+    # Color components of a supported color space, or 0
+    color_space = color_space.get_object() if color_space is not None else None
+    if isinstance(color_space, ArrayObject) and len(color_space) == 2:
+        if color_space[0] == "/ICCBased":
+            profile = color_space[1].get_object()
+            components = profile.get("/N", 0)
+            return components if components in _MODES else 0
+        return 0
+    return _COMPONENTS.get(color_space, 0)
+
+
+def _page_images(page: DictionaryObject) -> Iterable[StreamObject]:
+    # Image XObjects a page draws, including those inside form XObjects
+    stack = [page.get("/Resources")]
+    seen: Set[int] = set()
+    while stack:
+        resources = stack.pop()
+        resources = resources.get_object() if resources is not None else None
+        if not isinstance(resources, DictionaryObject):
+            continue
+        xobjects = resources.get("/XObject")
+        xobjects = xobjects.get_object() if xobjects is not None else None
+        if not isinstance(xobjects, DictionaryObject):
+            continue
+        for ref in xobjects.values():
+            xobject = ref.get_object()
+            if id(xobject) in seen or not isinstance(xobject, StreamObject):
+                continue
+            seen.add(id(xobject))
+            subtype = xobject.get("/Subtype")
+            if subtype == "/Image":
+                yield xobject
+            elif subtype == "/Form":
+                stack.append(xobject.get("/Resources"))
+
+
+class ImageResampler:
+    """
+    Downsample the images of appended pages above a target resolution.
+
+    Pages are handed over with :meth:`submit` as they are appended; their
+    images are resampled in worker processes, or in the calling process with
+    a single worker, and written back into the input's objects by
+    :meth:`finish` before the output is written.
+
+    An image's resolution is judged by fitting it to its page's media box,
+    as a scanned page image is drawn. Smaller images drawn at a smaller size
+    are therefore judged conservatively and downsampled less or not at all.
+
+    Parameters
+    ----------
+    options : MergeOptions
+        Merge options; ``image_dpi``, ``image_encoding``, ``image_quality``
+        and ``workers`` apply.
+
+    Raises
+    ------
+    PDFusionError
+        If the options ask for an unknown encoding, or for JPEG without
+        Pillow installed.
+    """
+
+    def __init__(self, options: MergeOptions) -> None:
+        if options.image_encoding not in IMAGE_ENCODINGS:
+            raise PDFusionError(
+                f"Unknown image encoding {options.image_encoding!r}; "
+                f"use one of {', '.join(IMAGE_ENCODINGS)}"
+            )
+        if options.image_encoding == "jpeg" and Image is None:
+            raise PDFusionError(
+                "JPEG image encoding requires Pillow: pip install pdfusion[images]"
+            )
+        self.options = options
+        self._workers = resolve_workers(options.workers)
+        self._pool: Optional[Executor] = None
+        self._seen: Set[int] = set()
+        self._pending: List[Tuple[StreamObject, ImageJob, Any]] = []
+
+    def _job(self, image: StreamObject, page: DictionaryObject) -> Optional[ImageJob]:
+        # Describe an image to resample, or None to leave it as it is
+        if image.get("/ImageMask") or image.get("/BitsPerComponent") != 8:
+            return None
+        if "/SMask" in image or "/Mask" in image:
+            # Masks are sized to their image
+            return None
+        components = _components(image.get("/ColorSpace"))
+        if not components:
+            return None
+        filters = image.get("/Filter")
+        if isinstance(filters, ArrayObject):
+            if len(filters) != 1:
+                return None
+            filters = filters[0]
+        if filters not in (None, FLATE, DCT):
+            return None
+        if filters == DCT and (Image is None or components == 4):
+            return None
+        parms = image.get("/DecodeParms")
+        if isinstance(parms, ArrayObject):
+            parms = parms[0] if len(parms) == 1 else None
+        parms = parms.get_object() if parms is not None else None
+        plain = {
+            str(key): int(value)
+            for key, value in (parms or {}).items()
+            if isinstance(value, int)
+        }
+
+        width, height = int(image.get("/Width", 0)), int(image.get("/Height", 0))
+        box = page.mediabox
+        inches = (
+            abs(float(box.width)) / POINTS_PER_INCH,
+            abs(float(box.height)) / POINTS_PER_INCH,
+        )
+        if not width or not height or not all(inches):
+            return None
+        dpi = min(width / inches[0], height / inches[1])
+        scale = self.options.image_dpi / dpi
+        if scale > 0.75 or (Image is None and scale > 0.5):
+            # Not worth the loss, or no whole factor to subsample by
+            return None
+        return ImageJob(
+            image._data,
+            filters,
+            plain,
+            width,
+            height,
+            components,
+            scale,
+            self.options.image_encoding,
+            self.options.image_quality,
+        )
+
+    def submit(self, pages: Iterable[DictionaryObject]) -> None:
+        """
+        Start resampling the images of appended pages.
+
+        Parameters
+        ----------
+        pages : Iterable[DictionaryObject]
+            Page objects of an input that was just appended.
+
+        Returns
+        -------
+        None
+        """
+        for page in pages:
+            for image in _page_images(page):
+                if id(image) in self._seen:
+                    continue
+                self._seen.add(id(image))
+                job = self._job(image, page)
+                if job is None:
+                    continue
+                future = None
+                if self._workers > 1:
+                    if self._pool is None:
+                        self._pool = ProcessPoolExecutor(max_workers=self._workers)
+                    future = self._pool.submit(resample_image, job)
+                self._pending.append((image, job, future))
+
+    def finish(self) -> ImageStats:
+        """
+        Wait for the submitted images and swap in the smaller results.
+
+        Returns
+        -------
+        ImageStats
+            Totals of the images replaced.
+        """
+        images = before = after = 0
+        pending, self._pending = self._pending, []
+        for image, job, future in pending:
+            result: Optional[Resampled]
+            if future is None:
+                result = resample_image(job)
+            else:
+                result = future.result()
+            if result is None:
+                continue
+            image._data = result.data
+            image[NameObject("/Filter")] = NameObject(result.filter)
+            image[NameObject("/Width")] = NumberObject(result.width)
+            image[NameObject("/Height")] = NumberObject(result.height)
+            image.pop(NameObject("/DecodeParms"), None)
+            image.decoded_self = None
+            images += 1
+            before += len(job.data)
+            after += len(result.data)
+        if images:
+            logger.info(
+                f"Downsampled {images} images to {self.options.image_dpi} DPI: "
+                f"{before:,} -> {after:,} bytes"
+            )
+        return ImageStats(images, before, after)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes, dropping work not yet finished.
+
+        Returns
+        -------
+        None
+        """
+        for _, _, future in self._pending:
+            if future is not None:
+                future.cancel()
+        self._pending.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+__all__ = [
+    "IMAGE_ENCODINGS",
+    "ImageJob",
+    "ImageResampler",
+    "ImageStats",
+    "Resampled",
+    "resample_image",
+]
@@ -0,0 +1,664 @@
+"""
+Sidecar page index for the PDFusion package.
+
+Pulling the pages of one input back out of a large merged output otherwise
+means parsing the whole output again. This module writes a compact binary
+index next to the output that maps each input, by name and fingerprint, to
+its range of output pages, and each object to its byte range in the output.
+Extraction then memory-maps the output and reads only the objects the
+selected pages reach, copying them byte for byte into a new document. An
+output kept in an input source, such as an object store, is read the same
+way through ranged reads, fetching the objects of each level of the page
+graph together.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    read_object,
+)
+
+from . import logging as log_utils
+from .catalog import as_input
+from .checkpoint import _ref, _sparse_xref, _write_object
+from .exceptions import PDFusionError
+from .sources import InputSource
+from .writer import atomic_output
+
+# Constants
+INDEX_SUFFIX: Final[str] = ".idx"
+INDEX_MAGIC: Final[bytes] = b"PDFXIDX1"
+
+# Magic, output size and modification time, then the number of inputs,
+# pages and object numbers
+_HEADER: Final[struct.Struct] = struct.Struct("<8sQqQQQ")
+# Size, modification time, first page, page count and end of the name
+_INPUT: Final[struct.Struct] = struct.Struct("<qqQQQ")
+_OBJECT_HEADER: Final[re.Pattern[bytes]] = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\s*")
+
+# Page attributes a page may inherit from its page tree nodes
+_INHERITED: Final[Sequence[str]] = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+# Keys pointing back up at the document's structure, not followed when
+# collecting what a page reaches
+_BACK_LINKS: Final[Set[str]] = {"/Parent", "/P"}
+
+logger = log_utils.get_logger(__name__)
+
+
+class IndexedInput(NamedTuple):
+    """
+    An input as recorded in a page index.
+
+    Attributes
+    ----------
+    name : str
+        File name of the input.
+    size : int
+        Size of the input in bytes when it was merged.
+    mtime_ns : int
+        Modification time of the input in nanoseconds when it was merged.
+    first_page : int
+        Index of the input's first page in the output.
+    pages : int
+        Number of output pages that came from the input.
+    """
+    name: str
+    size: int
+    mtime_ns: int
+    first_page: int
+    pages: int
+
+
+class ExtractResult(NamedTuple):
+    """
+    Result of extracting pages from a merged output.
+
+    Attributes
+    ----------
+    output_path : Path
+        The path to the extracted PDF file.
+    pages : int
+        Number of pages extracted.
+    objects : int
+        Number of objects copied from the merged output.
+    bytes_read : int
+        Bytes of the merged output read to extract them.
+    bytes_written : int
+        The size of the extracted PDF in bytes.
+    """
+    output_path: Path
+    pages: int
+    objects: int
+    bytes_read: int
+    bytes_written: int
+
+
+def index_path(output_path: str | Path) -> Path:
+    """
+    Get the path of the page index of a merged output.
+
+    Parameters
+    ----------
+    output_path : str | Path
+        The merged output.
+
+    Returns
+    -------
+    Path
+        The output's path with ``.idx`` appended.
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + INDEX_SUFFIX)
+
+
+def write_index(
+    output_path: Path, inputs: Sequence[Path], input_pages: Sequence[int]
+) -> Path:
+    """
+    Write the page index of a merged output.
+
+    The output's cross-reference table and page tree are read, but not the
+    content of its pages.
+
+    Parameters
+    ----------
+    output_path : Path
+        The merged output.
+    inputs : Sequence[Path]
+        The merged inputs, in order, as paths or catalogued inputs.
+    input_pages : Sequence[int]
+        Number of output pages each input contributed.
+
+    Returns
+    -------
+    Path
+        The written index.
+
+    Raises
+    ------
+    PDFusionError
+        If the pages do not add up to the output's, or the output stores
+        objects in object streams.
+    """
+    with open(output_path, "rb") as f:
+        reader = PdfReader(f)
+        if reader.xref_objStm:
+            raise PDFusionError(f"Cannot index {output_path.name}: compressed objects")
+        free = reader.xref_free_entry.get(0, {})
+        live = {
+            num: offset
+            for num, offset in reader.xref[0].items()
+            if num and not free.get(num)
+        }
+        page_objects = array(
+            "Q", (page.indirect_reference.idnum for page in reader.pages)
+        )
+        f.seek(0, os.SEEK_END)
+        tail = f.tell()
+        f.seek(max(0, tail - 1024))
+        body_end = int(re.findall(rb"startxref\s+(\d+)", f.read())[-1])
+    if sum(input_pages) != len(page_objects):
+        raise PDFusionError(
+            f"Cannot index {output_path.name}: {sum(input_pages)} input pages "
+            f"for {len(page_objects)} output pages"
+        )
+
+    # Each object runs until the next one, the last until the xref table
+    size = max(live, default=0) + 1
+    offsets = array("Q", bytes(8 * size))
+    lengths = array("Q", bytes(8 * size))
+    layout = sorted(live.items(), key=lambda entry: entry[1])
+    for (num, offset), (_, end) in zip(layout, layout[1:] + [(0, body_end)]):
+        offsets[num] = offset
+        lengths[num] = end - offset
+
+    page_inputs = array("Q")
+    table = bytearray()
+    names = bytearray()
+    first_page = 0
+    for number, (path, pages) in enumerate(zip(inputs, input_pages)):
+        item = as_input(path)
+        names += os.fsencode(item.name)
+        table += _INPUT.pack(item.size, item.mtime_ns, first_page, pages, len(names))
+        page_inputs.extend([number] * pages)
+        first_page += pages
+
+    status = os.stat(output_path)
+    path = index_path(output_path)
+    with atomic_output(path, digest=None) as stream:
+        stream.write(
+            _HEADER.pack(
+                INDEX_MAGIC,
+                status.st_size,
+                status.st_mtime_ns,
+                len(input_pages),
+                len(page_objects),
+                size,
+            )
+        )
+        stream.write(bytes(table))
+        stream.write(bytes(names) + bytes(-len(names) % 8))
+        for values in (page_objects, page_inputs, offsets, lengths):
+            stream.write(_little_endian(values))
+    logger.debug(
+        f"Indexed {len(page_objects)} pages and {len(live)} objects of "
+        f"{output_path.name} in {stream.bytes_written:,} bytes"
+    )
+    return path
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class PageIndex:
+    """
+    The page index of a merged output, read through a memory map.
+
+    The inputs are loaded when the index is opened; pages and objects are
+    looked up in place, in constant time.
+
+    Parameters
+    ----------
+    output_path : str | Path
+        The merged output, next to which the index was written, or its name
+        in ``source``.
+    source : InputSource, optional
+        Source the output and its index are objects of, which reads the
+        index whole. Uploads do not keep modification times, so the index
+        is only checked against the size of the output.
+
+    Raises
+    ------
+    PDFusionError
+        If the index is missing, damaged, or older than the output.
+    """
+
+    def __init__(
+        self, output_path: str | Path, *, source: Optional[InputSource] = None
+    ) -> None:
+        self.output_path = Path(output_path)
+        self.source = source
+        path = index_path(self.output_path)
+        self._data: Union[mmap.mmap, bytes] = b""
+        try:
+            if source is None:
+                with open(path, "rb") as f:
+                    self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                status = os.stat(self.output_path)
+                output_size, output_mtime = status.st_size, status.st_mtime_ns
+            else:
+                name = self.output_path.as_posix() + INDEX_SUFFIX
+                self._data = source.read(name, 0, source.stat(name).size)
+                output_size = source.stat(self.output_path.as_posix()).size
+                output_mtime = None
+        except (OSError, ValueError) as e:
+            self.close()
+            raise PDFusionError(f"Cannot read page index {path.name}: {e}")
+        try:
+            magic, size, mtime_ns, num_inputs, self.num_pages, self.num_objects = (
+                _HEADER.unpack_from(self._data)
+            )
+        except struct.error:
+            magic = b""
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise PDFusionError(f"Not a PDFusion page index: {path.name}")
+        if output_size != size or output_mtime not in (None, mtime_ns):
+            self.close()
+            raise PDFusionError(
+                f"Page index {path.name} is older than {self.output_path.name}"
+            )
+
+        names_start = _HEADER.size + num_inputs * _INPUT.size
+        self.inputs: List[IndexedInput] = []
+        start = 0
+        for fields in _INPUT.iter_unpack(self._data[_HEADER.size:names_start]):
+            end = fields[-1]
+            name = os.fsdecode(self._data[names_start + start:names_start + end])
+            self.inputs.append(IndexedInput(name, *fields[:-1]))
+            start = end
+        self._by_name = {item.name: item for item in self.inputs}
+        self._pages = names_start + start + (-start % 8)
+        self._page_inputs = self._pages + 8 * self.num_pages
+        self._offsets = self._page_inputs + 8 * self.num_pages
+        self._lengths = self._offsets + 8 * self.num_objects
+
+    def __enter__(self) -> PageIndex:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the memory map.
+
+        Returns
+        -------
+        None
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def find(self, name: str) -> IndexedInput:
+        """
+        Look up an input by file name.
+
+        Parameters
+        ----------
+        name : str
+            File name of the input.
+
+        Returns
+        -------
+        IndexedInput
+            The input's record.
+
+        Raises
+        ------
+        PDFusionError
+            If no input of that name was merged.
+        """
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise PDFusionError(
+                f"{name} is not an input of {self.output_path.name}"
+            ) from None
+
+    def input_of(self, page: int) -> IndexedInput:
+        """
+        Get the input an output page came from.
+
+        Parameters
+        ----------
+        page : int
+            Index of the output page.
+
+        Returns
+        -------
+        IndexedInput
+            The input's record.
+        """
+        return self.inputs[self._lookup(self._page_inputs, page, self.num_pages)]
+
+    def page_object(self, page: int) -> int:
+        """
+        Get the object number of an output page.
+
+        Parameters
+        ----------
+        page : int
+            Index of the output page.
+
+        Returns
+        -------
+        int
+            The page object's number.
+        """
+        return self._lookup(self._pages, page, self.num_pages)
+
+    def object_range(self, number: int) -> Optional[range]:
+        """
+        Get the bytes of the output holding an object.
+
+        Parameters
+        ----------
+        number : int
+            The object number.
+
+        Returns
+        -------
+        range, optional
+            The offsets of the object, from its ``obj`` line to the next
+            object, or None if the output has no such object.
+        """
+        if not 0 < number < self.num_objects:
+            return None
+        length = self._lookup(self._lengths, number, self.num_objects)
+        if not length:
+            return None
+        offset = self._lookup(self._offsets, number, self.num_objects)
+        return range(offset, offset + length)
+
+    def _lookup(self, start: int, index: int, count: int) -> int:
+        if not 0 <= index < count:
+            raise IndexError(index)
+        return struct.unpack_from("<Q", self._data, start + 8 * index)[0]
+
+
+class _SourceBytes:
+    # A merged output kept in a source, sliced like a memory-mapped one
+
+    def __init__(self, source: InputSource, name: str) -> None:
+        self.source = source
+        self.name = name
+
+    def __getitem__(self, span: slice) -> bytes:
+        return self.source.read(self.name, span.start or 0, span.stop)
+
+    def prefetch(self, spans: Iterable[range]) -> None:
+        self.source.prefetch(self.name, ((span.start, span.stop) for span in spans))
+
+
+_OutputBytes = Union[mmap.mmap, _SourceBytes]
+
+
+@contextmanager
+def _open_output(index: PageIndex) -> Iterator[_OutputBytes]:
+    # The bytes of an indexed output, memory-mapped unless kept in a source
+    if index.source is not None:
+        yield _SourceBytes(index.source, index.output_path.as_posix())
+        return
+    with open(index.output_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+class _IndexedObjects:
+    # Just enough of a PdfReader for PyPDF2 to parse objects located through
+    # a page index, reading each one from the memory-mapped output
+    strict = False
+
+    def __init__(self, index: PageIndex, data: _OutputBytes) -> None:
+        self.index = index
+        self.data = data
+        self.bytes_read = 0
+        self._objects: Dict[int, Any] = {}
+
+    def prefetch(self, numbers: Iterable[int]) -> None:
+        # Objects about to be parsed from a source are fetched together,
+        # nearby ones in one request
+        if isinstance(self.data, _SourceBytes):
+            spans = (self.index.object_range(number) for number in numbers)
+            self.data.prefetch(span for span in spans if span is not None)
+
+    def get_object(self, ref: IndirectObject | int) -> Any:
+        number = ref if isinstance(ref, int) else ref.idnum
+        if number in self._objects:
+            return self._objects[number]
+        span = self.index.object_range(number)
+        obj: Any = None
+        if span is not None:
+            if isinstance(self.data, mmap.mmap):
+                buffer: Any = self.data
+                stream: Any = self.data
+                start, stop = span.start, span.stop
+            else:
+                buffer = self.data[span.start:span.stop]
+                stream, start, stop = BytesIO(buffer), 0, len(buffer)
+            match = _OBJECT_HEADER.match(buffer, start, stop)
+            if match is None or int(match.group(1)) != number:
+                raise PDFusionError(f"Object {number} is not where the index says")
+            stream.seek(match.end())
+            obj = read_object(stream, self)
+            self.bytes_read += len(span)
+        self._objects[number] = obj
+        return obj
+
+
+def extract_pages(
+    output_path: str | Path,
+    names: Sequence[str],
+    target: str | Path,
+    *,
+    source: Optional[InputSource] = None,
+) -> ExtractResult:
+    """
+    Copy the pages that came from some inputs out of a merged output.
+
+    The output's page index locates the pages, and only the objects they
+    reach are read from the memory-mapped output. Objects are copied byte
+    for byte, keeping their numbers; only the pages, which get a new page
+    tree, are written again. Links to pages that are not extracted are left
+    dangling, which readers treat as null. Outlines are not extracted.
+
+    Parameters
+    ----------
+    output_path : str | Path
+        The merged output, written with ``MergeOptions.page_index``, or its
+        name in ``source``.
+    names : Sequence[str]
+        File names of the inputs whose pages to extract, in order.
+    target : str | Path
+        The PDF file to write.
+    source : InputSource, optional
+        Source the output and its index are objects of, such as an object
+        store they were uploaded to; they are read in ranges.
+
+    Returns
+    -------
+    ExtractResult
+        Target path and extraction statistics.
+
+    Raises
+    ------
+    PDFusionError
+        If the index is missing or out of date, or an input is unknown.
+    """
+    target = Path(target)
+    with PageIndex(output_path, source=source) as index:
+        selected = [index.find(name) for name in names]
+        if not any(item.pages for item in selected):
+            raise PDFusionError("No pages to extract")
+        with _open_output(index) as data:
+            objects = _IndexedObjects(index, data)
+            page_nums = [
+                index.page_object(page)
+                for item in selected
+                for page in range(item.first_page, item.first_page + item.pages)
+            ]
+            objects.prefetch(page_nums)
+            tree_num = index.num_objects
+            pages: Dict[int, DictionaryObject] = {}
+            for num in page_nums:
+                page = DictionaryObject(objects.get_object(num))
+                node = page
+                while "/Parent" in node:
+                    node = node["/Parent"]
+                    for key in _INHERITED:
+                        if key not in page and key in node:
+                            page[NameObject(key)] = node.raw_get(key)
+                page[NameObject("/Parent")] = _ref(tree_num)
+                pages[num] = page
+
+            # Everything the pages reach, except other pages, a level of
+            # references at a time
+            needed: Set[int] = set(pages)
+            stack: List[Any] = list(pages.values())
+            while stack:
+                refs: List[int] = []
+                while stack:
+                    obj = stack.pop()
+                    if type(obj) is IndirectObject:
+                        if obj.idnum not in needed:
+                            refs.append(obj.idnum)
+                    elif isinstance(obj, dict):
+                        stack.extend(
+                            value
+                            for key, value in dict.items(obj)
+                            if key not in _BACK_LINKS
+                        )
+                    elif isinstance(obj, list):
+                        stack.extend(obj)
+                objects.prefetch(refs)
+                for num in refs:
+                    if num in needed:
+                        continue
+                    target_obj = objects.get_object(num)
+                    if (
+                        isinstance(target_obj, dict)
+                        and target_obj.get("/Type") == "/Page"
+                    ):
+                        continue
+                    needed.add(num)
+                    stack.append(target_obj)
+
+            first_line = data[0:1024]
+            header = first_line[:first_line.find(b"\n")].rstrip()
+            offsets: Dict[int, int] = {}
+            with atomic_output(target, digest=None) as stream:
+                stream.write(header + b"\n%\xe2\xe3\xcf\xd3\n")
+                for num in sorted(needed):
+                    if num in pages:
+                        _write_object(stream, num, pages[num], offsets)
+                        continue
+                    span = index.object_range(num)
+                    if span is None:
+                        continue
+                    offsets[num] = stream.tell()
+                    stream.write(data[span.start:span.stop])
+                _write_object(
+                    stream,
+                    tree_num,
+                    DictionaryObject(
+                        {
+                            NameObject("/Type"): NameObject("/Pages"),
+                            NameObject("/Kids"): ArrayObject(
+                                _ref(num) for num in page_nums
+                            ),
+                            NameObject("/Count"): NumberObject(len(page_nums)),
+                        }
+                    ),
+                    offsets,
+                )
+                _write_object(
+                    stream,
+                    tree_num + 1,
+                    DictionaryObject(
+                        {
+                            NameObject("/Type"): NameObject("/Catalog"),
+                            NameObject("/Pages"): _ref(tree_num),
+                        }
+                    ),
+                    offsets,
+                )
+                xref_location = stream.tell()
+                stream.write(_sparse_xref(offsets).encode())
+                trailer = DictionaryObject(
+                    {
+                        NameObject("/Size"): NumberObject(tree_num + 2),
+                        NameObject("/Root"): _ref(tree_num + 1),
+                    }
+                )
+                stream.write(b"trailer\n")
+                trailer.write_to_stream(stream, None)
+                stream.write(f"\nstartxref\n{xref_location}\n%%EOF\n".encode())
+
+    logger.info(
+        f"Extracted {len(page_nums)} pages of {', '.join(names)} into: {target.name}"
+    )
+    return ExtractResult(
+        target,
+        len(page_nums),
+        len(offsets) - 2,
+        objects.bytes_read,
+        stream.bytes_written,
+    )
+
+
+__all__ = [
+    "INDEX_SUFFIX",
+    "ExtractResult",
+    "IndexedInput",
+    "PageIndex",
+    "extract_pages",
+    "index_path",
+    "write_index",
+]
@@ -0,0 +1,401 @@
+"""
+Directory inspection for the PDFusion package.
+
+This module gathers statistics about the PDF files a merge would read, such
+as page counts, sizes and which files are encrypted or unreadable, without
+merging them. Only each file's trailer, cross-reference table and page tree
+root are read, in parallel worker processes, and results are cached by file
+size and modification time.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Final, List, NamedTuple, Optional
+
+from PyPDF2 import PdfReader
+
+from . import logging as log_utils
+from .catalog import Catalog, InputStatus, PdfInput, discover_pdfs, open_input
+from .parallel import ordered_map
+from .sources import InputSource
+from .writer import atomic_output
+
+# Constants
+STATS_CACHE_NAME: Final[str] = "inspect.json"
+STATS_CACHE_VERSION: Final[int] = 2
+DEFAULT_TOP: Final[int] = 10
+
+logger = log_utils.get_logger(__name__)
+
+
+class FileStats(NamedTuple):
+    """
+    Statistics of one input file.
+
+    Attributes
+    ----------
+    path : Path
+        The file.
+    size : int
+        Size of the file in bytes.
+    pages : int, optional
+        Number of pages, or None if they could not be counted.
+    encrypted : bool
+        Whether the file is encrypted.
+    error : str, optional
+        Why the file could not be read, or None if it is a valid PDF.
+    version : str, optional
+        PDF version from the file header, such as ``"1.7"``, or None if it
+        could not be read.
+    """
+    path: Path
+    size: int
+    pages: Optional[int]
+    encrypted: bool = False
+    error: Optional[str] = None
+    version: Optional[str] = None
+
+    @property
+    def status(self) -> InputStatus:
+        """InputStatus: What the statistics say about the file."""
+        if self.error is not None:
+            return InputStatus.INVALID
+        return InputStatus.ENCRYPTED if self.encrypted else InputStatus.VALID
+
+
+class InspectResult(NamedTuple):
+    """
+    Statistics of the PDF files in a directory.
+
+    Attributes
+    ----------
+    directory : Path
+        The inspected directory.
+    files : List[FileStats]
+        Statistics of each PDF file, in merge order.
+    cache_hits : int
+        Number of files whose statistics came from the cache.
+    """
+    directory: Path
+    files: List[FileStats]
+    cache_hits: int = 0
+
+    @property
+    def total_pages(self) -> int:
+        """int: Pages across all files whose pages could be counted."""
+        return sum(stats.pages or 0 for stats in self.files)
+
+    @property
+    def total_bytes(self) -> int:
+        """int: Size of all files in bytes."""
+        return sum(stats.size for stats in self.files)
+
+    @property
+    def encrypted(self) -> List[FileStats]:
+        """List[FileStats]: The encrypted files."""
+        return [stats for stats in self.files if stats.encrypted]
+
+    @property
+    def invalid(self) -> List[FileStats]:
+        """List[FileStats]: The files that could not be read."""
+        return [stats for stats in self.files if stats.error is not None]
+
+    def largest(self, count: int = DEFAULT_TOP) -> List[FileStats]:
+        """
+        Get the largest files.
+
+        Parameters
+        ----------
+        count : int, optional
+            Number of files to return.
+
+        Returns
+        -------
+        List[FileStats]
+            Up to ``count`` files, largest first.
+        """
+        return sorted(self.files, key=lambda stats: stats.size, reverse=True)[:count]
+
+    def to_dict(self, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        """
+        Convert the result to JSON-serializable data.
+
+        Parameters
+        ----------
+        top : int, optional
+            Number of largest files to list.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Totals, the largest, encrypted and invalid files, and every
+            file's statistics.
+        """
+
+        def entry(stats: FileStats) -> Dict[str, Any]:
+            return {
+                "file": stats.path.name,
+                "size": stats.size,
+                "pages": stats.pages,
+                "encrypted": stats.encrypted,
+                "error": stats.error,
+                "version": stats.version,
+            }
+
+        return {
+            "directory": str(self.directory),
+            "files": len(self.files),
+            "total_pages": self.total_pages,
+            "total_bytes": self.total_bytes,
+            "encrypted": [stats.path.name for stats in self.encrypted],
+            "invalid": [entry(stats) for stats in self.invalid],
+            "largest": [entry(stats) for stats in self.largest(top)],
+            "inputs": [entry(stats) for stats in self.files],
+        }
+
+
+class StatsCache:
+    """
+    File statistics persisted between inspections.
+
+    Entries are keyed by absolute path and are valid while the file's size
+    and modification time are unchanged.
+
+    Parameters
+    ----------
+    path : Path
+        The JSON file the cache is stored in.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._entries: Dict[str, List[Any]] = {}
+        self._dirty = False
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == STATS_CACHE_VERSION:
+            self._entries = data.get("entries", {})
+
+    def get(self, item: PdfInput) -> Optional[FileStats]:
+        """
+        Look up the cached statistics of a file.
+
+        Parameters
+        ----------
+        item : PdfInput
+            The file, with its current size and modification time.
+
+        Returns
+        -------
+        FileStats, optional
+            The cached statistics, or None if there are none for the file's
+            current size and modification time.
+        """
+        path = item.path
+        entry = self._entries.get(str(path.absolute()))
+        if entry is None or entry[:2] != [item.size, item.mtime_ns]:
+            return None
+        return FileStats(path, item.size, *entry[2:])
+
+    def put(self, stats: FileStats, item: PdfInput) -> None:
+        """
+        Cache the statistics of a file.
+
+        Parameters
+        ----------
+        stats : FileStats
+            The statistics to cache.
+        item : PdfInput
+            The file the statistics were taken from, with the size and
+            modification time it had before.
+
+        Returns
+        -------
+        None
+        """
+        self._entries[str(stats.path.absolute())] = [
+            item.size,
+            item.mtime_ns,
+            stats.pages,
+            stats.encrypted,
+            stats.error,
+            stats.version,
+        ]
+        self._dirty = True
+
+    def save(self) -> None:
+        """
+        Write the cache back if it changed.
+
+        Returns
+        -------
+        None
+        """
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": STATS_CACHE_VERSION, "entries": self._entries}
+        with atomic_output(self.path, digest=None) as stream:
+            stream.write(json.dumps(data, separators=(",", ":")).encode())
+        self._dirty = False
+
+
+def inspect_file(path: str | Path) -> FileStats:
+    """
+    Gather the statistics of one PDF file.
+
+    Reads the trailer and cross-reference table, then the page count from
+    the page tree root. Page counts of encrypted files are read without
+    decrypting them, since numbers are stored in the clear.
+
+    Parameters
+    ----------
+    path : str | Path
+        The file to inspect, or its ``PdfInput``.
+
+    Returns
+    -------
+    FileStats
+        The file's statistics. Errors are recorded rather than raised.
+    """
+    source, path = path, Path(path)
+    size, encrypted, version = 0, False, None
+    try:
+        with open_input(source) as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(0)
+            reader = PdfReader(f)
+            version = reader.pdf_header[len("%PDF-"):] or None
+            encrypted = reader.is_encrypted
+            # Only strings and streams are encrypted, so /Count can be read
+            # even when the empty password does not unlock the file
+            reader._override_encryption = encrypted
+            pages = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except OSError as e:
+        # Reported with size 0, so that the possibly transient failure is
+        # not cached
+        return FileStats(path, 0, None, error=f"{type(e).__name__}: {e}")
+    except Exception as e:
+        return FileStats(
+            path, size, None, encrypted, f"{type(e).__name__}: {e}", version
+        )
+    return FileStats(path, size, pages, encrypted, version=version)
+
+
+def inspect_pdfs(
+    input_dir: str | Path | Catalog | InputSource,
+    *,
+    workers: int = 0,
+    cache: StatsCache | None = None,
+) -> InspectResult:
+    """
+    Gather statistics of the PDF files ``merge_pdfs`` would merge.
+
+    Parameters
+    ----------
+    input_dir : str | Path | Catalog | InputSource
+        Path to the directory containing PDF files, a catalog of them, or an
+        input source such as an object store.
+        What is found about each file is recorded in the catalog.
+    workers : int, optional
+        Number of worker processes; 0 means one per CPU.
+    cache : StatsCache, optional
+        Cache of statistics from earlier inspections. Files unchanged since
+        then are not read again, and fresh statistics are added to it.
+
+    Returns
+    -------
+    InspectResult
+        Statistics of each file, in merge order.
+
+    Raises
+    ------
+    NoPDFsFoundError
+        If no PDF files are found in the directory.
+    PDFusionError
+        If the directory cannot be read.
+    """
+    catalog = (
+        input_dir if isinstance(input_dir, Catalog) else discover_pdfs(input_dir)
+    )
+    items = list(catalog)
+    files: List[Optional[FileStats]] = [None] * len(items)
+    if cache is not None:
+        files = [cache.get(item) for item in items]
+
+    misses = [index for index, stats in enumerate(files) if stats is None]
+    logger.debug(f"Inspecting {len(misses)} of {len(items)} files")
+    fresh = ordered_map(
+        inspect_file, [items[i] for i in misses], workers=workers
+    )
+    for index, stats in zip(misses, fresh):
+        files[index] = stats
+        if cache is not None and stats.size:
+            cache.put(stats, items[index])
+
+    inspected = [stats for stats in files if stats is not None]
+    for index, stats in enumerate(inspected):
+        catalog.record(index, stats.status, pages=stats.pages, version=stats.version)
+    return InspectResult(catalog.directory, inspected, len(items) - len(misses))
+
+
+def format_table(result: InspectResult, top: int = DEFAULT_TOP) -> str:
+    """
+    Render an inspection as a human-readable report.
+
+    Parameters
+    ----------
+    result : InspectResult
+        The inspection to render.
+    top : int, optional
+        Number of largest files to list.
+
+    Returns
+    -------
+    str
+        Totals, then the largest, encrypted and invalid files.
+    """
+
+    def row(stats: FileStats) -> str:
+        pages = "?" if stats.pages is None else str(stats.pages)
+        return f"  {stats.size:>14,}  {pages:>7}  {stats.path.name}"
+
+    lines = [
+        f"Directory:   {result.directory}",
+        f"Files:       {len(result.files):,}",
+        f"Pages:       {result.total_pages:,}",
+        f"Bytes:       {result.total_bytes:,}",
+        f"Encrypted:   {len(result.encrypted):,}",
+        f"Invalid:     {len(result.invalid):,}",
+        "",
+        "Largest files:",
+        f"  {'bytes':>14}  {'pages':>7}  file",
+        *(row(stats) for stats in result.largest(top)),
+    ]
+    if result.encrypted:
+        lines += ["", "Encrypted files:"]
+        lines += [f"  {stats.path.name}" for stats in result.encrypted]
+    if result.invalid:
+        lines += ["", "Invalid files:"]
+        lines += [f"  {stats.path.name}: {stats.error}" for stats in result.invalid]
+    return "\n".join(lines)
+
+
+__all__ = [
+    "FileStats",
+    "InspectResult",
+    "StatsCache",
+    "format_table",
+    "inspect_file",
+    "inspect_pdfs",
+    "STATS_CACHE_NAME",
+    "DEFAULT_TOP",
+]
@@ -0,0 +1,306 @@
+"""
+Isolated parsing for the PDFusion package.
+
+Some malformed PDFs make the parser loop indefinitely or exhaust memory, for
+example through a cyclic outline or an enormous cross-reference table. This
+module parses inputs in worker processes, each parse with a time and memory
+limit, before they are merged. A worker whose parse overruns is killed and
+replaced while the other workers carry on, and the file is quarantined
+rather than stalling the merge.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from time import monotonic
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import IndirectObject
+
+from . import logging as log_utils
+from .catalog import PdfInput, open_input
+from .exceptions import PDFusionQuarantineError
+from .parallel import resolve_workers
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows, where only the time limit applies
+    resource = None  # type: ignore[assignment]
+
+logger = log_utils.get_logger(__name__)
+
+
+def resolve_objects(root: Any) -> int:
+    """
+    Resolve every object reachable from ``root``, once each.
+
+    Resolution parses each object as copying it into an output would, and
+    leaves it in the reader's object cache. Stream data is not decoded.
+
+    Parameters
+    ----------
+    root : Any
+        The object to start from, such as a reader's trailer.
+
+    Returns
+    -------
+    int
+        Number of indirect objects resolved.
+    """
+    seen: Set[int] = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if obj.idnum in seen:
+                continue
+            seen.add(obj.idnum)
+            obj = obj.get_object()
+        if isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return len(seen)
+
+
+def screen_file(path: str | Path) -> int:
+    """
+    Parse a file the way merging it would, without merging it.
+
+    Reads the cross-reference table, page tree, outline and named
+    destinations, and resolves every object the trailer reaches. Encrypted
+    files are read without decrypting them, since only their structure is
+    needed.
+
+    Parameters
+    ----------
+    path : str | Path
+        The file to parse, or its ``PdfInput``.
+
+    Returns
+    -------
+    int
+        Number of objects resolved.
+    """
+    with open_input(path) as f:
+        reader = PdfReader(f)
+        reader._override_encryption = reader.is_encrypted
+        len(reader.pages)
+        reader.outline
+        reader.named_destinations
+        return resolve_objects(reader.trailer)
+
+
+def _limit_memory(limit: int) -> None:
+    # Cap the address space at what the worker already uses plus the limit
+    if not limit or resource is None:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            used = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        used = 0
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    soft = used + limit
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _out_of_memory(error: Optional[BaseException], limited: bool) -> bool:
+    # CPython can report a failed allocation as a SystemError, and parsers
+    # may wrap either in errors of their own
+    while error is not None:
+        if isinstance(error, MemoryError):
+            return True
+        if limited and isinstance(error, SystemError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _serve(conn: Connection, memory: int) -> None:
+    # Worker loop: screen each path received, replying with None when the
+    # parse finished, failed or not, or with the limit it overran
+    _limit_memory(memory)
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            return
+        if path is None:
+            return
+        try:
+            screen_file(path)
+        except Exception as e:
+            # Other errors are reported with the input's name when the merge
+            # parses it
+            if _out_of_memory(e, limited=bool(memory)):
+                if memory:
+                    conn.send(f"parse exceeded the memory limit of {memory:,} bytes")
+                else:
+                    conn.send("parse ran out of memory")
+                # The interpreter may be left in a bad state; exit to be replaced
+                return
+        conn.send(None)
+
+
+class _Worker:
+    """A screening process and the input it is working on."""
+
+    def __init__(self, memory: int) -> None:
+        context = multiprocessing.get_context()
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve, args=(child, memory), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.index = -1
+        self.deadline: Optional[float] = None
+
+    def submit(self, index: int, path: str | Path, timeout: float) -> None:
+        self.index = index
+        self.deadline = monotonic() + timeout if timeout else None
+        self.conn.send(path)
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class Screening(NamedTuple):
+    """
+    Outcome of screening a batch of inputs.
+
+    Attributes
+    ----------
+    passed : List[Any]
+        Inputs whose parse stayed within the limits, in their original
+        order. Inputs that failed to parse are included; merging them
+        reports the error.
+    quarantined : List[PDFusionQuarantineError]
+        One error per input whose parse overran a limit, in input order.
+    """
+    passed: List[Any]
+    quarantined: List[PDFusionQuarantineError]
+
+
+def screen_files(
+    paths: Sequence[Any],
+    *,
+    timeout: float = 0.0,
+    memory: int = 0,
+    workers: int = 0,
+) -> Screening:
+    """
+    Parse files in isolated worker processes, quarantining those that overrun.
+
+    Each worker parses one file at a time. A worker whose parse takes longer
+    than ``timeout`` is killed, and one whose parse runs out of ``memory``
+    exits; either is replaced while the other workers carry on. A worker
+    that dies, for instance by a crash in the parser, also quarantines its
+    file.
+
+    Parameters
+    ----------
+    paths : Sequence
+        The input files, as paths or catalogued inputs.
+    timeout : float, optional
+        Seconds a parse may take; 0 means no limit.
+    memory : int, optional
+        Bytes a parse may take on top of the worker's own; 0 means no limit.
+    workers : int, optional
+        Number of worker processes; 0 means one per CPU.
+
+    Returns
+    -------
+    Screening
+        The inputs to merge and the quarantined ones.
+    """
+    pending: Deque[int] = deque(range(len(paths)))
+    reasons: Dict[int, str] = {}
+    count = min(resolve_workers(workers), len(paths))
+    idle = [_Worker(memory) for _ in range(count)]
+    busy: Dict[Connection, _Worker] = {}
+
+    def retire(worker: _Worker, reason: str) -> None:
+        # Record why a worker's input failed and put a new worker in its place
+        reasons[worker.index] = reason
+        worker.kill()
+        idle.append(_Worker(memory))
+
+    try:
+        while pending or busy:
+            while pending and idle:
+                worker = idle.pop()
+                index = pending.popleft()
+                path = paths[index]
+                # Members of archives and objects of sources are opened
+                # through their record
+                if not (isinstance(path, PdfInput) and not path.is_file):
+                    path = os.fspath(path)
+                worker.submit(index, path, timeout)
+                busy[worker.conn] = worker
+
+            deadlines = [w.deadline for w in busy.values() if w.deadline is not None]
+            wait_for = max(0.0, min(deadlines) - monotonic()) if deadlines else None
+            for conn in wait(list(busy), timeout=wait_for):
+                worker = busy.pop(conn)  # type: ignore[call-overload]
+                try:
+                    reason = worker.conn.recv()
+                except EOFError:
+                    worker.process.join()
+                    code = worker.process.exitcode
+                    reason = f"parser process exited with code {code}"
+                    if memory:
+                        # Allocation failures in C code can kill the process
+                        reason += f" under a memory limit of {memory:,} bytes"
+                    retire(worker, reason)
+                    continue
+                if reason is not None:
+                    retire(worker, reason)
+                else:
+                    idle.append(worker)
+
+            now = monotonic()
+            for conn, worker in list(busy.items()):
+                if worker.deadline is not None and worker.deadline <= now:
+                    del busy[conn]
+                    retire(worker, f"parse took longer than {timeout:g}s")
+    finally:
+        for worker in idle + list(busy.values()):
+            worker.close()
+
+    quarantined = [
+        PDFusionQuarantineError(str(paths[index]), reasons[index])
+        for index in sorted(reasons)
+    ]
+    for error in quarantined:
+        logger.warning(error.message)
+    passed = [path for index, path in enumerate(paths) if index not in reasons]
+    return Screening(passed, quarantined)
+
+
+__all__ = ["Screening", "resolve_objects", "screen_file", "screen_files"]
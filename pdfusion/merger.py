@@ -0,0 +1,421 @@
+"""
+Merger used by the PDFusion package.
+
+This module extends PyPDF2's ``PdfMerger`` so that in-memory and caller-owned
+inputs are parsed in place instead of being copied into fresh buffers, and so
+that outlines and named destinations are merged in time linear in their size.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import ExitStack, closing
+from io import BytesIO, IOBase
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from PyPDF2 import PdfMerger, PdfReader
+from PyPDF2._encryption import Encryption
+from PyPDF2._merger import _MergedPage
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    Fit,
+    NameObject,
+    NumberObject,
+    OutlineItem,
+    TextStringObject,
+)
+
+from . import logging as log_utils
+from .catalog import open_input
+from .crypto import decrypt_files, is_encrypted
+from .dedupe import PageDeduplicator
+from .exceptions import PDFusionError, PDFusionMergeError
+from .images import ImageResampler, ImageStats
+from .options import MergeOptions
+from .outlines import (
+    build_outline,
+    group_items,
+    link_items,
+    number_pages,
+    page_key,
+    trim_outline,
+)
+from .prefetch import prefetch_files, probe_files
+from .readers import SharedReader
+from .writer import PdfusionWriter
+
+logger = log_utils.get_logger(__name__)
+
+
+def _input_size(source: Any) -> int:
+    if isinstance(source, bytes):
+        return len(source)
+    stream = source.stream if isinstance(source, PdfReader) else source
+    # The reader seeks before every read, so moving the position is safe
+    return stream.seek(0, os.SEEK_END)
+
+
+class PdfusionMerger(PdfMerger):
+    """
+    ``PdfMerger`` that avoids copying input buffers.
+
+    ``bytes`` inputs are wrapped in a ``BytesIO`` that shares the original
+    buffer, and seekable binary streams are read in place. Streams passed in
+    by the caller are borrowed: they are never closed by :meth:`close`.
+
+    Outline items and named destinations are matched to pages by object
+    number, and each appended input's items are visited only once. With
+    ``options.bookmarks`` set, each input appended with a title gets an
+    outline item holding its own outline; with ``options.bookmark_fanout``
+    set, top-level items are gathered under nested groups.
+
+    With ``options.drop_duplicate_pages`` set, appended pages identical to
+    an earlier page are left out as they are appended. With
+    ``options.image_dpi`` set, the images of each appended input start being
+    downsampled while later inputs are appended; call :meth:`finish_images`
+    before writing the output.
+
+    Parameters
+    ----------
+    options : MergeOptions, optional
+        Merge options, passed on to the output writer.
+    object_base : int, optional
+        Object numbers to reserve below the output's objects; see
+        :class:`PdfusionWriter`.
+    """
+
+    def __init__(
+        self, options: MergeOptions | None = None, object_base: int = 0
+    ) -> None:
+        super().__init__()
+        self.options = options or MergeOptions()
+        self.output = PdfusionWriter(self.options, object_base)
+        self._borrowed: Set[int] = set()
+        self.input_pages: List[int] = []
+        # Outline items and named destinations of the input being appended
+        self._outline_mark = self._dests_mark = 0
+        self.duplicates: Optional[PageDeduplicator] = None
+        if self.options.drop_duplicate_pages:
+            self.duplicates = PageDeduplicator()
+        self.images: Optional[ImageResampler] = None
+        if self.options.image_dpi:
+            self.images = ImageResampler(self.options)
+
+    def append_files(
+        self, paths: Sequence[Path], stack: ExitStack, *, verbose: bool = False
+    ) -> None:
+        """
+        Append PDF files, decrypting encrypted ones in worker processes.
+
+        Plain files are parsed once from their open file; encrypted files are
+        replaced by decrypted copies produced with ``options.passwords``. With
+        ``options.prefetch_depth`` set, plain files are instead read into
+        memory ahead of parsing by background threads. With
+        ``options.reader_cache`` set, plain files are taken from the cache,
+        or parsed into it.
+
+        Parameters
+        ----------
+        paths : Sequence[Path]
+            The files to append, in order.
+        stack : ExitStack
+            Owns the opened files, which must stay open until the output is
+            written.
+        verbose : bool, optional
+            Whether to log each file as it is appended (default is False).
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        PDFusionMergeError
+            If a file cannot be opened or parsed.
+        PDFusionPasswordError
+            If no configured password unlocks an encrypted file.
+        """
+        shared: Dict[int, SharedReader] = {}
+        cache = self.options.reader_cache
+        if cache is not None and not self.options.image_dpi:
+            for index, path in enumerate(paths):
+                try:
+                    reader = cache.fetch(path)
+                except Exception as e:
+                    raise PDFusionMergeError(filename=str(path), original_error=e)
+                if reader is not None:
+                    shared[index] = reader
+        parsed = [path for index, path in enumerate(paths) if index not in shared]
+
+        depth = self.options.prefetch_depth
+        if depth:
+            probes = stack.enter_context(closing(probe_files(parsed, depth=depth)))
+        opened: List[BinaryIO] = []
+        flags: List[bool] = []
+        sizes: List[int] = []
+        for path in parsed:
+            try:
+                if depth:
+                    probe = next(probes)
+                    flags.append(probe.encrypted)
+                    sizes.append(probe.size)
+                else:
+                    stream = stack.enter_context(open_input(path))
+                    opened.append(stream)
+                    flags.append(is_encrypted(stream))
+            except Exception as e:
+                raise PDFusionMergeError(filename=str(path), original_error=e)
+
+        encrypted = [path for path, flag in zip(parsed, flags) if flag]
+        if encrypted:
+            logger.debug(f"Decrypting {len(encrypted)} encrypted inputs")
+        decrypted = stack.enter_context(
+            closing(
+                decrypt_files(
+                    encrypted,
+                    self.options.passwords,
+                    workers=self.options.workers,
+                    memory_budget=self.options.memory_budget,
+                )
+            )
+        )
+        if depth:
+            sources: Iterator[BinaryIO] = stack.enter_context(
+                closing(
+                    prefetch_files(
+                        [path for path, flag in zip(parsed, flags) if not flag],
+                        [size for size, flag in zip(sizes, flags) if not flag],
+                        depth=depth,
+                        max_bytes=self.options.prefetch_bytes,
+                    )
+                )
+            )
+        else:
+            sources = (stream for stream, flag in zip(opened, flags) if not flag)
+
+        pending = iter(flags)
+        for index, path in enumerate(paths):
+            title = Path(path.name).stem if self.options.bookmarks else None
+            try:
+                if verbose:
+                    logger.debug(f"Processing: {path.name}")
+                if index in shared:
+                    self.append_source(shared[index], title=title)
+                elif next(pending):
+                    self.append_source(next(decrypted), title=title)
+                else:
+                    self.append_source(next(sources), title=title)
+            except PDFusionError:
+                raise
+            except Exception as e:
+                raise PDFusionMergeError(filename=str(path), original_error=e)
+
+    def append_source(self, source: Any, title: Optional[str] = None) -> None:
+        """
+        Append one input, recording it into ``options.metrics`` if set.
+
+        The number of pages the input contributed, after any duplicates are
+        left out, is appended to ``input_pages``.
+
+        Parameters
+        ----------
+        source : bytes | BinaryIO | PdfReader
+            The input, as accepted by :meth:`append`.
+        title : str, optional
+            Title of an outline item to add at the input's first page, with
+            the input's own outline items as its children.
+
+        Returns
+        -------
+        None
+        """
+        metrics = self.options.metrics
+        appended = len(self.pages)
+        outline, dests = len(self.outline), len(self.named_dests)
+        self._outline_mark, self._dests_mark = outline, dests
+        started = perf_counter()
+        if isinstance(source, SharedReader):
+            self._append_shared(source)
+        else:
+            self.append(source)
+        if title is not None and len(self.pages) > appended:
+            bookmark = OutlineItem(
+                TextStringObject(title),
+                NumberObject(self.pages[appended].id),
+                Fit.fit(),
+            )
+            children = self.outline[outline:]
+            self.outline[outline:] = [bookmark, children] if children else [bookmark]
+        if metrics is not None:
+            metrics.parse_seconds.observe(perf_counter() - started)
+            metrics.input_bytes.inc(_input_size(source))
+        if self.duplicates is not None:
+            self.pages[appended:] = self.duplicates.filter(self.pages[appended:])
+            self.duplicates.retarget(self.outline[outline:], self.named_dests[dests:])
+        if self.images is not None:
+            self.images.submit(page.pagedata for page in self.pages[appended:])
+        self.input_pages.append(len(self.pages) - appended)
+
+    def _append_shared(self, reader: SharedReader) -> None:
+        # PdfMerger.merge without parsing the input again; merging reads the
+        # reader's objects but leaves them unchanged, so it can be shared
+        self._borrowed.add(id(reader.stream))
+        self.inputs.append((reader.stream, reader))
+        pages = (0, len(reader.pages))
+        self.outline += self._trim_outline(reader, reader.outline, pages)
+        self.named_dests += self._trim_dests(reader, reader.named_destinations, pages)
+        merged = []
+        for number in range(*pages):
+            merged.append(_MergedPage(reader.pages[number], reader, self.id_count))
+            self.id_count += 1
+        self._associate_dests_to_pages(merged)
+        self._associate_outline_items_to_pages(merged)
+        self.pages.extend(merged)
+
+    @staticmethod
+    def _page_keys(pdf: PdfReader, pages: Any) -> Set[Optional[int]]:
+        numbers = pages if isinstance(pages, list) else range(*pages)
+        return {page_key(pdf.pages[number]) for number in numbers}
+
+    @staticmethod
+    def _page_numbers(pages: List[_MergedPage]) -> Dict[Optional[int], int]:
+        return {page_key(page.pagedata): page.id for page in pages}
+
+    def _trim_outline(self, pdf: PdfReader, outline: Any, pages: Any) -> List[Any]:
+        # PyPDF2 compares every item with every page being merged
+        return trim_outline(outline, self._page_keys(pdf, pages))
+
+    def _trim_dests(self, pdf: PdfReader, dests: Any, pages: Any) -> List[Any]:
+        kept = self._page_keys(pdf, pages)
+        trimmed = []
+        for dest in dests.values():
+            page = dest.raw_get("/Page") if "/Page" in dest else None
+            if page_key(page) in kept:
+                dest[NameObject("/Page")] = page.get_object()
+                trimmed.append(dest)
+        return trimmed
+
+    def _associate_outline_items_to_pages(
+        self, pages: List[_MergedPage], outline: Any = None
+    ) -> None:
+        # PyPDF2 walks every item merged so far after each input
+        if outline is None:
+            outline = self.outline[self._outline_mark:]
+        number_pages(outline, self._page_numbers(pages))
+
+    def _associate_dests_to_pages(self, pages: List[_MergedPage]) -> None:
+        number_pages(self.named_dests[self._dests_mark:], self._page_numbers(pages))
+
+    def _write_dests(self) -> None:
+        # PyPDF2 searches the merged pages for each destination and inserts
+        # each name into the sorted name array one at a time
+        pages = {page.id: page for page in self.pages}
+        names = self.output.get_named_dest_root()
+        entries = list(zip(names[::2], names[1::2]))
+        for dest in self.named_dests:
+            page = dest.raw_get("/Page") if "/Page" in dest else None
+            merged = pages.get(page) if type(page) is NumberObject else None
+            if merged is None:
+                continue
+            dest[NameObject("/Page")] = merged.out_pagedata
+            ref = self.output._add_object(dest.dest_array)
+            entries.append((TextStringObject(dest["/Title"]), ref))
+        entries.sort(key=lambda entry: entry[0])
+        names[:] = [value for entry in entries for value in entry]
+
+    def _write_outline(self, outline: Any = None, parent: Any = None) -> None:
+        # Items are linked to their neighbours as they are built, instead of
+        # PyPDF2 searching the merged pages for each and walking the list
+        # of its siblings to append it; items of pages not merged are left
+        # out rather than written without a destination
+        writer = self.output
+        items = build_outline(
+            self.outline if outline is None else outline,
+            {page.id: page for page in self.pages},
+            self._write_outline_item_on_page,
+            writer._add_object,
+        )
+        items = group_items(items, self.options.bookmark_fanout, writer._add_object)
+        if not items:
+            return
+        root = DictionaryObject({NameObject("/Type"): NameObject("/Outlines")})
+        ref = writer._add_object(root)
+        root[NameObject("/Count")] = NumberObject(link_items(ref, items))
+        root[NameObject("/First")] = items[0][0]
+        root[NameObject("/Last")] = items[-1][0]
+        writer._root_object[NameObject("/Outlines")] = ref
+
+    @property
+    def duplicate_pages(self) -> int:
+        """Number of appended pages left out as duplicates."""
+        return self.duplicates.dropped if self.duplicates is not None else 0
+
+    def finish_images(self) -> ImageStats:
+        """
+        Apply the downsampled images of every appended input.
+
+        Returns
+        -------
+        ImageStats
+            Number and sizes of the images replaced; all zero when
+            ``options.image_dpi`` is not set.
+        """
+        if self.images is None:
+            return ImageStats()
+        return self.images.finish()
+
+    def _write_outline_item_on_page(self, outline_item: Any, page: _MergedPage) -> None:
+        # PyPDF2 points the /GoTo action at the page's position in the merge
+        # list instead of the page object, so outlines are lost when the
+        # output is merged again
+        super()._write_outline_item_on_page(outline_item, page)
+        destination = outline_item[NameObject("/A")][NameObject("/D")]
+        outline_item[NameObject("/A")][NameObject("/D")] = ArrayObject(
+            [page.out_pagedata, *destination[1:]]
+        )
+
+    def _create_stream(self, fileobj: Any) -> Tuple[IOBase, Optional[Encryption]]:
+        if isinstance(fileobj, bytes):
+            # BytesIO shares an immutable bytes buffer until it is written to
+            return BytesIO(fileobj), None
+        if hasattr(fileobj, "read") and getattr(fileobj, "seekable", bool)():
+            self._borrowed.add(id(fileobj))
+            return fileobj, None
+        return super()._create_stream(fileobj)
+
+    def close(self) -> None:
+        """
+        Release merged state, closing only the streams this merger created.
+
+        Returns
+        -------
+        None
+        """
+        self.inputs = [
+            (stream, reader)
+            for stream, reader in self.inputs
+            if id(stream) not in self._borrowed
+        ]
+        self._borrowed.clear()
+        if self.images is not None:
+            self.images.close()
+        super().close()
+
+
+__all__ = ["PdfusionMerger"]
@@ -0,0 +1,532 @@
+"""
+Merge metrics for the PDFusion package.
+
+This module provides a small in-process registry of counters, gauges and
+histograms, the set of instruments a merge records into, and export in the
+Prometheus text and OpenMetrics formats, for example to a node_exporter
+textfile collector.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Final, Iterator, List, Sequence, Tuple, TypeVar
+
+from .writer import atomic_output
+
+# Constants
+DEFAULT_BUCKETS: Final[Tuple[float, ...]] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+M = TypeVar("M", bound="Metric")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric(ABC):
+    """
+    Base class of metrics, optionally split by label values.
+
+    Updates take a per-metric lock, so one set of metrics can be shared by
+    merges running in several threads.
+
+    Parameters
+    ----------
+    name : str
+        Metric family name.
+    documentation : str
+        One-line description exported as ``# HELP``.
+    labelnames : Sequence[str], optional
+        Names of the labels children are created for.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Metric] = {}
+        self._lock = threading.Lock()
+
+    def labels(self: M, *values: str) -> M:
+        """
+        Get the child metric for a combination of label values.
+
+        Parameters
+        ----------
+        *values : str
+            One value per label name, in order.
+
+        Returns
+        -------
+        Metric
+            The child, created on first use.
+
+        Raises
+        ------
+        ValueError
+            If the number of values does not match the label names.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {values}"
+            )
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child  # type: ignore[return-value]
+
+    def _child(self) -> Metric:
+        return type(self)(self.name, self.documentation)
+
+    def samples(self) -> Iterator[Sample]:
+        """
+        Produce the samples of this metric and its children.
+
+        Yields
+        ------
+        Tuple[str, Dict[str, str], float]
+            Sample name, labels and value.
+        """
+        if not self.labelnames:
+            yield from self._samples({})
+            return
+        for values, child in sorted(self._children.items()):
+            yield from child._samples(dict(zip(self.labelnames, values)))
+
+    @abstractmethod
+    def _samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        """Yield the samples of this metric's own value, under ``labels``."""
+
+
+class Counter(Metric):
+    """
+    A value that only goes up, such as a number of files merged.
+
+    Attributes
+    ----------
+    value : float
+        The current count.
+    """
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increase the count.
+
+        Parameters
+        ----------
+        amount : float, optional
+            The non-negative amount to add.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        yield f"{self.name}_total", labels, self.value
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down, such as merges in progress.
+
+    Attributes
+    ----------
+    value : float
+        The current value.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """
+        Set the value.
+
+        Parameters
+        ----------
+        value : float
+            The new value.
+
+        Returns
+        -------
+        None
+        """
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increase the value.
+
+        Parameters
+        ----------
+        amount : float, optional
+            The amount to add; negative amounts decrease the value.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        yield self.name, labels, self.value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values, such as per-file parse latencies.
+
+    Parameters
+    ----------
+    name : str
+        Metric family name.
+    documentation : str
+        One-line description exported as ``# HELP``.
+    labelnames : Sequence[str], optional
+        Names of the labels children are created for.
+    buckets : Sequence[float], optional
+        Upper bounds of the buckets, in increasing order; an implicit
+        ``+Inf`` bucket is added.
+
+    Attributes
+    ----------
+    count : int
+        Number of observations.
+    sum : float
+        Sum of the observed values.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per-bucket counts, made cumulative only when exported
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def _child(self) -> Metric:
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation.
+
+        Parameters
+        ----------
+        value : float
+            The observed value.
+
+        Returns
+        -------
+        None
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def _samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            cumulative += count
+            yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        yield f"{self.name}_count", labels, self.count
+        yield f"{self.name}_sum", labels, self.sum
+
+
+class Registry:
+    """
+    A collection of metrics exported together.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """
+        Add a metric to the registry.
+
+        Parameters
+        ----------
+        metric : Metric
+            The metric to add.
+
+        Returns
+        -------
+        Metric
+            ``metric`` itself.
+
+        Raises
+        ------
+        ValueError
+            If a metric of the same name is already registered.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def __iter__(self) -> Iterator[Metric]:
+        return iter(self._metrics.values())
+
+    def get(self, name: str) -> Metric:
+        """
+        Look up a registered metric.
+
+        Parameters
+        ----------
+        name : str
+            The metric family name.
+
+        Returns
+        -------
+        Metric
+            The metric.
+
+        Raises
+        ------
+        KeyError
+            If no metric of that name is registered.
+        """
+        return self._metrics[name]
+
+    def render(self, openmetrics: bool = False) -> str:
+        """
+        Export every metric in a text exposition format.
+
+        Parameters
+        ----------
+        openmetrics : bool, optional
+            Whether to use the OpenMetrics format instead of the Prometheus
+            text format (default is False).
+
+        Returns
+        -------
+        str
+            The exposition, one sample per line.
+        """
+        lines: List[str] = []
+        for metric in self:
+            # Prometheus text names a counter family after its _total sample
+            family = metric.name
+            if metric.kind == "counter" and not openmetrics:
+                family += "_total"
+            lines.append(f"# HELP {family} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(
+                    f'{key}="{_escape(label)}"' for key, label in labels.items()
+                )
+                if label_text:
+                    name = f"{name}{{{label_text}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str | Path) -> None:
+        """
+        Atomically write the metrics for a Prometheus textfile collector.
+
+        Parameters
+        ----------
+        path : str | Path
+            The ``.prom`` file to write.
+
+        Returns
+        -------
+        None
+        """
+        with atomic_output(Path(path), digest=None) as stream:
+            stream.write(self.render().encode())
+
+
+class MergeMetrics:
+    """
+    Instruments a merge records into when ``MergeOptions.metrics`` is set.
+
+    Parameters
+    ----------
+    registry : Registry, optional
+        Registry to create the instruments in. A new one is created if not
+        provided.
+
+    Attributes
+    ----------
+    registry : Registry
+        The registry holding the instruments.
+    merges : Counter
+        Completed merges, including those served from the output cache.
+    cache_hits : Counter
+        Merges served from the output cache.
+    files : Counter
+        Input files merged.
+    quarantined : Counter
+        Input files left out because parsing them overran a limit.
+    pages : Counter
+        Pages written to merged outputs.
+    input_bytes : Counter
+        Bytes of input appended.
+    output_bytes : Counter
+        Bytes of merged output written.
+    parse_seconds : Histogram
+        Time to parse and append each input.
+    write_seconds : Histogram
+        Time to write each merged output or checkpoint part.
+    failures : Counter
+        Failed merges, labelled with the exception class.
+    in_progress : Gauge
+        Merges currently running.
+    last_success : Gauge
+        Unix time the last merge completed.
+    """
+
+    def __init__(self, registry: Registry | None = None) -> None:
+        self.registry = registry or Registry()
+        add = self.registry.register
+        self.merges = add(Counter("pdfusion_merges", "Completed merges"))
+        self.cache_hits = add(
+            Counter("pdfusion_cache_hits", "Merges served from the output cache")
+        )
+        self.files = add(Counter("pdfusion_files_merged", "Input files merged"))
+        self.quarantined = add(
+            Counter("pdfusion_files_quarantined", "Input files left out as unsafe")
+        )
+        self.pages = add(Counter("pdfusion_pages_merged", "Pages written"))
+        self.input_bytes = add(Counter("pdfusion_input_bytes", "Input bytes appended"))
+        self.output_bytes = add(
+            Counter("pdfusion_output_bytes", "Merged output bytes written")
+        )
+        self.parse_seconds = add(
+            Histogram("pdfusion_parse_seconds", "Time to parse and append an input")
+        )
+        self.write_seconds = add(
+            Histogram("pdfusion_write_seconds", "Time to write a merged output or part")
+        )
+        self.failures = add(
+            Counter(
+                "pdfusion_failures", "Failed merges by exception class", ("exception",)
+            )
+        )
+        self.in_progress = add(Gauge("pdfusion_merges_in_progress", "Running merges"))
+        self.last_success = add(
+            Gauge(
+                "pdfusion_last_success_timestamp_seconds",
+                "Unix time the last merge completed",
+            )
+        )
+
+    def record_success(self, files: int, pages: int, output_bytes: int) -> None:
+        """
+        Record a completed merge.
+
+        Parameters
+        ----------
+        files : int
+            Number of inputs merged.
+        pages : int
+            Number of pages written.
+        output_bytes : int
+            Size of the merged output.
+
+        Returns
+        -------
+        None
+        """
+        self.merges.inc()
+        self.files.inc(files)
+        self.pages.inc(pages)
+        self.output_bytes.inc(output_bytes)
+        self.last_success.set(time.time())
+
+    def record_failure(self, error: BaseException) -> None:
+        """
+        Record a failed merge under the class of the error that ended it.
+
+        Parameters
+        ----------
+        error : BaseException
+            The error, such as a ``PDFusionMergeError``, or the unexpected
+            error a ``PDFusionError`` was raised for.
+
+        Returns
+        -------
+        None
+        """
+        self.failures.labels(type(error).__name__).inc()
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Metric",
+    "MergeMetrics",
+    "Registry",
+    "DEFAULT_BUCKETS",
+]
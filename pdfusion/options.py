@@ -0,0 +1,182 @@
+"""
+Merge options for the PDFusion package.
+
+This module defines the configuration object accepted by ``merge_pdfs`` and
+``merge_streams`` to tune how inputs are read and how the output is written.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Final, Optional
+
+if TYPE_CHECKING:
+    from .crypto import PasswordMap
+    from .metrics import MergeMetrics
+    from .readers import ReaderCache
+
+# Constants
+DEFAULT_DIGEST: Final[str] = "sha256"
+DEFAULT_BUFFER_SIZE: Final[int] = 1024 * 1024
+DEFAULT_PAGE_TREE_FANOUT: Final[int] = 32
+DEFAULT_CHECKPOINT_EVERY: Final[int] = 1000
+DEFAULT_PREFETCH_BYTES: Final[int] = 64 * 1024 * 1024
+DEFAULT_CACHE_BYTES: Final[int] = 1024 * 1024 * 1024
+DEFAULT_IMAGE_QUALITY: Final[int] = 75
+
+
+@dataclass
+class MergeOptions:
+    """
+    Configuration for a merge operation.
+
+    Attributes
+    ----------
+    digest : str, optional
+        ``hashlib`` algorithm used to checksum the output while it is written,
+        such as ``"sha256"`` or ``"blake2b"``. ``None`` disables hashing.
+    fsync : bool
+        Whether to fsync the output file and its directory before returning.
+    buffer_size : int
+        Size in bytes of the output write buffer.
+    page_tree_fanout : int
+        Maximum kids per /Pages node of the output's balanced page tree.
+        0 keeps a single flat /Kids array.
+    collect_garbage : bool
+        Whether to drop objects unreachable from the output catalog before
+        writing.
+    passwords : PasswordMap, optional
+        Passwords for encrypted inputs. Inputs that open with an empty user
+        password need none.
+    workers : int
+        Number of worker processes that decrypt encrypted inputs. 0 means one
+        per CPU.
+    memory_budget : int
+        Memory in bytes that inputs being parsed by worker processes may take
+        at once, judged from their file sizes. Inputs too large for the
+        budget are parsed one at a time. 0 means no limit.
+    checkpoint_every : int
+        Number of inputs ``merge_pdfs`` writes per checkpoint, so that an
+        interrupted merge can be resumed. 0 disables checkpoints.
+    prefetch_depth : int
+        Number of input files ``merge_pdfs`` reads ahead in background
+        threads while earlier ones are parsed. Prefetched inputs are held in
+        memory until the output is written. 0 reads inputs from their open
+        files as they are parsed.
+    prefetch_bytes : int
+        Bytes that files read ahead but not yet parsed may take.
+    metrics : MergeMetrics, optional
+        Instruments to record files, pages, bytes, latencies and failures
+        into. Nothing is recorded when not set.
+    cache_dir : Path, optional
+        Directory of the output cache. When set, ``merge_pdfs`` reuses the
+        output of an earlier merge of the same, unchanged inputs with the
+        same options instead of merging again.
+    cache_bytes : int
+        Total size of merged outputs the cache keeps before evicting the
+        least recently used.
+    reduce_fanout : int
+        Merge more inputs than this as a tree: groups of this many files are
+        merged into parts in worker processes, then groups of this many parts
+        are combined level by level. 0 merges serially. Ignored for
+        checkpointed merges.
+    temp_dir : Path, optional
+        Directory for the intermediate parts of a tree merge; a hidden
+        directory next to the output is used if not set.
+    parse_timeout : float
+        Seconds that parsing one input may take. When this or
+        ``parse_memory`` is set, ``merge_pdfs`` first parses every input in
+        isolated worker processes and leaves out inputs that overrun a limit.
+        0 means no limit.
+    parse_memory : int
+        Memory in bytes that parsing one input may take, enforced as an
+        address-space limit on POSIX systems. 0 means no limit.
+    image_dpi : int
+        Resolution in dots per inch to downsample page images above, judged
+        by fitting each image to its page. Images are resampled in worker
+        processes while later inputs are appended. 0 leaves images as they
+        are.
+    image_encoding : str
+        Encoding of downsampled images: ``"flate"``, which is lossless, or
+        ``"jpeg"``, which needs Pillow.
+    image_quality : int
+        JPEG quality of downsampled images, from 1 to 95.
+    drop_duplicate_pages : bool
+        Whether to leave out pages identical to a page merged earlier, by
+        content streams and resources. Outline items and named destinations
+        of a dropped page point at the page kept. Checkpointed and tree
+        merges find duplicates within each part.
+    reader_cache : ReaderCache, optional
+        Cache of parsed inputs to share between merges in one process, so
+        that documents merged again and again are not parsed every time.
+        Not used while ``image_dpi`` is set, since downsampling rewrites
+        parsed images.
+    page_index : bool
+        Whether to write a page index next to the output, mapping each input
+        to its pages and each object to its bytes, so that ``pdfusion
+        extract`` can copy an input's pages out without parsing the output.
+    compress_level : int
+        zlib level, from 1 to 9, to Flate-compress streams stored without a
+        filter with while the output is written. 0 leaves them as they are.
+    compress_threads : int
+        Number of threads compressing streams; large streams are split into
+        chunks compressed at once. 0 means one per CPU.
+    autotune : bool
+        Whether to merge as a tree whose group size and number of groups
+        merged at once are tuned while merging, from the inputs' sizes and
+        the pages per second measured, within ``workers`` and
+        ``memory_budget``. ``reduce_fanout`` then only sets how many parts
+        are combined at a time. Ignored for checkpointed merges.
+    bookmarks : bool
+        Whether to add an outline item for each input file, titled with its
+        name and holding the input's own outline items.
+    bookmark_fanout : int
+        Most top-level outline items; longer lists are gathered under
+        nested, closed groups titled with the first and last titles they
+        span. 0 leaves the outline flat.
+    """
+    digest: Optional[str] = DEFAULT_DIGEST
+    fsync: bool = False
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+    page_tree_fanout: int = DEFAULT_PAGE_TREE_FANOUT
+    collect_garbage: bool = True
+    passwords: Optional[PasswordMap] = None
+    workers: int = 0
+    memory_budget: int = 0
+    checkpoint_every: int = 0
+    prefetch_depth: int = 0
+    prefetch_bytes: int = DEFAULT_PREFETCH_BYTES
+    metrics: Optional[MergeMetrics] = None
+    cache_dir: Optional[Path] = None
+    cache_bytes: int = DEFAULT_CACHE_BYTES
+    reduce_fanout: int = 0
+    temp_dir: Optional[Path] = None
+    parse_timeout: float = 0.0
+    parse_memory: int = 0
+    image_dpi: int = 0
+    image_encoding: str = "flate"
+    image_quality: int = DEFAULT_IMAGE_QUALITY
+    drop_duplicate_pages: bool = False
+    reader_cache: Optional[ReaderCache] = None
+    page_index: bool = False
+    compress_level: int = 0
+    compress_threads: int = 0
+    autotune: bool = False
+    bookmarks: bool = False
+    bookmark_fanout: int = 0
+
+
+__all__ = [
+    "MergeOptions",
+    "DEFAULT_DIGEST",
+    "DEFAULT_BUFFER_SIZE",
+    "DEFAULT_PAGE_TREE_FANOUT",
+    "DEFAULT_CHECKPOINT_EVERY",
+    "DEFAULT_PREFETCH_BYTES",
+    "DEFAULT_CACHE_BYTES",
+    "DEFAULT_IMAGE_QUALITY",
+]
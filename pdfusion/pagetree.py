@@ -0,0 +1,165 @@
+"""
+Page tree utilities for the PDFusion package.
+
+This module rebuilds a document's /Pages tree as a balanced tree with a fixed
+fan-out, and looks pages up by walking /Count values down the tree, so random
+access to page N only touches O(log N) nodes instead of one huge /Kids array.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+from typing import Final, List
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+)
+
+from .exceptions import PDFusionError
+from .options import DEFAULT_PAGE_TREE_FANOUT
+
+# Constants
+MIN_PAGE_TREE_FANOUT: Final[int] = 2
+
+
+def _leaf_pages(pages_root: DictionaryObject) -> List[IndirectObject]:
+    """Collect page references under a /Pages node in document order."""
+    leaves: List[IndirectObject] = []
+    stack = list(reversed(pages_root["/Kids"]))
+    while stack:
+        ref = stack.pop()
+        node = ref.get_object()
+        if node.get("/Type") == "/Pages":
+            stack.extend(reversed(node["/Kids"]))
+        else:
+            leaves.append(ref)
+    return leaves
+
+
+def _split(items: List[IndirectObject], groups: int) -> List[List[IndirectObject]]:
+    """Split items into ``groups`` consecutive runs of near-equal length."""
+    size, extra = divmod(len(items), groups)
+    runs, start = [], 0
+    for index in range(groups):
+        end = start + size + (1 if index < extra else 0)
+        runs.append(items[start:end])
+        start = end
+    return runs
+
+
+def balance_page_tree(writer: PdfWriter, fanout: int = DEFAULT_PAGE_TREE_FANOUT) -> int:
+    """
+    Rebuild a writer's page tree as a balanced tree.
+
+    The root /Pages node keeps its identity and any inheritable attributes
+    (/Resources, /MediaBox, /CropBox, /Rotate); intermediate nodes carry none,
+    so inheritance through the new levels resolves exactly as before.
+
+    Parameters
+    ----------
+    writer : PdfWriter
+        The writer whose pages have all been added.
+    fanout : int, optional
+        Maximum number of kids per /Pages node (default is 32).
+
+    Returns
+    -------
+    int
+        Depth of the resulting tree, counting the root as 1.
+
+    Raises
+    ------
+    PDFusionError
+        If ``fanout`` is smaller than 2.
+    """
+    if fanout < MIN_PAGE_TREE_FANOUT:
+        raise PDFusionError(f"Page tree fan-out must be at least 2, got {fanout}")
+
+    root = writer._pages.get_object()
+    leaves = _leaf_pages(root)
+    level: List[IndirectObject] = leaves
+    counts: List[int] = [1] * len(leaves)
+    depth = 1
+
+    while len(level) > fanout:
+        groups = -(-len(level) // fanout)
+        next_level: List[IndirectObject] = []
+        next_counts: List[int] = []
+        position = 0
+        for run in _split(level, groups):
+            node = DictionaryObject()
+            ref = writer._add_object(node)
+            count = sum(counts[position : position + len(run)])
+            position += len(run)
+            node.update(
+                {
+                    NameObject("/Type"): NameObject("/Pages"),
+                    NameObject("/Kids"): ArrayObject(run),
+                    NameObject("/Count"): NumberObject(count),
+                }
+            )
+            for kid in run:
+                kid.get_object()[NameObject("/Parent")] = ref
+            next_level.append(ref)
+            next_counts.append(count)
+        level, counts = next_level, next_counts
+        depth += 1
+
+    root[NameObject("/Kids")] = ArrayObject(level)
+    root[NameObject("/Count")] = NumberObject(len(leaves))
+    for kid in level:
+        kid.get_object()[NameObject("/Parent")] = writer._pages
+    return depth
+
+
+def lookup_page(reader: PdfReader, index: int) -> DictionaryObject:
+    """
+    Find page ``index`` by descending the page tree.
+
+    Unlike ``reader.pages[index]``, which flattens the whole tree first, this
+    resolves only the nodes on the path to the page, so lookups in a balanced
+    tree cost O(fan-out * depth).
+
+    Parameters
+    ----------
+    reader : PdfReader
+        The document to search.
+    index : int
+        Zero-based page number.
+
+    Returns
+    -------
+    DictionaryObject
+        The page dictionary. Inherited attributes are not merged in.
+
+    Raises
+    ------
+    IndexError
+        If ``index`` is out of range.
+    """
+    node = reader.trailer["/Root"]["/Pages"].get_object()
+    if not 0 <= index < node["/Count"]:
+        raise IndexError(f"Page index out of range: {index}")
+
+    while True:
+        for kid in node["/Kids"]:
+            child = kid.get_object()
+            size = child["/Count"] if child.get("/Type") == "/Pages" else 1
+            if index < size:
+                if size == 1 and child.get("/Type") != "/Pages":
+                    return child
+                node = child
+                break
+            index -= size
+        else:
+            raise IndexError("Page tree /Count does not match its /Kids")
+
+
+__all__ = ["balance_page_tree", "lookup_page"]
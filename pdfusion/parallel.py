@@ -0,0 +1,153 @@
+"""
+Worker pool helpers for the PDFusion package.
+
+This module runs per-document work, such as decrypting inputs, in a pool of
+worker processes while handing results back in input order, optionally within
+a memory budget.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterator, Optional, Sequence, Tuple, TypeVar
+
+from .scheduler import MemoryBudget
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Resolve a configured worker count.
+
+    Parameters
+    ----------
+    workers : int
+        Requested number of workers; 0 means one per CPU.
+
+    Returns
+    -------
+    int
+        The number of worker processes to start, at least 1.
+    """
+    if workers > 0:
+        return workers
+    return os.cpu_count() or 1
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Sequence[T],
+    *,
+    workers: int = 0,
+    costs: Optional[Sequence[int]] = None,
+    budget: int = 0,
+) -> Iterator[R]:
+    """
+    Apply ``func`` to every item in worker processes, yielding in order.
+
+    Work runs in the calling process when only one worker would be used, so
+    small jobs do not pay for starting a pool. An exception raised for an
+    item is re-raised when that item's result is reached.
+
+    With a ``budget``, items are submitted in order only while the costs of
+    the items submitted and not yet yielded fit it. An item costing more
+    than the budget runs on its own, while cheap items keep several workers
+    busy.
+
+    Parameters
+    ----------
+    func : Callable
+        A picklable, module-level function.
+    items : Sequence
+        The items to process.
+    workers : int, optional
+        Number of worker processes; 0 means one per CPU.
+    costs : Sequence[int], optional
+        Estimated memory footprint of each item, in bytes.
+    budget : int, optional
+        Memory available to items in flight, in bytes; 0 means no limit.
+
+    Yields
+    ------
+    R
+        ``func(item)`` for each item, in the order of ``items``.
+    """
+    workers = min(resolve_workers(workers), len(items))
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from bounded_map(pool, func, items, costs=costs, budget=budget)
+
+
+def bounded_map(
+    pool: Executor,
+    func: Callable[[T], R],
+    items: Sequence[T],
+    *,
+    costs: Optional[Sequence[int]] = None,
+    budget: int = 0,
+    window: int = 0,
+) -> Iterator[R]:
+    """
+    Submit items to an executor in order, bounding the work outstanding.
+
+    An item counts as outstanding from its submission until its result is
+    yielded. Items are submitted while the costs of those outstanding fit
+    ``budget`` and fewer than ``window`` are outstanding; the first item is
+    always submitted, however costly, so nothing waits forever.
+
+    Parameters
+    ----------
+    pool : Executor
+        The executor to submit to; it is not shut down.
+    func : Callable
+        The function to apply to each item.
+    items : Sequence
+        The items to process.
+    costs : Sequence[int], optional
+        Cost of each item, such as its estimated memory footprint.
+    budget : int, optional
+        Total cost allowed outstanding; 0 means no limit.
+    window : int, optional
+        Number of items allowed outstanding; 0 means no limit.
+
+    Yields
+    ------
+    R
+        ``func(item)`` for each item, in the order of ``items``.
+    """
+    if costs is None or budget <= 0:
+        costs, budget = [0] * len(items), 0
+    admission = MemoryBudget(budget)
+    pending: Deque[Tuple[Future[R], int]] = deque()
+    try:
+        index = 0
+        while pending or index < len(items):
+            while (
+                index < len(items)
+                and (not window or len(pending) < window)
+                and admission.admits(costs[index])
+            ):
+                admission.acquire(costs[index])
+                pending.append((pool.submit(func, items[index]), costs[index]))
+                index += 1
+            future, cost = pending.popleft()
+            result = future.result()
+            admission.release(cost)
+            yield result
+    finally:
+        for future, _ in pending:
+            future.cancel()
+
+
+__all__ = ["bounded_map", "ordered_map", "resolve_workers"]
@@ -14,19 +14,69 @@ from __future__ import annotations
 
 from . import logging as log_utils
 import sys
+from contextlib import ExitStack
+from dataclasses import replace
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from typing import Final, NamedTuple, Sequence
+from time import perf_counter
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Final,
+    Iterable,
+    NamedTuple,
+    Sequence,
+    TextIO,
+    Tuple,
+)
 
-from PyPDF2 import PdfMerger, PdfReader
+from PyPDF2 import PdfReader
 
+from .autotune import worth_parallel
+from .catalog import PDF_PATTERN, Catalog, InputStatus, discover_pdfs, open_input
+from .crypto import KeyCache, PasswordMap, is_encrypted, unlock_reader
 from .exceptions import NoPDFsFoundError, PDFusionError, PDFusionMergeError
+from .inspection import (
+    DEFAULT_TOP,
+    STATS_CACHE_NAME,
+    StatsCache,
+    format_table,
+    inspect_pdfs,
+)
+from .images import IMAGE_ENCODINGS
+from .index import extract_pages, index_path, write_index
+from .isolation import screen_files
+from .cache import CACHE_ENV, OutputCache, cache_key, default_cache_dir
+from .checkpoint import (
+    document_id_for,
+    find_checkpoint,
+    fingerprint_inputs,
+    merge_in_parts,
+)
+from .merger import PdfusionMerger
+from .metrics import MergeMetrics
+from .reduce import merge_tree
+from .scheduler import parse_size
+from .sources import InputSource, source_from_url
+from .options import (
+    DEFAULT_CACHE_BYTES,
+    DEFAULT_CHECKPOINT_EVERY,
+    DEFAULT_DIGEST,
+    DEFAULT_IMAGE_QUALITY,
+    DEFAULT_PAGE_TREE_FANOUT,
+    DEFAULT_PREFETCH_BYTES,
+    MergeOptions,
+)
+from .writer import CountingStream, atomic_output
 
 # Type aliases
 PathLike = str | Path
+PdfSource = bytes | BinaryIO
 
 # Constants
-DEFAULT_GLOB_PATTERN: Final[str] = "*.pdf"
+DEFAULT_GLOB_PATTERN: Final[str] = PDF_PATTERN
 TIMESTAMP_FORMAT: Final[str] = "%Y%m%d_%H%M%S"
 DEFAULT_FILE_PREFIX: Final[str] = "merged_pdf_"
 
@@ -46,13 +96,81 @@ class MergeResult(NamedTuple):
         The number of PDF files merged.
     total_pages : int
         The total number of pages in the merged PDF.
+    bytes_written : int
+        The size of the merged PDF in bytes.
+    digest : str, optional
+        Hex checksum of the merged PDF, computed while it was written, using
+        the algorithm from ``MergeOptions.digest``.
+    objects_dropped : int
+        Number of unreferenced objects left out of the output.
+    bytes_dropped : int
+        Serialized size of the unreferenced objects left out.
+    image_bytes_before : int
+        Encoded size of the images downsampled for ``MergeOptions.image_dpi``.
+    image_bytes_after : int
+        Encoded size of those images after downsampling.
+    duplicate_pages : int
+        Pages left out for ``MergeOptions.drop_duplicate_pages``.
+    input_pages : Tuple[int, ...]
+        Number of pages each merged input contributed, in order.
+    quarantined : Tuple[str, ...]
+        Names of the input files left out because parsing them overran
+        ``MergeOptions.parse_timeout`` or ``parse_memory``.
     """
     output_path: Path
     files_merged: int
     total_pages: int
+    bytes_written: int = 0
+    digest: str | None = None
+    objects_dropped: int = 0
+    bytes_dropped: int = 0
+    image_bytes_before: int = 0
+    image_bytes_after: int = 0
+    duplicate_pages: int = 0
+    input_pages: Tuple[int, ...] = ()
+    quarantined: Tuple[str, ...] = ()
 
 
-def setup_logging(verbose: bool = False) -> None:
+class StreamMergeResult(NamedTuple):
+    """
+    Result of an in-memory PDF merge operation.
+
+    Attributes
+    ----------
+    output : BinaryIO
+        The stream the merged PDF was written to.
+    files_merged : int
+        The number of PDF inputs merged.
+    total_pages : int
+        The total number of pages in the merged PDF.
+    bytes_written : int
+        The size of the merged PDF in bytes.
+    digest : str, optional
+        Hex checksum of the merged PDF, computed while it was written.
+    objects_dropped : int
+        Number of unreferenced objects left out of the output.
+    bytes_dropped : int
+        Serialized size of the unreferenced objects left out.
+    image_bytes_before : int
+        Encoded size of the images downsampled for ``MergeOptions.image_dpi``.
+    image_bytes_after : int
+        Encoded size of those images after downsampling.
+    duplicate_pages : int
+        Pages left out for ``MergeOptions.drop_duplicate_pages``.
+    """
+    output: BinaryIO
+    files_merged: int
+    total_pages: int
+    bytes_written: int
+    digest: str | None = None
+    objects_dropped: int = 0
+    bytes_dropped: int = 0
+    image_bytes_before: int = 0
+    image_bytes_after: int = 0
+    duplicate_pages: int = 0
+
+
+def setup_logging(verbose: bool = False, stream: TextIO | None = None) -> None:
     """
     Configure logging for the application.
 
@@ -60,27 +178,35 @@ def setup_logging(verbose: bool = False) -> None:
     ----------
     verbose : bool, optional
         Whether to enable debug logging (default is False).
+    stream : TextIO, optional
+        Stream for log messages. Defaults to stdout.
 
     Returns
     -------
     None
     """
-    log_utils.setup_logging(verbose=verbose)
+    config = log_utils.LogConfig(stream=stream) if stream is not None else None
+    log_utils.setup_logging(verbose=verbose, config=config)
 
 
-def get_pdf_files(directory: PathLike) -> Sequence[Path]:
+def get_pdf_files(directory: PathLike | InputSource) -> Sequence[Path]:
     """
     Get all PDF files from the specified directory.
 
+    See ``discover_pdfs`` for a catalog that also records each file's size
+    and modification time.
+
     Parameters
     ----------
-    directory : PathLike
-        Path to the directory containing PDF files.
+    directory : PathLike | InputSource
+        Path to the directory containing PDF files, or an input source.
 
     Returns
     -------
     Sequence[Path]
-        A sequence of paths to PDF files, sorted alphabetically.
+        A sequence of paths to PDF files, sorted alphabetically. The files
+        of an archive or source are listed as a ``Catalog``, whose entries
+        are opened with ``open_input``.
 
     Raises
     ------
@@ -89,42 +215,138 @@ def get_pdf_files(directory: PathLike) -> Sequence[Path]:
     PDFusionError
         If there's an error accessing the directory.
     """
-    dir_path = Path(directory)
+    catalog = discover_pdfs(directory)
+    return catalog if catalog.archive or catalog.source else catalog.paths
 
-    try:
-        if not dir_path.is_dir():
-            raise PDFusionError(f"Not a directory: {directory}")
 
-        pdf_files = sorted(
-            dir_path.glob(DEFAULT_GLOB_PATTERN), key=lambda x: x.name.lower()
+def _log_collection(merger: PdfusionMerger) -> Tuple[int, int]:
+    """
+    Report the unreferenced-object pass of a finished write.
+
+    Parameters
+    ----------
+    merger : PdfusionMerger
+        The merger that has just written its output.
+
+    Returns
+    -------
+    Tuple[int, int]
+        Number of objects and bytes dropped from the output.
+    """
+    collection = merger.output.collection
+    if collection is None:
+        return 0, 0
+    if collection.objects_dropped:
+        logger.debug(
+            f"Dropped {collection.objects_dropped} unreferenced objects "
+            f"({collection.bytes_dropped} bytes)"
         )
-        pdf_list = list(pdf_files)
+    return collection.objects_dropped, collection.bytes_dropped
 
-        if not pdf_list:
-            raise NoPDFsFoundError(str(dir_path))
 
-        return pdf_list
+def _has_encrypted(catalog: Catalog) -> bool:
+    """
+    Check whether any input of a merge is encrypted.
 
-    except Exception as e:
-        if isinstance(e, (NoPDFsFoundError, PDFusionError)):
-            raise
-        raise PDFusionError(f"Error accessing directory {directory}: {e}")
+    Parameters
+    ----------
+    catalog : Catalog
+        The inputs. What validation recorded about an input is used instead
+        of reading it.
+
+    Returns
+    -------
+    bool
+        True if an input is, or may be, encrypted.
+    """
+    for item in catalog:
+        if item.status == InputStatus.ENCRYPTED:
+            return True
+        if item.status != InputStatus.UNKNOWN:
+            continue
+        try:
+            with open_input(item) as stream:
+                if is_encrypted(stream):
+                    return True
+        except OSError:
+            # Unreadable inputs fail the merge itself, with its own error
+            return True
+    return False
+
+
+def _unlocked(
+    source: PdfSource, name: str, passwords: PasswordMap | None, cache: KeyCache
+) -> PdfSource | PdfReader:
+    """
+    Unlock an encrypted in-memory input for merging.
+
+    Parameters
+    ----------
+    source : bytes | BinaryIO
+        The input to check.
+    name : str
+        Name of the input, used to look up its passwords.
+    passwords : PasswordMap, optional
+        Passwords to try besides the empty user password.
+    cache : KeyCache
+        Key cache shared by the inputs of one merge.
+
+    Returns
+    -------
+    bytes | BinaryIO | PdfReader
+        ``source`` itself if it is not encrypted, otherwise a decrypted reader
+        over it.
+    """
+    stream = BytesIO(source) if isinstance(source, bytes) else source
+    if not stream.seekable() or not is_encrypted(stream):
+        return source
+    reader = PdfReader(stream)
+    unlock_reader(reader, name, passwords, cache)
+    return reader
+
+
+def _cached_fields(result: MergeResult) -> Dict[str, Any]:
+    # Everything but the output path, which differs between hits
+    return dict(zip(result._fields[1:], result[1:]))
+
+
+def _cached_result(output_path: Path, fields: Dict[str, Any]) -> MergeResult:
+    # JSON turned the tuples of page counts and quarantined names into lists
+    input_pages = tuple(fields.pop("input_pages", ()))
+    quarantined = tuple(fields.pop("quarantined", ()))
+    return MergeResult(
+        output_path, **fields, input_pages=input_pages, quarantined=quarantined
+    )
 
 
 def merge_pdfs(
-    input_dir: PathLike, output_filename: str | None = None, *, verbose: bool = False
+    input_dir: PathLike | Catalog | InputSource,
+    output_filename: str | None = None,
+    *,
+    verbose: bool = False,
+    options: MergeOptions | None = None,
+    resume: bool = False,
 ) -> MergeResult:
     """
     Merge all PDF files in the specified directory into a single PDF file.
 
     Parameters
     ----------
-    input_dir : PathLike
-        Path to the directory containing PDF files.
+    input_dir : PathLike | Catalog | InputSource
+        Path to the directory containing PDF files, or a catalog of the files
+        to merge, such as one already passed to ``inspect_pdfs``, or an input
+        source such as an object store, whose output is written to the
+        current directory.
     output_filename : str, optional
         Name for the output file. If not provided, a timestamp-based name will be used.
     verbose : bool, optional
         Whether to print detailed progress information (default is False).
+    options : MergeOptions, optional
+        Tuning options. If not provided, default options will be used.
+    resume : bool, optional
+        Whether to continue an interrupted checkpointed merge of the same
+        inputs into the same output (default is False). Without an
+        ``output_filename``, the most recent checkpoint is resumed.
 
     Returns
     -------
@@ -139,17 +361,30 @@ def merge_pdfs(
         If no PDF files are found in the directory.
     PDFusionMergeError
         If an error occurs during the merging process.
+    PDFusionPasswordError
+        If no configured password unlocks an encrypted input.
     """
     setup_logging(verbose)
-    merger = PdfMerger()
-    total_pages = 0
+    opts = options or MergeOptions()
+    merger = PdfusionMerger(opts)
+    inputs = ExitStack()
+    metrics = opts.metrics
+    if metrics is not None:
+        metrics.in_progress.inc()
 
     try:
         # Get list of PDF files
-        input_path = Path(input_dir)
-        pdf_files = get_pdf_files(input_path)
+        if isinstance(input_dir, Catalog):
+            pdf_files = input_dir
+        else:
+            pdf_files = discover_pdfs(input_dir)
+        input_path = pdf_files.directory
 
         # Create output filename if not provided
+        if output_filename is None and resume:
+            output_filename = find_checkpoint(
+                input_path, f"{DEFAULT_FILE_PREFIX}*.pdf"
+            )
         if output_filename is None:
             timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
             output_filename = f"{DEFAULT_FILE_PREFIX}{timestamp}.pdf"
@@ -157,46 +392,493 @@ def merge_pdfs(
             output_filename += ".pdf"
 
         output_path = input_path / output_filename
+        # An earlier output written among the inputs, and its page index,
+        # would otherwise be merged back in by the next run
+        if pdf_files.archive is None and pdf_files.source is None:
+            if output_path.parent.resolve() == input_path.resolve():
+                pdf_files = pdf_files.without(
+                    {output_path.name, index_path(output_path).name}
+                )
+                if not pdf_files:
+                    raise NoPDFsFoundError(str(input_path))
 
-        # Merge PDFs
-        for pdf_file in pdf_files:
-            try:
-                if verbose:
-                    logger.debug(f"Processing: {pdf_file.name}")
-                merger.append(str(pdf_file))
-                with open(pdf_file, "rb") as f:
-                    # Count pages in the PDF
-                    total_pages += len(PdfReader(f).pages)
-            except Exception as e:
-                raise PDFusionMergeError(filename=str(pdf_file), original_error=e)
+        if resume and not opts.checkpoint_every:
+            opts = replace(opts, checkpoint_every=DEFAULT_CHECKPOINT_EVERY)
+
+        # The same inputs always produce the same output bytes, so an earlier
+        # output of them can stand in for merging again. The key holds no
+        # passwords, so decrypted merges of encrypted inputs are neither
+        # served nor kept: only merging checks that the caller can unlock them
+        fingerprint = fingerprint_inputs(pdf_files)
+        cache = key = None
+        if opts.cache_dir is not None and not _has_encrypted(pdf_files):
+            cache = OutputCache(opts.cache_dir, opts.cache_bytes)
+            key = cache_key(input_path, fingerprint, opts)
+            cached = cache.fetch(key, output_path)
+            # Entries from before page counts were recorded cannot be indexed
+            if opts.page_index and cached and "input_pages" not in cached:
+                cached = None
+            if cached is not None:
+                logger.info(
+                    f"Reused cached merge of {cached['files_merged']} PDF files "
+                    f"({cached['total_pages']} pages) into: {output_filename}"
+                )
+                if metrics is not None:
+                    metrics.cache_hits.inc()
+                    metrics.record_success(
+                        cached["files_merged"],
+                        cached["total_pages"],
+                        cached["bytes_written"],
+                    )
+                result = _cached_result(output_path, cached)
+                if opts.page_index:
+                    merged = [
+                        item for item in pdf_files
+                        if item.name not in result.quarantined
+                    ]
+                    write_index(output_path, merged, result.input_pages)
+                return result
+
+        # Inputs whose parse overruns a limit are left out, not waited on
+        quarantined: Tuple[str, ...] = ()
+        if opts.parse_timeout or opts.parse_memory:
+            screening = screen_files(
+                pdf_files,
+                timeout=opts.parse_timeout,
+                memory=opts.parse_memory,
+                workers=opts.workers,
+            )
+            if screening.quarantined:
+                if metrics is not None:
+                    metrics.quarantined.inc(len(screening.quarantined))
+                if not screening.passed:
+                    raise screening.quarantined[0]
+                pdf_files = screening.passed
+                quarantined = tuple(
+                    Path(error.filename).name for error in screening.quarantined
+                )
+
+        tree = 0 < opts.reduce_fanout < len(pdf_files) or (
+            opts.autotune
+            and worth_parallel(len(pdf_files), sum(item.size for item in pdf_files))
+        )
+        if opts.checkpoint_every or tree:
+            if opts.checkpoint_every:
+                parts = merge_in_parts(
+                    pdf_files, output_path, opts, resume=resume, verbose=verbose
+                )
+            else:
+                parts = merge_tree(
+                    pdf_files,
+                    output_path,
+                    opts,
+                    document_id=document_id_for(fingerprint),
+                    verbose=verbose,
+                )
+            logger.info(
+                f"Successfully merged {len(pdf_files)} PDF files "
+                f"({parts.total_pages} pages) into: {output_filename}"
+            )
+            if metrics is not None:
+                metrics.record_success(
+                    len(pdf_files), parts.total_pages, parts.bytes_written
+                )
+            result = MergeResult(
+                output_path, len(pdf_files), *parts, quarantined=quarantined
+            )
+            if cache is not None:
+                cache.store(key, output_path, _cached_fields(result))
+            if opts.page_index:
+                write_index(output_path, pdf_files, result.input_pages)
+            return result
+
+        # Merge PDFs, parsing each input once from its open file
+        merger.output.document_id = document_id_for(fingerprint)
+        merger.append_files(pdf_files, inputs, verbose=verbose)
+        images = merger.finish_images()
 
-        # Write the merged PDF
-        merger.write(str(output_path))
+        # Write the merged PDF atomically, checksumming it on the fly
+        total_pages = len(merger.pages)
+        started = perf_counter()
+        with atomic_output(
+            output_path,
+            digest=opts.digest,
+            fsync=opts.fsync,
+            buffer_size=opts.buffer_size,
+        ) as stream:
+            merger.write(stream)
         num_files = len(pdf_files)
+        if metrics is not None:
+            metrics.write_seconds.observe(perf_counter() - started)
+            metrics.record_success(num_files, total_pages, stream.bytes_written)
+        dropped = _log_collection(merger)
         logger.info(
             f"Successfully merged {num_files} PDF files "
             f"({total_pages} pages) into: {output_filename}"
         )
+        if opts.digest:
+            logger.debug(f"{opts.digest}: {stream.hexdigest()}")
+
+        result = MergeResult(
+            output_path,
+            num_files,
+            total_pages,
+            stream.bytes_written,
+            stream.hexdigest(),
+            *dropped,
+            images.bytes_before,
+            images.bytes_after,
+            merger.duplicate_pages,
+            tuple(merger.input_pages),
+            quarantined=quarantined,
+        )
+        if cache is not None:
+            cache.store(key, output_path, _cached_fields(result))
+        if opts.page_index:
+            write_index(output_path, pdf_files, result.input_pages)
+        return result
+
+    except Exception as e:
+        if metrics is not None:
+            metrics.record_failure(e)
+        if isinstance(e, PDFusionError):
+            raise
+        raise PDFusionError(f"Unexpected error: {e}")
+
+    finally:
+        if metrics is not None:
+            metrics.in_progress.inc(-1)
+        merger.close()
+        inputs.close()
+
+
+def merge_streams(
+    inputs: Iterable[PdfSource],
+    output: BinaryIO | None = None,
+    *,
+    verbose: bool = False,
+    options: MergeOptions | None = None,
+) -> StreamMergeResult:
+    """
+    Merge in-memory PDFs and write the result to a stream.
+
+    Inputs are parsed in place: ``bytes`` are wrapped without copying and
+    seekable streams are read directly, so no data goes through the disk.
+
+    Parameters
+    ----------
+    inputs : Iterable[bytes | BinaryIO]
+        PDF documents as bytes or readable binary streams, in merge order.
+        Streams are left open.
+    output : BinaryIO, optional
+        Writable binary stream for the merged PDF, such as
+        ``sys.stdout.buffer``. If not provided, a new ``BytesIO`` is used;
+        read it without copying through ``getbuffer()``.
+    verbose : bool, optional
+        Whether to print detailed progress information (default is False).
+    options : MergeOptions, optional
+        Tuning options. If not provided, default options will be used.
+
+    Returns
+    -------
+    StreamMergeResult
+        A named tuple containing the output stream and merge statistics.
+
+    Raises
+    ------
+    PDFusionError
+        Base class for all PDFusion-related errors.
+    NoPDFsFoundError
+        If ``inputs`` is empty.
+    PDFusionMergeError
+        If an error occurs during the merging process.
+    PDFusionPasswordError
+        If no configured password unlocks an encrypted input.
+    """
+    # Keep log lines out of the PDF when writing to stdout
+    to_stdout = output is not None and output is getattr(sys.stdout, "buffer", None)
+    setup_logging(verbose, sys.stderr if to_stdout else None)
+    opts = options or MergeOptions()
+    merger = PdfusionMerger(opts)
+    target = output if output is not None else BytesIO()
+    keys = KeyCache()
+    metrics = opts.metrics
+    if metrics is not None:
+        metrics.in_progress.inc()
+
+    try:
+        num_files = 0
+        for index, source in enumerate(inputs):
+            name = getattr(source, "name", f"<input {index}>")
+            try:
+                if verbose:
+                    logger.debug(f"Processing: {name}")
+                merger.append_source(
+                    _unlocked(source, str(name), opts.passwords, keys),
+                    title=Path(str(name)).stem if opts.bookmarks else None,
+                )
+            except PDFusionError:
+                raise
+            except Exception as e:
+                raise PDFusionMergeError(filename=str(name), original_error=e)
+            num_files += 1
+
+        if not num_files:
+            raise NoPDFsFoundError("<streams>", "No PDF inputs given")
+
+        images = merger.finish_images()
+        total_pages = len(merger.pages)
+        started = perf_counter()
+        stream = CountingStream(
+            target, digest=opts.digest, buffer_size=opts.buffer_size
+        )
+        merger.write(stream)
+        stream.flush()
+        if metrics is not None:
+            metrics.write_seconds.observe(perf_counter() - started)
+            metrics.record_success(num_files, total_pages, stream.bytes_written)
+        dropped = _log_collection(merger)
+        logger.info(
+            f"Successfully merged {num_files} PDF inputs "
+            f"({total_pages} pages) into output stream"
+        )
 
-        return MergeResult(output_path, num_files, total_pages)
+        return StreamMergeResult(
+            target,
+            num_files,
+            total_pages,
+            stream.bytes_written,
+            stream.hexdigest(),
+            *dropped,
+            images.bytes_before,
+            images.bytes_after,
+            merger.duplicate_pages,
+        )
 
     except Exception as e:
+        if metrics is not None:
+            metrics.record_failure(e)
         if isinstance(e, PDFusionError):
             raise
         raise PDFusionError(f"Unexpected error: {e}")
 
     finally:
+        if metrics is not None:
+            metrics.in_progress.inc(-1)
         merger.close()
 
 
+def _size_arg(text: str) -> int:
+    """
+    Parse a byte size given on the command line.
+
+    Parameters
+    ----------
+    text : str
+        The size, such as ``"4G"``.
+
+    Returns
+    -------
+    int
+        The size in bytes.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If ``text`` is not a size.
+    """
+    import argparse
+
+    try:
+        return parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _input_arg(text: str) -> Path | InputSource:
+    """
+    Parse the inputs given on the command line.
+
+    Parameters
+    ----------
+    text : str
+        A directory or archive, or the URL of an input source, such as
+        ``"https://host/bucket/prefix"``.
+
+    Returns
+    -------
+    Path | InputSource
+        The path, or the source the URL names.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If ``text`` is a URL of an unsupported kind.
+    """
+    import argparse
+
+    if "://" not in text:
+        return Path(text)
+    try:
+        return source_from_url(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _inspect_main(argv: Sequence[str]) -> None:
+    """
+    Command-line interface for ``pdfusion inspect``.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The arguments after ``inspect``.
+
+    Returns
+    -------
+    None
+    """
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(
+        prog="pdfusion inspect",
+        description="Report statistics of the PDF files in a directory without merging",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "input_dir",
+        type=_input_arg,
+        help=(
+            "Directory, ZIP or tar archive, or object store URL, containing "
+            "PDF files to inspect"
+        ),
+    )
+    parser.add_argument(
+        "--json", help="Print the report as JSON", action="store_true"
+    )
+    parser.add_argument(
+        "--top", help="Number of largest files to list", type=int, default=DEFAULT_TOP
+    )
+    parser.add_argument(
+        "--workers",
+        help="Worker processes for reading files (0 for one per CPU)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Do not read or update the statistics cache",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Print detailed progress information",
+        action="store_true",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose, sys.stderr)
+    try:
+        cache = (
+            None if args.no_cache else StatsCache(default_cache_dir() / STATS_CACHE_NAME)
+        )
+        result = inspect_pdfs(args.input_dir, workers=args.workers, cache=cache)
+        if cache is not None:
+            cache.save()
+        if args.json:
+            print(json.dumps(result.to_dict(args.top), indent=2))
+        else:
+            print(format_table(result, args.top))
+        sys.exit(0)
+
+    except PDFusionError as e:
+        logger.error(f"Error: {str(e)}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.error("\nOperation cancelled by user")
+        sys.exit(1)
+
+
+def _extract_main(argv: Sequence[str]) -> None:
+    """
+    Command-line interface for ``pdfusion extract``.
+
+    Parameters
+    ----------
+    argv : Sequence[str]
+        The arguments after ``extract``.
+
+    Returns
+    -------
+    None
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="pdfusion extract",
+        description=(
+            "Copy the pages of some inputs out of a merged PDF written with "
+            "--page-index, without parsing the whole file"
+        ),
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "merged", help="The merged PDF file, or its URL in an object store"
+    )
+    parser.add_argument(
+        "names", nargs="+", help="File names of the inputs whose pages to extract"
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="The PDF file to write"
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        help="Print detailed progress information",
+        action="store_true",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose, sys.stderr)
+    try:
+        if "://" in args.merged:
+            # Read in ranges from the store, next to the output's index
+            folder, _, name = args.merged.rpartition("/")
+            source = source_from_url(folder)
+            extract_pages(name, args.names, args.output, source=source)
+        else:
+            extract_pages(args.merged, args.names, args.output)
+        sys.exit(0)
+
+    except PDFusionError as e:
+        logger.error(f"Error: {str(e)}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.error("\nOperation cancelled by user")
+        sys.exit(1)
+
+
 def main() -> None:
     """
     Command-line interface for PDFusion.
 
+    ``pdfusion inspect DIR`` reports statistics of the inputs instead of
+    merging them, and ``pdfusion extract MERGED NAME...`` copies the pages of
+    some inputs out of an indexed merged output.
+
     Returns
     -------
     None
     """
+    if sys.argv[1:2] == ["inspect"]:
+        _inspect_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["extract"]:
+        _extract_main(sys.argv[2:])
+        return
+
     import argparse
 
     parser = argparse.ArgumentParser(
@@ -205,10 +887,18 @@ def main() -> None:
     )
 
     parser.add_argument(
-        "input_dir", type=Path, help="Directory containing PDF files to merge"
+        "input_dir",
+        type=_input_arg,
+        help=(
+            "Directory, ZIP or tar archive, or object store URL, containing "
+            "PDF files to merge"
+        ),
     )
     parser.add_argument(
-        "-o", "--output", help="Output filename (optional)", default=None
+        "-o",
+        "--output",
+        help="Output filename (optional); use '-' to write the PDF to stdout",
+        default=None,
     )
     parser.add_argument(
         "-v",
@@ -216,11 +906,286 @@ def main() -> None:
         help="Print detailed progress information",
         action="store_true",
     )
+    parser.add_argument(
+        "--checksum",
+        help="Hash algorithm for the output checksum ('none' to disable)",
+        default=DEFAULT_DIGEST,
+    )
+    parser.add_argument(
+        "--fsync",
+        help="Flush the output to stable storage before exiting",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--keep-unreferenced",
+        help="Write objects that are unreachable from the output catalog",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--page-tree-fanout",
+        help="Maximum kids per node of the output page tree (0 for a flat tree)",
+        type=int,
+        default=DEFAULT_PAGE_TREE_FANOUT,
+    )
+
+    parser.add_argument(
+        "--password-file",
+        help=(
+            "Passwords for encrypted inputs: a JSON map of file name to "
+            "password(s), a JSON list, or one password per line"
+        ),
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        help="Worker processes for decrypting inputs (0 for one per CPU)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--memory-budget",
+        help=(
+            "Memory that inputs being decrypted in parallel may take at once, "
+            "such as 512M or 4G (0 for no limit)"
+        ),
+        type=_size_arg,
+        default="0",
+        metavar="SIZE",
+    )
+
+    parser.add_argument(
+        "--prefetch",
+        help=(
+            "Input files to read ahead in background threads while earlier "
+            "ones are parsed, for slow or network storage (0 disables)"
+        ),
+        type=int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--prefetch-bytes",
+        help="Memory that files read ahead may take, such as 64M",
+        type=_size_arg,
+        default=str(DEFAULT_PREFETCH_BYTES),
+        metavar="SIZE",
+    )
+
+    parser.add_argument(
+        "--checkpoint-every",
+        help=(
+            "Write a checkpoint after every N input files so an interrupted "
+            "merge can be resumed (0 disables checkpoints)"
+        ),
+        type=int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--resume",
+        help="Continue an interrupted merge from its last checkpoint",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--reduce-fanout",
+        help=(
+            "Merge more than N files as a tree: groups of N files are merged "
+            "in worker processes, then combined level by level (0 merges "
+            "serially)"
+        ),
+        type=int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--autotune",
+        help=(
+            "Merge as a tree, choosing the files per group and the worker "
+            "processes from the inputs' sizes and measured throughput"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--temp-dir",
+        help="Directory for the intermediate parts of a tree merge",
+        type=Path,
+        default=None,
+        metavar="PATH",
+    )
+
+    parser.add_argument(
+        "--parse-timeout",
+        help=(
+            "Seconds parsing one input may take; inputs are first parsed in "
+            "isolated worker processes and those that overrun are left out "
+            "(0 for no limit)"
+        ),
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--parse-memory",
+        help=(
+            "Memory parsing one input may take, such as 512M; inputs that "
+            "overrun it are left out (0 for no limit)"
+        ),
+        type=_size_arg,
+        default="0",
+        metavar="SIZE",
+    )
+
+    parser.add_argument(
+        "--image-dpi",
+        help=(
+            "Downsample page images above this resolution, such as 150, "
+            "while inputs are appended (0 to leave images as they are)"
+        ),
+        type=int,
+        default=0,
+        metavar="DPI",
+    )
+    parser.add_argument(
+        "--image-encoding",
+        help="Encoding of downsampled images; jpeg needs Pillow",
+        choices=IMAGE_ENCODINGS,
+        default="flate",
+    )
+    parser.add_argument(
+        "--image-quality",
+        help="JPEG quality of downsampled images, from 1 to 95",
+        type=int,
+        default=DEFAULT_IMAGE_QUALITY,
+        metavar="QUALITY",
+    )
+    parser.add_argument(
+        "--drop-duplicate-pages",
+        help="Leave out pages identical to a page merged earlier",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--compress-level",
+        help="Flate-compress streams stored without a filter at this zlib level",
+        type=int,
+        choices=range(10),
+        default=0,
+        metavar="LEVEL",
+    )
+    parser.add_argument(
+        "--compress-threads",
+        help="Threads compressing streams (0 for one per CPU)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--page-index",
+        help=(
+            "Write a page index next to the output, for copying an input's "
+            "pages back out with 'pdfusion extract'"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--bookmarks",
+        help=(
+            "Add a bookmark for each input file, holding the input's own "
+            "bookmarks"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--bookmark-fanout",
+        help=(
+            "Group top-level bookmarks into nested levels of at most N "
+            "(0 keeps them flat)"
+        ),
+        type=int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--archive-order",
+        help="Merge the PDFs of an archive in stored order instead of by name",
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Reuse the output of an earlier merge of the same unchanged "
+            f"inputs, kept under ${CACHE_ENV} or the user cache directory"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-size",
+        help="Merged outputs the cache keeps before evicting, such as 1G",
+        type=_size_arg,
+        default=str(DEFAULT_CACHE_BYTES),
+        metavar="SIZE",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help=(
+            "Write merge metrics to this file in the Prometheus text format, "
+            "e.g. for the node_exporter textfile collector"
+        ),
+        type=Path,
+        default=None,
+        metavar="PATH",
+    )
 
     args = parser.parse_args()
+    options = MergeOptions(
+        digest=None if args.checksum.lower() == "none" else args.checksum,
+        fsync=args.fsync,
+        page_tree_fanout=args.page_tree_fanout,
+        collect_garbage=not args.keep_unreferenced,
+        workers=args.workers,
+        memory_budget=args.memory_budget,
+        checkpoint_every=args.checkpoint_every,
+        prefetch_depth=args.prefetch,
+        prefetch_bytes=args.prefetch_bytes,
+        metrics=None if args.metrics_file is None else MergeMetrics(),
+        cache_dir=default_cache_dir() if args.cache else None,
+        cache_bytes=args.cache_size,
+        reduce_fanout=args.reduce_fanout,
+        temp_dir=args.temp_dir,
+        parse_timeout=args.parse_timeout,
+        parse_memory=args.parse_memory,
+        image_dpi=args.image_dpi,
+        image_encoding=args.image_encoding,
+        image_quality=args.image_quality,
+        drop_duplicate_pages=args.drop_duplicate_pages,
+        page_index=args.page_index,
+        compress_level=args.compress_level,
+        compress_threads=args.compress_threads,
+        autotune=args.autotune,
+        bookmarks=args.bookmarks,
+        bookmark_fanout=args.bookmark_fanout,
+    )
 
     try:
-        result = merge_pdfs(args.input_dir, args.output, verbose=args.verbose)
+        passwords = PasswordMap.from_env()
+        if args.password_file is not None:
+            passwords.update(PasswordMap.from_file(args.password_file))
+        options.passwords = passwords
+        inputs = discover_pdfs(args.input_dir, archive_order=args.archive_order)
+        if args.output == "-":
+            with ExitStack() as stack:
+                streams = [stack.enter_context(open_input(item)) for item in inputs]
+                merge_streams(
+                    streams, sys.stdout.buffer, verbose=args.verbose, options=options
+                )
+        else:
+            merge_pdfs(
+                inputs,
+                args.output,
+                verbose=args.verbose,
+                options=options,
+                resume=args.resume,
+            )
         sys.exit(0)
 
     except NoPDFsFoundError as e:
@@ -235,6 +1200,12 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        if options.metrics is not None:
+            try:
+                options.metrics.registry.write_textfile(args.metrics_file)
+            except OSError as e:
+                logger.error(f"Could not write metrics: {e}")
 
 
 if __name__ == "__main__":
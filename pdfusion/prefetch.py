@@ -0,0 +1,127 @@
+"""
+Read-ahead of input files for the PDFusion package.
+
+This module reads upcoming inputs into memory in background threads, so that
+waiting on storage overlaps with parsing the inputs already read.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator, NamedTuple, Sequence
+
+from .catalog import open_input
+from .crypto import is_encrypted
+from .parallel import bounded_map
+
+
+class Probe(NamedTuple):
+    """
+    What a merge needs to know about an input before reading all of it.
+
+    Attributes
+    ----------
+    encrypted : bool
+        Whether the file looks encrypted.
+    size : int
+        Size of the file in bytes.
+    """
+    encrypted: bool
+    size: int
+
+
+def probe_file(path: str | Path) -> Probe:
+    """
+    Check whether a file is encrypted and how large it is.
+
+    Parameters
+    ----------
+    path : str | Path
+        The file to probe.
+
+    Returns
+    -------
+    Probe
+        The file's encryption flag and size.
+    """
+    with open_input(path) as f:
+        return Probe(is_encrypted(f), f.seek(0, os.SEEK_END))
+
+
+def read_file(path: str | Path) -> BytesIO:
+    """
+    Read a whole file into an in-memory stream.
+
+    Parameters
+    ----------
+    path : str | Path
+        The file to read.
+
+    Returns
+    -------
+    BytesIO
+        A stream over the file's bytes.
+    """
+    with open_input(path) as f:
+        return BytesIO(f.read())
+
+
+def probe_files(paths: Sequence[Path], *, depth: int) -> Iterator[Probe]:
+    """
+    Probe files concurrently, so storage latency is paid ``depth`` at a time.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        The files to probe.
+    depth : int
+        Number of files probed at once.
+
+    Yields
+    ------
+    Probe
+        The probe of each file, in the order of ``paths``.
+    """
+    with ThreadPoolExecutor(depth, thread_name_prefix="pdfusion-probe") as pool:
+        yield from bounded_map(pool, probe_file, paths, window=depth)
+
+
+def prefetch_files(
+    paths: Sequence[Path], sizes: Sequence[int], *, depth: int, max_bytes: int
+) -> Iterator[BytesIO]:
+    """
+    Read files ahead of their use in background threads.
+
+    Up to ``depth`` files are read or waiting to be taken at any time, and
+    their sizes together stay within ``max_bytes``. A file larger than
+    ``max_bytes`` is read once the files before it have been taken.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        The files to read.
+    sizes : Sequence[int]
+        Size of each file in bytes.
+    depth : int
+        Number of files to read ahead.
+    max_bytes : int
+        Bytes that files read ahead may take; 0 means no limit.
+
+    Yields
+    ------
+    BytesIO
+        A stream over each file's bytes, in the order of ``paths``.
+    """
+    with ThreadPoolExecutor(depth, thread_name_prefix="pdfusion-prefetch") as pool:
+        yield from bounded_map(
+            pool, read_file, paths, costs=sizes, budget=max_bytes, window=depth
+        )
+
+
+__all__ = ["Probe", "prefetch_files", "probe_file", "probe_files", "read_file"]
@@ -0,0 +1,117 @@
+"""
+Unreferenced-object collection for the PDFusion package.
+
+This module marks every object reachable from a writer's trailer (catalog,
+document info and encryption dictionary) and drops the rest before the output
+is serialized, so orphaned objects carried over from the inputs are never
+written.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+from typing import List, NamedTuple, Set
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, PdfObject
+
+
+class CollectionStats(NamedTuple):
+    """
+    Result of an unreferenced-object collection pass.
+
+    Attributes
+    ----------
+    objects_kept : int
+        Number of objects reachable from the trailer.
+    objects_dropped : int
+        Number of unreachable objects removed.
+    bytes_dropped : int
+        Serialized size of the removed objects.
+    """
+    objects_kept: int
+    objects_dropped: int
+    bytes_dropped: int
+
+
+class _NullSink:
+    """Byte-counting sink used to size dropped objects."""
+
+    def __init__(self) -> None:
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+
+def reachable_objects(writer: PdfWriter) -> Set[int]:
+    """
+    Find the object numbers reachable from a writer's trailer.
+
+    Parameters
+    ----------
+    writer : PdfWriter
+        The writer to scan. Indirect references to other documents are
+        expected to have been resolved already.
+
+    Returns
+    -------
+    Set[int]
+        The reachable object numbers.
+    """
+    roots: List[PdfObject] = [writer._root, writer._info]
+    if hasattr(writer, "_encrypt"):
+        roots.append(writer._encrypt)
+
+    marked: Set[int] = set()
+    stack = roots
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if obj.pdf is not writer or obj.idnum in marked:
+                continue
+            marked.add(obj.idnum)
+            obj = writer._objects[obj.idnum - 1]
+        if isinstance(obj, DictionaryObject):
+            stack.extend(obj.values())
+        elif isinstance(obj, ArrayObject):
+            stack.extend(obj)
+    return marked
+
+
+def collect_garbage(writer: PdfWriter) -> CollectionStats:
+    """
+    Drop every object not reachable from the writer's trailer.
+
+    Dropped slots are set to ``None`` so object numbers stay stable; the
+    writer emits them as free cross-reference entries.
+
+    Parameters
+    ----------
+    writer : PdfWriter
+        The writer to collect, after its indirect references were swept.
+
+    Returns
+    -------
+    CollectionStats
+        Counts of kept and dropped objects and the bytes saved.
+    """
+    marked = reachable_objects(writer)
+    sink = _NullSink()
+    dropped = 0
+    for index, obj in enumerate(writer._objects):
+        if obj is None or index + 1 in marked:
+            continue
+        obj.write_to_stream(sink, None)
+        writer._objects[index] = None
+        dropped += 1
+    return CollectionStats(len(marked), dropped, sink.size)
+
+
+__all__ = ["CollectionStats", "collect_garbage", "reachable_objects"]
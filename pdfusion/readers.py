@@ -0,0 +1,206 @@
+"""
+Parsed-reader cache for the PDFusion package.
+
+A long-running process often merges the same boilerplate documents, such as
+a cover page or terms and conditions, into every output. This module keeps
+parsed readers of such inputs in memory, keyed by each file's path, size and
+modification time, so that merging them again only copies their objects.
+Readers are evicted least recently used first once their estimated memory
+exceeds the cache's cap.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Final, NamedTuple, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+from . import logging as log_utils
+from .catalog import as_input, open_input
+from .crypto import is_encrypted
+from .isolation import resolve_objects
+from .scheduler import estimate_footprint
+
+# Constants
+DEFAULT_READER_CACHE_BYTES: Final[int] = 256 * 1024 * 1024
+
+logger = log_utils.get_logger(__name__)
+
+# Resolved path, size and modification time of a file
+_Key = Tuple[str, int, int]
+
+
+class SharedReader(PdfReader):
+    """
+    A reader whose objects were all resolved when it was parsed.
+
+    Merging copies objects out of a reader without changing them, and a
+    fully resolved reader never reads its stream again, so one instance can
+    be merged by several threads at once.
+    """
+
+
+class ReaderCacheStats(NamedTuple):
+    """
+    Counters of a reader cache.
+
+    Attributes
+    ----------
+    hits : int
+        Lookups served from the cache.
+    misses : int
+        Lookups that parsed the file.
+    evictions : int
+        Readers evicted to stay within the cap.
+    entries : int
+        Readers currently cached.
+    nbytes : int
+        Estimated memory of the cached readers.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups served from the cache, 0 before any lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ReaderCache:
+    """
+    Parsed readers kept by file fingerprint, with a memory cap and LRU eviction.
+
+    Lookups and updates take a lock, so one cache can be shared by merges
+    running in several threads. Two threads missing on the same file at once
+    may both parse it; the second reader replaces the first. Encrypted files
+    are never cached.
+
+    The cache is process-local: a copy made for a worker process, such as
+    by pickling ``MergeOptions``, starts out empty.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Estimated memory the cached readers may take. A reader estimated to
+        need more than this on its own is used but not kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_READER_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[_Key, Tuple[SharedReader, int]] = OrderedDict()
+        self._nbytes = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["max_bytes"])  # type: ignore[misc]
+
+    def fetch(self, path: str | Path) -> Optional[SharedReader]:
+        """
+        Get the reader of a file, parsing and caching it on a miss.
+
+        Parameters
+        ----------
+        path : str | Path
+            The file, as a path or catalogued input.
+
+        Returns
+        -------
+        SharedReader, optional
+            The fully resolved reader, or None if the file is encrypted and
+            must be merged the usual way.
+
+        Raises
+        ------
+        OSError
+            If the file cannot be read.
+        PdfReadError
+            If the file cannot be parsed.
+        """
+        item = as_input(path)
+        key = (os.path.abspath(os.fspath(item)), item.size, item.mtime_ns)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        with open_input(item) as f:
+            data = f.read()
+        stream = BytesIO(data)
+        if is_encrypted(stream):
+            return None
+        reader = SharedReader(stream)
+        len(reader.pages)
+        resolve_objects(reader.trailer)
+
+        cost = estimate_footprint(item)
+        if cost > self.max_bytes:
+            logger.debug(f"Not caching {item.name}: estimated {cost:,} bytes")
+            return reader
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (reader, cost)
+            self._nbytes += cost
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+                self._evictions += 1
+        return reader
+
+    def stats(self) -> ReaderCacheStats:
+        """
+        Get the cache's counters.
+
+        Returns
+        -------
+        ReaderCacheStats
+            Hits, misses and evictions so far, and the current contents.
+        """
+        with self._lock:
+            return ReaderCacheStats(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self._nbytes,
+            )
+
+    def clear(self) -> None:
+        """
+        Drop every cached reader, keeping the counters.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+__all__ = [
+    "DEFAULT_READER_CACHE_BYTES",
+    "ReaderCache",
+    "ReaderCacheStats",
+    "SharedReader",
+]
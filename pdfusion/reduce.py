@@ -0,0 +1,427 @@
+"""
+Tree-reduction merges for the PDFusion package.
+
+Very large input sets are split into groups that worker processes merge into
+part files at the same time. Groups of parts are then combined level by
+level, again in parallel, until few enough remain to assemble the output.
+Parts are combined by copying their object bytes verbatim, as for
+checkpointed merges, so no input is parsed more than once.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from time import perf_counter
+from typing import (
+    Any,
+    Deque,
+    Final,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from PyPDF2 import PdfReader
+
+from . import logging as log_utils
+from .autotune import AutoTuner
+from .catalog import as_input, open_input
+from .checkpoint import Checkpoint, PartsResult, assemble, write_chunk
+from .options import MergeOptions
+from .parallel import ordered_map
+from .scheduler import MemoryBudget, estimate_footprint
+from .writer import atomic_output
+
+# Constants
+TRAILER_TAIL: Final[int] = 64 * 1024
+PART_PATTERN: Final[str] = "level{}_{:05d}.pdf"
+SIZE_PATTERN: Final[re.Pattern[bytes]] = re.compile(rb"/Size\s+(\d+)")
+# Parts combined per group when auto-tuning without a reduce_fanout
+AUTO_FANOUT: Final[int] = 64
+# Inputs measured per task before auto-tuned batches are formed
+MEASURE_BATCH: Final[int] = 256
+
+logger = log_utils.get_logger(__name__)
+
+
+def object_bound(path: str | Path) -> int:
+    """
+    Bound the number of objects merging a file adds to the output.
+
+    Every object copied from the file keeps a distinct number below the
+    trailer /Size, which is read from the end of the file without parsing
+    it. Files whose trailer is not near the end are parsed instead.
+
+    Parameters
+    ----------
+    path : str | Path
+        The input file.
+
+    Returns
+    -------
+    int
+        The file's /Size, or 0 if it cannot be read; the merge reports
+        unreadable files.
+    """
+    try:
+        with open_input(path) as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - TRAILER_TAIL))
+            found = SIZE_PATTERN.findall(f.read())
+            if found:
+                return max(int(size) for size in found)
+            reader = PdfReader(f)
+            nums = [num for section in reader.xref.values() for num in section]
+        return max([*nums, *reader.xref_objStm], default=0) + 1
+    except Exception:
+        return 0
+
+
+def _measure(paths: Sequence[Path]) -> Tuple[int, int]:
+    # Object bound and memory footprint of a group of inputs
+    return (
+        sum(object_bound(path) for path in paths),
+        sum(estimate_footprint(path) for path in paths),
+    )
+
+
+def _measure_each(paths: Sequence[Path]) -> List[Tuple[int, int]]:
+    # Object bound and memory footprint of each of a slice of inputs
+    return [(object_bound(path), estimate_footprint(path)) for path in paths]
+
+
+class _Leaf(NamedTuple):
+    directory: Path
+    index: int
+    first_input: int
+    paths: Sequence[Path]
+    object_base: int
+    objects: int
+    options: MergeOptions
+    verbose: bool
+
+
+def _merge_leaf(leaf: _Leaf) -> Optional[Checkpoint]:
+    # Merge a group of inputs into a part, discarding it if it outgrew the
+    # object numbers reserved for it
+    path = leaf.directory / PART_PATTERN.format(0, leaf.index)
+    checkpoint = write_chunk(
+        path,
+        leaf.paths,
+        leaf.first_input,
+        leaf.object_base,
+        leaf.options,
+        verbose=leaf.verbose,
+    )
+    if checkpoint.object_end > leaf.object_base + leaf.objects:
+        path.unlink()
+        return None
+    return checkpoint
+
+
+def _timed_leaf(leaf: _Leaf) -> Tuple[Optional[Checkpoint], float]:
+    # _merge_leaf and the seconds it took in the worker
+    started = perf_counter()
+    part = _merge_leaf(leaf)
+    return part, perf_counter() - started
+
+
+def _tuned_leaves(
+    paths: Sequence[Path],
+    measured: Sequence[Tuple[int, int]],
+    directory: Path,
+    leaf_options: MergeOptions,
+    options: MergeOptions,
+    tuner: AutoTuner,
+    verbose: bool,
+) -> Iterator[Tuple[_Leaf, Optional[Checkpoint]]]:
+    # Merge inputs in batches whose size and concurrency the tuner sets as
+    # batches finish. Objects are reserved per input, so a batch's range is
+    # the sum of its inputs' wherever the batch boundaries fall.
+    bases = [0]
+    for objects, _ in measured:
+        bases.append(bases[-1] + objects)
+    sizes = [as_input(path).size for path in paths]
+
+    pool = ProcessPoolExecutor(tuner.max_workers) if tuner.max_workers > 1 else None
+    admission = MemoryBudget(options.memory_budget)
+    pending: Deque[Tuple[_Leaf, Any, int]] = deque()
+    start = index = 0
+    try:
+        while pending or start < len(paths):
+            while start < len(paths) and len(pending) < tuner.concurrency:
+                end = min(start + tuner.batch, len(paths))
+                cost = sum(footprint for _, footprint in measured[start:end])
+                if not admission.admits(cost):
+                    break
+                leaf = _Leaf(
+                    directory,
+                    index,
+                    start,
+                    paths[start:end],
+                    bases[start],
+                    bases[end] - bases[start],
+                    leaf_options,
+                    verbose,
+                )
+                admission.acquire(cost)
+                outcome = (
+                    _timed_leaf(leaf) if pool is None
+                    else pool.submit(_timed_leaf, leaf)
+                )
+                pending.append((leaf, outcome, cost))
+                start, index = end, index + 1
+            leaf, outcome, cost = pending.popleft()
+            part, seconds = (
+                outcome.result() if isinstance(outcome, Future) else outcome
+            )
+            admission.release(cost)
+            first = leaf.first_input
+            tuner.record(
+                sum(sizes[first:first + len(leaf.paths)]),
+                part.pages if part is not None else 0,
+                seconds,
+            )
+            yield leaf, part
+    finally:
+        for _, outcome, _ in pending:
+            if isinstance(outcome, Future):
+                outcome.cancel()
+        if pool is not None:
+            pool.shutdown()
+
+
+class _Group(NamedTuple):
+    directory: Path
+    level: int
+    index: int
+    parts: Sequence[Checkpoint]
+    object_base: int
+    options: MergeOptions
+
+
+def _assemble_group(group: _Group) -> Checkpoint:
+    # Combine a group of parts into one part of the next level
+    path = group.directory / PART_PATTERN.format(group.level, group.index)
+    with atomic_output(
+        path, digest=None, buffer_size=group.options.buffer_size
+    ) as stream:
+        layout = assemble(
+            group.directory,
+            group.parts,
+            stream,
+            group.options.page_tree_fanout,
+            next_object=group.object_base,
+            sparse_xref=True,
+        )
+    return Checkpoint(
+        part=path.name,
+        first_input=group.parts[0].first_input,
+        num_inputs=sum(part.num_inputs for part in group.parts),
+        object_base=group.object_base,
+        object_end=layout.object_end,
+        body_end=layout.body_end,
+        pages=layout.pages,
+        objects_dropped=sum(part.objects_dropped for part in group.parts),
+        bytes_dropped=sum(part.bytes_dropped for part in group.parts),
+        image_bytes_before=sum(part.image_bytes_before for part in group.parts),
+        image_bytes_after=sum(part.image_bytes_after for part in group.parts),
+        duplicate_pages=sum(part.duplicate_pages for part in group.parts),
+        input_pages=tuple(
+            pages for part in group.parts for pages in part.input_pages
+        ),
+    )
+
+
+def merge_tree(
+    paths: Sequence[Path],
+    output_path: Path,
+    options: MergeOptions,
+    *,
+    document_id: bytes | None = None,
+    verbose: bool = False,
+) -> PartsResult:
+    """
+    Merge files by tree reduction across worker processes.
+
+    Groups of ``options.reduce_fanout`` inputs are merged into parts in
+    parallel, each numbering its objects in a range reserved from the
+    inputs' trailers, so that parts can be combined by copying bytes. While
+    more than ``reduce_fanout`` parts remain, groups of them are combined
+    into parts of the next level, also in parallel. The output has the pages
+    of a serial merge, in the same order.
+
+    With ``options.autotune``, an :class:`~pdfusion.autotune.AutoTuner`
+    sets the number of inputs per group and of groups merged at once
+    instead, from the inputs' sizes and the throughput of groups merged so
+    far; ``reduce_fanout``, or 64 if it is 0, then only sets how many parts
+    are combined at a time.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        The input files, in merge order.
+    output_path : Path
+        The final output file.
+    options : MergeOptions
+        Merge options; ``reduce_fanout`` sets the group size, ``workers``
+        the number of worker processes, ``autotune`` whether to tune both
+        while merging and ``temp_dir`` where parts go.
+    document_id : bytes, optional
+        Identifier for the output's trailer /ID.
+    verbose : bool, optional
+        Whether to log each file as it is appended (default is False).
+
+    Returns
+    -------
+    PartsResult
+        Statistics of the output.
+
+    Raises
+    ------
+    PDFusionMergeError
+        If an input cannot be opened or parsed.
+    """
+    fanout = max(options.reduce_fanout, 2)
+    tuner: Optional[AutoTuner] = None
+    if options.autotune:
+        fanout = fanout if options.reduce_fanout else AUTO_FANOUT
+        tuner = AutoTuner(
+            [as_input(path).size for path in paths],
+            workers=options.workers,
+            memory_budget=options.memory_budget,
+        )
+    # Workers neither nest pools nor share the caller's metrics or readers
+    leaf_options = replace(options, workers=1, metrics=None, reader_cache=None)
+    directory = Path(
+        tempfile.mkdtemp(
+            prefix=f".{output_path.name}.",
+            suffix=".tree",
+            dir=options.temp_dir or output_path.parent,
+        )
+    )
+    try:
+        merged_leaves: Iterator[Tuple[_Leaf, Optional[Checkpoint]]]
+        if tuner is not None:
+            slices = [
+                paths[i:i + MEASURE_BATCH]
+                for i in range(0, len(paths), MEASURE_BATCH)
+            ]
+            measured = [
+                sizes
+                for found in ordered_map(_measure_each, slices, workers=options.workers)
+                for sizes in found
+            ]
+            next_object = sum(objects for objects, _ in measured)
+            logger.debug(f"Merging {len(paths)} files in auto-tuned groups")
+            merged_leaves = _tuned_leaves(
+                paths, measured, directory, leaf_options, options, tuner, verbose
+            )
+        else:
+            groups = [paths[i:i + fanout] for i in range(0, len(paths), fanout)]
+            sizes = list(ordered_map(_measure, groups, workers=options.workers))
+            leaves: List[_Leaf] = []
+            next_object = 0
+            for index, (group, (objects, _)) in enumerate(zip(groups, sizes)):
+                leaves.append(
+                    _Leaf(
+                        directory,
+                        index,
+                        index * fanout,
+                        group,
+                        next_object,
+                        objects,
+                        leaf_options,
+                        verbose,
+                    )
+                )
+                next_object += objects
+
+            logger.debug(f"Merging {len(paths)} files in {len(leaves)} groups")
+            results = ordered_map(
+                _merge_leaf,
+                leaves,
+                workers=options.workers,
+                costs=[footprint for _, footprint in sizes],
+                budget=options.memory_budget,
+            )
+            merged_leaves = zip(leaves, results)
+        parts: List[Checkpoint] = []
+        for leaf, part in merged_leaves:
+            if part is None:
+                # Rare: redo the group after every reserved number
+                logger.debug(f"Group {leaf.index} outgrew its object numbers")
+                part = _merge_leaf(
+                    leaf._replace(object_base=next_object, objects=1 << 62)
+                )
+                assert part is not None
+                next_object = part.object_end
+            parts.append(part)
+
+        level = 1
+        workers = tuner.concurrency if tuner is not None else options.workers
+        while len(parts) > fanout:
+            combine: List[_Group] = []
+            for index, start in enumerate(range(0, len(parts), fanout)):
+                members = parts[start:start + fanout]
+                combine.append(
+                    _Group(directory, level, index, members, next_object, leaf_options)
+                )
+                # A page tree node per member at most, an outline and a catalog
+                next_object += len(members) + 2
+            merged = list(
+                ordered_map(_assemble_group, combine, workers=workers)
+            )
+            for part in parts:
+                (directory / part.part).unlink()
+            logger.debug(f"Level {level}: {len(parts)} parts into {len(merged)}")
+            parts = merged
+            level += 1
+
+        started = perf_counter()
+        with atomic_output(
+            output_path,
+            digest=options.digest,
+            fsync=options.fsync,
+            buffer_size=options.buffer_size,
+        ) as stream:
+            layout = assemble(
+                directory,
+                parts,
+                stream,
+                options.page_tree_fanout,
+                next_object=next_object,
+                document_id=document_id,
+                outline_fanout=options.bookmark_fanout,
+            )
+        if options.metrics is not None:
+            options.metrics.write_seconds.observe(perf_counter() - started)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return PartsResult(
+        layout.pages,
+        stream.bytes_written,
+        stream.hexdigest(),
+        sum(part.objects_dropped for part in parts),
+        sum(part.bytes_dropped for part in parts),
+        sum(part.image_bytes_before for part in parts),
+        sum(part.image_bytes_after for part in parts),
+        sum(part.duplicate_pages for part in parts),
+        tuple(pages for part in parts for pages in part.input_pages),
+    )
+
+
+__all__ = ["merge_tree", "object_bound"]
@@ -0,0 +1,160 @@
+"""
+Memory-budget scheduling for the PDFusion package.
+
+This module estimates how much memory parsing an input takes and admits
+parallel work only while the estimates of the work in flight fit a budget.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Final
+
+from .catalog import as_input
+
+# Constants
+PARSE_OVERHEAD: Final[float] = 3.0
+BASE_FOOTPRINT: Final[int] = 1024 * 1024
+SIZE_UNITS: Final[Dict[str, int]] = {
+    "": 1,
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+    "T": 1024**4,
+}
+
+_SIZE_RE = re.compile(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*", re.IGNORECASE)
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a human-readable byte size such as ``"4G"`` or ``"512MiB"``.
+
+    Units are binary: ``K`` is 1024 bytes, ``M`` is 1024 ``K`` and so on.
+
+    Parameters
+    ----------
+    text : str
+        The size to parse.
+
+    Returns
+    -------
+    int
+        The size in bytes.
+
+    Raises
+    ------
+    ValueError
+        If ``text`` is not a size.
+    """
+    match = _SIZE_RE.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Invalid size: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+
+def estimate_footprint(path: str | Path, overhead: float = PARSE_OVERHEAD) -> int:
+    """
+    Estimate the peak memory taken by parsing and rewriting a PDF file.
+
+    A parse holds the file's bytes, the objects decoded from them and the
+    serialized copy produced from those objects, so the estimate is the file
+    size times ``overhead`` plus a fixed allowance for per-document state.
+
+    Parameters
+    ----------
+    path : str | Path
+        The file to estimate; the recorded size of a ``PdfInput`` is used.
+    overhead : float, optional
+        Bytes of memory per byte of input.
+
+    Returns
+    -------
+    int
+        Estimated footprint in bytes.
+    """
+    return BASE_FOOTPRINT + int(as_input(path).size * overhead)
+
+
+class MemoryBudget:
+    """
+    Admission control for work with an estimated memory footprint.
+
+    Work is admitted while the footprints admitted and not yet released fit
+    the budget. Work larger than the whole budget is admitted only when
+    nothing else is in flight, so it runs on its own instead of never.
+
+    Parameters
+    ----------
+    budget : int
+        Memory available to admitted work, in bytes. 0 admits everything.
+
+    Attributes
+    ----------
+    in_use : int
+        Sum of the footprints admitted and not yet released.
+    """
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.in_use = 0
+
+    def admits(self, cost: int) -> bool:
+        """
+        Check whether work of the given footprint can start now.
+
+        Parameters
+        ----------
+        cost : int
+            Estimated footprint of the work, in bytes.
+
+        Returns
+        -------
+        bool
+            True if the work fits the budget or nothing else is in flight.
+        """
+        return self.budget <= 0 or not self.in_use or self.in_use + cost <= self.budget
+
+    def acquire(self, cost: int) -> None:
+        """
+        Charge admitted work to the budget.
+
+        Parameters
+        ----------
+        cost : int
+            Estimated footprint of the work, in bytes.
+
+        Returns
+        -------
+        None
+        """
+        self.in_use += cost
+
+    def release(self, cost: int) -> None:
+        """
+        Return the footprint of finished work to the budget.
+
+        Parameters
+        ----------
+        cost : int
+            Footprint previously passed to :meth:`acquire`.
+
+        Returns
+        -------
+        None
+        """
+        self.in_use -= cost
+
+
+__all__ = [
+    "MemoryBudget",
+    "estimate_footprint",
+    "parse_size",
+    "PARSE_OVERHEAD",
+    "BASE_FOOTPRINT",
+]
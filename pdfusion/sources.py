@@ -0,0 +1,818 @@
+"""
+Input sources for the PDFusion package.
+
+Inputs kept in an object store are usually downloaded whole before they are
+merged, although a PDF parser starts from the cross-reference table at the
+end of a file and then reads only the objects it is asked for. This module
+lists and reads inputs through ranged reads instead. A source splits each
+object into fixed-size blocks, fetches only the blocks that are read, keeps
+them in a per-source cache, and fetches nearby missing blocks in a single
+request. Sources for a local directory and for an S3-compatible object store
+are included; others implement the four methods of :class:`InputSource`.
+
+Example
+-------
+>>> from pdfusion import discover_pdfs, merge_pdfs
+>>> from pdfusion.sources import ObjectStoreSource
+>>> source = ObjectStoreSource("https://s3.example.com/invoices/2026-09/")
+>>> merge_pdfs(discover_pdfs(source), "invoices.pdf")
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import http.client
+import io
+import os
+import threading
+import xml.etree.ElementTree as ElementTree
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Final,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from urllib.parse import quote, urlsplit
+
+from . import logging as log_utils
+
+# Constants
+BLOCK_SIZE: Final[int] = 64 * 1024
+DEFAULT_SOURCE_CACHE_BYTES: Final[int] = 64 * 1024 * 1024
+# Missing bytes between two reads below which both are fetched in one
+# request, since a request to an object store costs more than reading this
+# much more
+COALESCE_GAP: Final[int] = 4 * BLOCK_SIZE
+DEFAULT_TIMEOUT: Final[float] = 30.0
+DEFAULT_REGION: Final[str] = "us-east-1"
+S3_NAMESPACE: Final[str] = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+# Payload hash of the bodiless requests made to an object store
+EMPTY_SHA256: Final[str] = hashlib.sha256(b"").hexdigest()
+
+logger = log_utils.get_logger(__name__)
+
+
+class SourceObject(NamedTuple):
+    """
+    An object stored in a source.
+
+    Attributes
+    ----------
+    name : str
+        Name of the object within the source, with ``/`` separators.
+    size : int
+        Size of the object in bytes.
+    mtime_ns : int
+        Modification time of the object in nanoseconds.
+    """
+    name: str
+    size: int
+    mtime_ns: int
+
+
+class SourceStats(NamedTuple):
+    """
+    Counters of a source.
+
+    Attributes
+    ----------
+    requests : int
+        Ranged reads made of the backend.
+    bytes_fetched : int
+        Bytes returned by those reads.
+    hits : int
+        Blocks read from the cache.
+    misses : int
+        Blocks that had to be fetched.
+    """
+    requests: int
+    bytes_fetched: int
+    hits: int
+    misses: int
+
+
+class _Blocks:
+    # Blocks of a source's objects, by name and block number, least
+    # recently used first
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Tuple[str, int], bytes] = OrderedDict()
+        self.nbytes = 0
+        self.requests = self.fetched = self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def put(self, key: Tuple[str, int], block: bytes) -> None:
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= len(previous)
+        self.entries[key] = block
+        self.nbytes += len(block)
+        while self.nbytes > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= len(evicted)
+
+
+def _runs(blocks: List[int], gap: int) -> List[Tuple[int, int]]:
+    # First and last of runs of sorted block numbers, joining runs at most
+    # ``gap`` blocks apart
+    runs: List[Tuple[int, int]] = []
+    for block in blocks:
+        if runs and block - runs[-1][1] <= gap + 1:
+            runs[-1] = (runs[-1][0], block)
+        else:
+            runs.append((block, block))
+    return runs
+
+
+class _RangeReader(io.RawIOBase):
+    # An object of a source, read as a file through its block cache
+
+    def __init__(self, source: InputSource, name: str, size: int) -> None:
+        super().__init__()
+        self.name = name
+        self._source = source
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        stop = min(self._position + len(buffer), self._size)
+        if stop <= self._position:
+            return 0
+        data = self._source.read(self.name, self._position, stop)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class InputSource(ABC):
+    """
+    Where inputs are listed and read from, in ranges, through a block cache.
+
+    A backend implements :meth:`list_objects`, :meth:`stat`, :meth:`fetch`
+    and :meth:`locate`; reads go through :meth:`read`, which serves whole
+    blocks from the cache and fetches missing ones, joining nearby missing
+    blocks into one ranged read. Objects are assumed not to change while a
+    source is in use.
+
+    Lookups take a lock, so one source can be read by several threads. The
+    cache is process-local: a copy made for a worker process starts out
+    empty.
+
+    Parameters
+    ----------
+    block_size : int, optional
+        Size of the blocks objects are fetched and cached in (default is
+        64 KiB).
+    cache_bytes : int, optional
+        Bytes of blocks the cache keeps before evicting (default is 64 MiB).
+    coalesce_gap : int, optional
+        Bytes already cached, or not asked for, between two missing ranges
+        below which both are fetched in one request (default is 256 KiB).
+    """
+
+    def __init__(
+        self,
+        *,
+        block_size: int = BLOCK_SIZE,
+        cache_bytes: int = DEFAULT_SOURCE_CACHE_BYTES,
+        coalesce_gap: int = COALESCE_GAP,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        self.block_size = block_size
+        self.cache_bytes = cache_bytes
+        self.coalesce_gap = coalesce_gap
+        self._blocks = _Blocks(cache_bytes)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_blocks"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._blocks = _Blocks(self.cache_bytes)
+
+    @property
+    def directory(self) -> Path:
+        """Path: Directory merged outputs are written to by default."""
+        return Path.cwd()
+
+    @abstractmethod
+    def list_objects(self) -> List[SourceObject]:
+        """
+        List every object in the source, sorted by name.
+
+        Returns
+        -------
+        List[SourceObject]
+            The source's objects.
+
+        Raises
+        ------
+        OSError
+            If the source cannot be listed.
+        """
+
+    @abstractmethod
+    def stat(self, name: str) -> SourceObject:
+        """
+        Look up one object.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+
+        Returns
+        -------
+        SourceObject
+            The object's size and modification time.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the source has no such object.
+        """
+
+    @abstractmethod
+    def fetch(self, name: str, start: int, stop: int) -> bytes:
+        """
+        Read a range of an object from the backend, bypassing the cache.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+        start : int
+            Offset of the first byte to read.
+        stop : int
+            Offset after the last byte to read; the read stops early at the
+            end of the object.
+
+        Returns
+        -------
+        bytes
+            The bytes read.
+
+        Raises
+        ------
+        OSError
+            If the object cannot be read.
+        """
+
+    @abstractmethod
+    def locate(self, name: str) -> str:
+        """
+        Describe where an object is, for messages.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+
+        Returns
+        -------
+        str
+            A path or URL of the object. Nothing is read from it by path.
+        """
+
+    def read(self, name: str, start: int, stop: int) -> bytes:
+        """
+        Read a range of an object through the block cache.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+        start : int
+            Offset of the first byte to read.
+        stop : int
+            Offset after the last byte to read; the read stops early at the
+            end of the object.
+
+        Returns
+        -------
+        bytes
+            The bytes read.
+
+        Raises
+        ------
+        OSError
+            If the object cannot be read.
+        """
+        if stop <= start:
+            return b""
+        size = self.block_size
+        first, last = start // size, (stop - 1) // size
+        blocks = self._load(name, range(first, last + 1))
+        if first == last:
+            block = blocks[first]
+            return block[start - first * size:stop - first * size]
+        data = b"".join(blocks[number] for number in range(first, last + 1))
+        return data[start - first * size:stop - first * size]
+
+    def prefetch(self, name: str, ranges: Iterable[Tuple[int, int]]) -> None:
+        """
+        Fetch the missing blocks of several ranges of an object at once.
+
+        Nearby ranges are fetched in one request, so reading them one by one
+        afterwards makes no further requests.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+        ranges : Iterable[Tuple[int, int]]
+            Start and stop offsets of the ranges to fetch.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        OSError
+            If the object cannot be read.
+        """
+        size = self.block_size
+        numbers = {
+            number
+            for start, stop in ranges
+            if stop > start
+            for number in range(start // size, (stop - 1) // size + 1)
+        }
+        self._load(name, sorted(numbers))
+
+    def open(self, name: str, size: Optional[int] = None) -> BinaryIO:
+        """
+        Open an object for reading as a seekable file.
+
+        Parameters
+        ----------
+        name : str
+            Name of the object.
+        size : int, optional
+            Size of the object, if known from a listing; otherwise it is
+            looked up.
+
+        Returns
+        -------
+        BinaryIO
+            A buffered stream of the object, named after it, which the
+            caller closes.
+
+        Raises
+        ------
+        OSError
+            If the object cannot be looked up.
+        """
+        if size is None:
+            size = self.stat(name).size
+        return io.BufferedReader(_RangeReader(self, name, size), self.block_size)
+
+    def stats(self) -> SourceStats:
+        """
+        Get the source's counters.
+
+        Returns
+        -------
+        SourceStats
+            Requests made and blocks read so far.
+        """
+        blocks = self._blocks
+        with blocks.lock:
+            return SourceStats(
+                blocks.requests, blocks.fetched, blocks.hits, blocks.misses
+            )
+
+    def clear(self) -> None:
+        """
+        Drop every cached block, keeping the counters.
+
+        Returns
+        -------
+        None
+        """
+        with self._blocks.lock:
+            self._blocks.entries.clear()
+            self._blocks.nbytes = 0
+
+    def _load(self, name: str, numbers: Iterable[int]) -> Dict[int, bytes]:
+        # The blocks asked for, fetching the missing ones in runs
+        blocks, cache = {}, self._blocks
+        missing: List[int] = []
+        with cache.lock:
+            for number in numbers:
+                block = cache.entries.get((name, number))
+                if block is None:
+                    missing.append(number)
+                else:
+                    cache.entries.move_to_end((name, number))
+                    blocks[number] = block
+            cache.hits += len(blocks)
+            cache.misses += len(missing)
+        size = self.block_size
+        for first, last in _runs(missing, self.coalesce_gap // size):
+            data = self.fetch(name, first * size, (last + 1) * size)
+            with cache.lock:
+                cache.requests += 1
+                cache.fetched += len(data)
+                for number in range(first, last + 1):
+                    block = data[(number - first) * size:(number - first + 1) * size]
+                    cache.put((name, number), block)
+                    blocks[number] = block
+        return blocks
+
+
+class LocalSource(InputSource):
+    """
+    The files below a local directory, as a source.
+
+    Objects are named by their path relative to the directory, with ``/``
+    separators; files in subdirectories are listed too.
+
+    Parameters
+    ----------
+    root : str | Path
+        The directory.
+    **kwargs
+        Block and cache settings, as for :class:`InputSource`.
+    """
+
+    def __init__(self, root: str | Path, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.root = Path(root)
+
+    @property
+    def directory(self) -> Path:
+        """Path: The source's directory, where merged outputs are written."""
+        return self.root
+
+    def list_objects(self) -> List[SourceObject]:
+        found = []
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            prefix = os.path.relpath(directory, self.root)
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                name = filename if prefix == "." else os.path.join(prefix, filename)
+                name = name.replace(os.sep, "/")
+                found.append(SourceObject(name, stat.st_size, stat.st_mtime_ns))
+        found.sort()
+        return found
+
+    def stat(self, name: str) -> SourceObject:
+        stat = os.stat(self.locate(name))
+        return SourceObject(name, stat.st_size, stat.st_mtime_ns)
+
+    def fetch(self, name: str, start: int, stop: int) -> bytes:
+        with open(self.locate(name), "rb") as f:
+            f.seek(start)
+            return f.read(stop - start)
+
+    def locate(self, name: str) -> str:
+        return os.path.join(self.root, *name.split("/"))
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def sign_request(
+    method: str,
+    url: str,
+    headers: Mapping[str, str],
+    *,
+    access_key: str,
+    secret_key: str,
+    region: str = DEFAULT_REGION,
+    service: str = "s3",
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """
+    Sign a bodiless request with AWS Signature Version 4.
+
+    Parameters
+    ----------
+    method : str
+        HTTP method, such as ``"GET"``.
+    url : str
+        The request URL, its path and query already percent-encoded.
+    headers : Mapping[str, str]
+        Headers to sign besides ``Host``, ``x-amz-date`` and
+        ``x-amz-content-sha256``, which are added.
+    access_key : str
+        Access key ID.
+    secret_key : str
+        Secret access key.
+    region : str, optional
+        Region of the endpoint (default is ``"us-east-1"``).
+    service : str, optional
+        Service name (default is ``"s3"``).
+    now : datetime, optional
+        Time of the request; defaults to the current time.
+
+    Returns
+    -------
+    Dict[str, str]
+        ``headers`` with the added headers and ``Authorization``.
+    """
+    parts = urlsplit(url)
+    moment = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    signed = {key.lower(): value.strip() for key, value in headers.items()}
+    signed.update(
+        {
+            "host": parts.netloc,
+            "x-amz-content-sha256": EMPTY_SHA256,
+            "x-amz-date": moment,
+        }
+    )
+    names = sorted(signed)
+    pairs = sorted(pair.partition("=") for pair in parts.query.split("&") if pair)
+    query = "&".join(f"{key}={value}" for key, _, value in pairs)
+    canonical = "\n".join(
+        [
+            method,
+            parts.path or "/",
+            query,
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            ";".join(names),
+            EMPTY_SHA256,
+        ]
+    )
+    scope = f"{moment[:8]}/{region}/{service}/aws4_request"
+    to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            moment,
+            scope,
+            hashlib.sha256(canonical.encode()).hexdigest(),
+        ]
+    )
+    key = _hmac(f"AWS4{secret_key}".encode(), moment[:8])
+    for part in (region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, to_sign.encode(), hashlib.sha256).hexdigest()
+    result = dict(headers)
+    result.update(
+        {
+            "x-amz-content-sha256": EMPTY_SHA256,
+            "x-amz-date": moment,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+                f"SignedHeaders={';'.join(names)}, Signature={signature}"
+            ),
+        }
+    )
+    return result
+
+
+class ObjectStoreSource(InputSource):
+    """
+    The objects under a prefix of an S3-compatible bucket, as a source.
+
+    Objects are listed with ``ListObjectsV2`` and read with ranged ``GET``
+    requests over one persistent connection per thread. Requests are signed
+    with AWS Signature Version 4 when credentials are given or set in the
+    ``AWS_ACCESS_KEY_ID`` and ``AWS_SECRET_ACCESS_KEY`` environment
+    variables, and made anonymously otherwise.
+
+    Parameters
+    ----------
+    url : str
+        The bucket and prefix in path style, such as
+        ``"https://s3.example.com/bucket/prefix/"``. Objects are named by
+        their key relative to the prefix.
+    access_key : str, optional
+        Access key ID.
+    secret_key : str, optional
+        Secret access key.
+    region : str, optional
+        Region of the endpoint; defaults to ``AWS_REGION`` or
+        ``"us-east-1"``.
+    timeout : float, optional
+        Seconds to wait for the endpoint (default is 30).
+    **kwargs
+        Block and cache settings, as for :class:`InputSource`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"Not an http(s) URL: {url}")
+        bucket, _, prefix = parts.path.lstrip("/").partition("/")
+        if not bucket:
+            raise ValueError(f"No bucket in {url}")
+        self.url = url
+        self.scheme, self.host, self.bucket = parts.scheme, parts.netloc, bucket
+        self.prefix = prefix if not prefix or prefix.endswith("/") else prefix + "/"
+        self.access_key = access_key or os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.region = region or os.environ.get("AWS_REGION", DEFAULT_REGION)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._local = threading.local()
+
+    def list_objects(self) -> List[SourceObject]:
+        found: List[SourceObject] = []
+        token: Optional[str] = None
+        while True:
+            query = f"list-type=2&prefix={quote(self.prefix, safe='-_.~')}"
+            if token is not None:
+                query += f"&continuation-token={quote(token, safe='-_.~')}"
+            _, body = self._request("GET", f"/{self.bucket}", query)
+            root = ElementTree.fromstring(body)
+            for entry in root.iter(f"{S3_NAMESPACE}Contents"):
+                key = entry.findtext(f"{S3_NAMESPACE}Key", "")
+                if key.endswith("/"):
+                    continue
+                modified = datetime.fromisoformat(
+                    entry.findtext(f"{S3_NAMESPACE}LastModified", "").replace(
+                        "Z", "+00:00"
+                    )
+                )
+                found.append(
+                    SourceObject(
+                        key[len(self.prefix):],
+                        int(entry.findtext(f"{S3_NAMESPACE}Size", "0")),
+                        int(modified.timestamp()) * 10**9,
+                    )
+                )
+            token = root.findtext(f"{S3_NAMESPACE}NextContinuationToken")
+            if root.findtext(f"{S3_NAMESPACE}IsTruncated") != "true" or not token:
+                break
+        found.sort()
+        return found
+
+    def stat(self, name: str) -> SourceObject:
+        response, _ = self._request("HEAD", self._path(name))
+        modified = parsedate_to_datetime(response.getheader("Last-Modified", ""))
+        return SourceObject(
+            name,
+            int(response.getheader("Content-Length", "0")),
+            int(modified.timestamp()) * 10**9,
+        )
+
+    def fetch(self, name: str, start: int, stop: int) -> bytes:
+        response, body = self._request(
+            "GET", self._path(name), headers={"Range": f"bytes={start}-{stop - 1}"}
+        )
+        if response.status == 416:
+            return b""
+        if response.status == 200:
+            # The endpoint ignored the range and sent the whole object
+            return body[start:stop]
+        return body
+
+    def locate(self, name: str) -> str:
+        return f"{self.scheme}://{self.host}{self._path(name)}"
+
+    def _path(self, name: str) -> str:
+        return f"/{self.bucket}/" + quote(self.prefix + name, safe="/-_.~")
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        query: str = "",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[http.client.HTTPResponse, bytes]:
+        target = f"{path}?{query}" if query else path
+        headers = dict(headers or {})
+        if self.access_key and self.secret_key:
+            headers = sign_request(
+                method,
+                f"{self.scheme}://{self.host}{target}",
+                headers,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                region=self.region,
+            )
+        # A connection the endpoint closed while idle is opened again once
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, target, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        location = f"{self.scheme}://{self.host}{target}"
+        if response.status == 404:
+            raise FileNotFoundError(f"No such object: {location}")
+        if response.status >= 400 and response.status != 416:
+            raise OSError(
+                f"{method} {location} failed: {response.status} {response.reason}"
+            )
+        return response, body
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            factory = (
+                http.client.HTTPSConnection
+                if self.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            connection = factory(self.host, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+
+def source_from_url(url: str) -> InputSource:
+    """
+    Make the source a URL names.
+
+    Parameters
+    ----------
+    url : str
+        A ``file://`` URL of a directory, or an ``http://`` or ``https://``
+        URL of a bucket and prefix in an S3-compatible object store.
+
+    Returns
+    -------
+    InputSource
+        A ``LocalSource`` or an ``ObjectStoreSource``.
+
+    Raises
+    ------
+    ValueError
+        If the URL has another scheme.
+    """
+    parts = urlsplit(url)
+    if parts.scheme == "file":
+        return LocalSource(parts.path)
+    if parts.scheme in ("http", "https"):
+        return ObjectStoreSource(url)
+    raise ValueError(f"Unsupported input source: {url}")
+
+
+__all__ = [
+    "BLOCK_SIZE",
+    "COALESCE_GAP",
+    "DEFAULT_SOURCE_CACHE_BYTES",
+    "InputSource",
+    "LocalSource",
+    "ObjectStoreSource",
+    "SourceObject",
+    "SourceStats",
+    "sign_request",
+    "source_from_url",
+]
@@ -0,0 +1,345 @@
+"""
+Output stream helpers for the PDFusion package.
+
+This module provides the PDF writer used for merged output, the stream
+wrapper it writes through and an atomic file writer. Output is buffered in
+large chunks, checksummed as it is written, and only renamed into place once
+complete, so consumers never see a truncated file and never need a second pass
+to compute a digest.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, List
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import ArrayObject, ByteStringObject, IndirectObject, PdfObject
+
+from .compression import CompressionStats, compress_streams
+from .exceptions import PDFusionError
+from .options import DEFAULT_BUFFER_SIZE, DEFAULT_DIGEST, MergeOptions
+from .pagetree import balance_page_tree
+from .reachability import CollectionStats, collect_garbage
+
+
+class CountingStream:
+    """
+    Write-only stream wrapper that tracks position and checksums output.
+
+    PyPDF2 records object offsets with ``tell()``, which pipes and sockets do
+    not support, and issues many tiny writes. This wrapper counts the bytes
+    written instead of asking the underlying stream, coalesces writes into
+    ``buffer_size`` chunks and feeds each chunk to a ``hashlib`` digest.
+
+    Parameters
+    ----------
+    raw : BinaryIO
+        The destination stream.
+    digest : str, optional
+        ``hashlib`` algorithm name, or ``None`` to skip hashing.
+    buffer_size : int, optional
+        Bytes to accumulate before writing through; 0 writes immediately.
+
+    Attributes
+    ----------
+    bytes_written : int
+        Number of bytes written through the wrapper.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        digest: str | None = None,
+        buffer_size: int = 0,
+    ) -> None:
+        self.raw = raw
+        self.bytes_written = 0
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._hash = hashlib.new(digest) if digest else None
+
+    def write(self, data: bytes) -> int:
+        """
+        Write data to the underlying stream.
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes to write.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        size = len(data)
+        self.bytes_written += size
+        if self.buffer_size:
+            self._buffer += data
+            if len(self._buffer) >= self.buffer_size:
+                self._drain()
+        else:
+            self._emit(data)
+        return size
+
+    def tell(self) -> int:
+        """
+        Return the current output position.
+
+        Returns
+        -------
+        int
+            The number of bytes written so far.
+        """
+        return self.bytes_written
+
+    def flush(self) -> None:
+        """
+        Write any buffered bytes and flush the underlying stream.
+
+        Returns
+        -------
+        None
+        """
+        self._drain()
+        self.raw.flush()
+
+    def hexdigest(self) -> str | None:
+        """
+        Return the checksum of everything written so far.
+
+        Returns
+        -------
+        str or None
+            The hex digest, or ``None`` if hashing is disabled.
+        """
+        return self._hash.hexdigest() if self._hash is not None else None
+
+    def _drain(self) -> None:
+        if self._buffer:
+            self._emit(self._buffer)
+            self._buffer = bytearray()
+
+    def _emit(self, data: bytes | bytearray) -> None:
+        if self._hash is not None:
+            self._hash.update(data)
+        self.raw.write(data)
+
+
+class PdfusionWriter(PdfWriter):
+    """
+    ``PdfWriter`` that prepares the document structure before writing.
+
+    Parameters
+    ----------
+    options : MergeOptions, optional
+        Merge options controlling the pre-write passes.
+    object_base : int, optional
+        Number of object numbers reserved below this writer's objects, so
+        that its output can later be spliced after other documents without
+        renumbering. Reserved numbers are left out of the cross-reference
+        table.
+
+    Attributes
+    ----------
+    collection : CollectionStats, optional
+        Statistics of the unreferenced-object pass of the last write.
+    compression : CompressionStats
+        Streams compressed for ``options.compress_level`` in the last write.
+    xref_location : int, optional
+        Offset of the cross-reference table of the last write; the objects
+        end there.
+    document_id : bytes, optional
+        Identifier written as both halves of the trailer /ID, so that the
+        same inputs always produce the same file. No /ID is written if None.
+    """
+
+    def __init__(
+        self, options: MergeOptions | None = None, object_base: int = 0
+    ) -> None:
+        super().__init__()
+        self.options = options or MergeOptions()
+        if not 0 <= self.options.compress_level <= 9:
+            raise PDFusionError(
+                f"Compression level must be from 0 to 9: {self.options.compress_level}"
+            )
+        self.collection: CollectionStats | None = None
+        self.compression = CompressionStats()
+        self.xref_location: int | None = None
+        self.document_id: bytes | None = None
+        self.object_base = object_base
+        if object_base:
+            # The catalog, info and page tree references are shared, so
+            # renumbering them in place updates every holder
+            for obj in self._objects:
+                obj.indirect_reference.idnum += object_base
+            self._objects[:0] = [None] * object_base
+
+    def get_reference(self, obj: PdfObject) -> IndirectObject:
+        """
+        Return the indirect reference of an object owned by this writer.
+
+        PyPDF2 searches the object list, which makes ``PdfMerger.write``
+        quadratic in the number of pages; objects added through
+        ``_add_object`` already know their reference.
+
+        Parameters
+        ----------
+        obj : PdfObject
+            An object previously added to this writer.
+
+        Returns
+        -------
+        IndirectObject
+            The reference to ``obj``.
+        """
+        ref = getattr(obj, "indirect_reference", None)
+        if ref is not None and ref.pdf is self:
+            return ref
+        return super().get_reference(obj)
+
+    def write_stream(self, stream: Any) -> None:
+        """
+        Run the pre-write passes, then serialize the document.
+
+        Parameters
+        ----------
+        stream : Any
+            Writable binary stream supporting ``tell()``.
+
+        Returns
+        -------
+        None
+        """
+        if self.options.page_tree_fanout:
+            balance_page_tree(self, self.options.page_tree_fanout)
+
+        # Same steps as PdfWriter.write_stream, with collection after the
+        # sweep has pulled every referenced input object into this writer
+        self._sweep_indirect_references(self._root)
+        if self.options.collect_garbage:
+            self.collection = collect_garbage(self)
+        if self.options.compress_level:
+            self.compression = compress_streams(
+                self._objects,
+                self.options.compress_level,
+                threads=self.options.compress_threads,
+            )
+
+        if self.document_id is not None:
+            self._ID = ArrayObject([ByteStringObject(self.document_id)] * 2)
+
+        object_positions = self._write_header(stream)
+        xref_location = self._write_xref_table(stream, object_positions)
+        self._write_trailer(stream)
+        stream.write(f"\nstartxref\n{xref_location}\n%%EOF\n".encode())
+        self.xref_location = xref_location
+
+    def _write_xref_table(self, stream: Any, object_positions: List[int]) -> int:
+        # PyPDF2 lists one offset per written object; dropped (None) slots
+        # become free entries, chained from object 0 in ascending order.
+        # Reserved numbers below object_base get no entries at all.
+        base = self.object_base
+        free = [
+            num for num, obj in enumerate(self._objects[base:], base + 1)
+            if obj is None
+        ]
+        next_free = dict(zip([0] + free, free + [0]))
+        offsets = iter(object_positions)
+
+        xref_location = stream.tell()
+        if base:
+            lines = [
+                "xref\n0 1\n",
+                f"{next_free[0]:010} 65535 f \n",
+                f"{base + 1} {len(self._objects) - base}\n",
+            ]
+        else:
+            lines = [
+                f"xref\n0 {len(self._objects) + 1}\n",
+                f"{next_free[0]:010} 65535 f \n",
+            ]
+        for num, obj in enumerate(self._objects[base:], base + 1):
+            if obj is None:
+                lines.append(f"{next_free[num]:010} 00001 f \n")
+            else:
+                lines.append(f"{next(offsets):010} 00000 n \n")
+        stream.write("".join(lines).encode())
+        return xref_location
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Persist the rename itself; not supported on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_output(
+    path: Path,
+    *,
+    digest: str | None = DEFAULT_DIGEST,
+    fsync: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> Iterator[CountingStream]:
+    """
+    Write a file atomically through a temporary file in the same directory.
+
+    The temporary file is renamed over ``path`` only when the block exits
+    cleanly; on error it is removed and any existing ``path`` is untouched.
+
+    Parameters
+    ----------
+    path : Path
+        Final location of the file.
+    digest : str, optional
+        ``hashlib`` algorithm for the streaming checksum (default is sha256).
+    fsync : bool, optional
+        Whether to fsync the file and directory before returning
+        (default is False).
+    buffer_size : int, optional
+        Write buffer size in bytes (default is 1 MiB).
+
+    Yields
+    ------
+    CountingStream
+        The stream to write to. Its ``bytes_written`` and ``hexdigest()``
+        describe the final file.
+    """
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o666)
+
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as raw:
+            stream = CountingStream(raw, digest=digest, buffer_size=buffer_size)
+            yield stream
+            stream.flush()
+            if fsync:
+                os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if fsync:
+        _fsync_directory(path.parent)
+
+
+__all__ = ["CountingStream", "PdfusionWriter", "atomic_output"]
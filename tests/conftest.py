@@ -7,14 +7,125 @@ Author: Bjorn Melin
 Date: 11/23/2024
 """
 
+import json
 import os
 import shutil
 from pathlib import Path
-from typing import Generator
+from typing import Dict, Generator, List
 
 import pytest
 from PyPDF2 import PdfWriter
 
+from tests.corpus import SCALES, generate_corpus
+from tests.perf import PERF_RESULTS, PerfTracker
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """
+    Register the performance regression options.
+
+    Parameters
+    ----------
+    parser : pytest.Parser
+        The pytest command-line parser.
+
+    Returns
+    -------
+    None
+    """
+    group = parser.getgroup("pdfusion-perf")
+    group.addoption(
+        "--perf-baseline",
+        default=None,
+        help=(
+            "Fail benchmarks that regress against this baseline JSON file "
+            "(e.g. tests/benchmarks/baseline.json)"
+        ),
+    )
+    group.addoption(
+        "--perf-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative regression before a benchmark fails",
+    )
+    group.addoption(
+        "--perf-save-baseline",
+        default=None,
+        help="Write the throughput/memory metrics of this run to a JSON file",
+    )
+
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    """
+    Save recorded benchmark metrics when ``--perf-save-baseline`` is given.
+
+    Parameters
+    ----------
+    session : pytest.Session
+        The finished test session.
+    exitstatus : int
+        The session exit status.
+
+    Returns
+    -------
+    None
+    """
+    target = session.config.getoption("--perf-save-baseline")
+    results = session.config.stash.get(PERF_RESULTS, {})
+    if target and results:
+        path = Path(target)
+        merged: Dict[str, Dict[str, float]] = {}
+        if path.exists():
+            merged.update(json.loads(path.read_text()))
+        merged.update(results)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def corpora(tmp_path_factory: pytest.TempPathFactory) -> Dict[str, List[Path]]:
+    """
+    Generate every benchmark corpus scale lazily, once per session.
+
+    Parameters
+    ----------
+    tmp_path_factory : pytest.TempPathFactory
+        Factory for session-scoped temporary directories.
+
+    Returns
+    -------
+    Dict[str, List[Path]]
+        A mapping that generates ``SCALES[name]`` on first access.
+    """
+
+    class _Corpora(dict):
+        def __missing__(self, name: str) -> List[Path]:
+            directory = tmp_path_factory.mktemp(f"corpus_{name}")
+            self[name] = generate_corpus(directory, SCALES[name])
+            return self[name]
+
+    return _Corpora()
+
+
+@pytest.fixture
+def perf(request: pytest.FixtureRequest, benchmark) -> PerfTracker:
+    """
+    Throughput/memory tracker bound to the current benchmark.
+
+    Parameters
+    ----------
+    request : pytest.FixtureRequest
+        The requesting test; its node name keys the baseline entry.
+    benchmark : pytest.BenchmarkFixture
+        The pytest-benchmark fixture.
+
+    Returns
+    -------
+    PerfTracker
+        The tracker for this test.
+    """
+    return PerfTracker(benchmark, request.node.name, request.config)
+
 
 @pytest.fixture
 def temp_dir(tmp_path: Path) -> Generator[Path, None, None]:
@@ -179,3 +290,32 @@ def cleanup_files() -> Generator[None, None, None]:
     """
     yield
     # Add any global cleanup here if needed
+
+
+@pytest.fixture
+def outlined_pdfs(tmp_path: Path) -> Path:
+    """
+    Create 11 PDF files with an outline item and a named destination each.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    Path
+        Directory with doc_00.pdf to doc_10.pdf; file i has i % 3 + 1 pages
+        of height 100 * (i + 1) + page index.
+    """
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    for i in range(11):
+        writer = PdfWriter()
+        for j in range(i % 3 + 1):
+            writer.add_blank_page(width=100, height=100 * (i + 1) + j)
+        writer.add_outline_item(f"doc {i}", i % 3)
+        writer.add_named_destination(f"dest {i}", 0)
+        with open(directory / f"doc_{i:02}.pdf", "wb") as f:
+            writer.write(f)
+    return directory
@@ -0,0 +1,246 @@
+"""
+In-process fake of an S3-compatible object store for PDFusion tests.
+
+This module serves a bucket kept in memory over HTTP on a local port, with
+the requests ``ObjectStoreSource`` makes: ``ListObjectsV2`` listings split
+into pages, ``HEAD`` requests and ranged ``GET`` requests. Every request is
+recorded, so that tests can check how many were made and how many bytes
+they returned.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+# Constants
+# Keys per listing page, small so that tests page through listings
+PAGE_SIZE: Final[int] = 3
+# Modification time of every object, as headers and listings give it
+MODIFIED: Final[float] = 1_790_000_000.0
+LISTED_MODIFIED: Final[str] = time.strftime(
+    "%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(MODIFIED)
+)
+_RANGE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+
+class StoreRequest(NamedTuple):
+    """
+    A request made of the fake store.
+
+    Attributes
+    ----------
+    method : str
+        HTTP method.
+    path : str
+        Request path, without the query.
+    range : Optional[Tuple[int, int]]
+        First and last byte asked for by a ranged ``GET``.
+    sent : int
+        Bytes of object data returned.
+    authorization : Optional[str]
+        The ``Authorization`` header, if any.
+    """
+    method: str
+    path: str
+    range: Optional[Tuple[int, int]]
+    sent: int
+    authorization: Optional[str]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written apart, which Nagle's algorithm would
+    # hold back until the client's delayed acknowledgement
+    disable_nagle_algorithm = True
+    server: _Server
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._object(body=False)
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+        if bucket == self.server.store.bucket and not key:
+            self._list(parse_qs(parts.query))
+        else:
+            self._object(body=True)
+
+    def _list(self, query: Dict[str, List[str]]) -> None:
+        store = self.server.store
+        prefix = query.get("prefix", [""])[0]
+        keys = sorted(key for key in store.objects if key.startswith(prefix))
+        start = int(query.get("continuation-token", ["0"])[0])
+        page = keys[start:start + PAGE_SIZE]
+        truncated = start + PAGE_SIZE < len(keys)
+        entries = "".join(
+            f"<Contents><Key>{escape(key)}</Key>"
+            f"<LastModified>{LISTED_MODIFIED}</LastModified>"
+            f"<Size>{len(store.objects[key])}</Size></Contents>"
+            for key in page
+        )
+        token = (
+            f"<NextContinuationToken>{start + PAGE_SIZE}</NextContinuationToken>"
+            if truncated
+            else ""
+        )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{store.bucket}</Name><Prefix>{escape(prefix)}</Prefix>"
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{token}{entries}</ListBucketResult>"
+        ).encode()
+        self._record(None, 0)
+        self._send(200, body, {"Content-Type": "application/xml"})
+
+    def _object(self, body: bool) -> None:
+        store = self.server.store
+        path = unquote(urlsplit(self.path).path)
+        bucket, _, key = path.lstrip("/").partition("/")
+        data = store.objects.get(key) if bucket == store.bucket else None
+        if data is None:
+            self._record(None, 0)
+            self._send(404, b"" if not body else b"NoSuchKey", {})
+            return
+        headers = {"Last-Modified": formatdate(MODIFIED, usegmt=True)}
+        match = _RANGE.match(self.headers.get("Range", ""))
+        if not body or match is None:
+            self._record(None, len(data) if body else 0)
+            headers["Content-Length"] = str(len(data))
+            self._send(200, data if body else b"", headers)
+            return
+        first = int(match.group(1))
+        last = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        if first >= len(data):
+            self._record((first, last), 0)
+            self._send(416, b"", {"Content-Range": f"bytes */{len(data)}"})
+            return
+        chunk = data[first:last + 1]
+        self._record((first, last), len(chunk))
+        headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+        self._send(206, chunk, headers)
+
+    def _record(self, span: Optional[Tuple[int, int]], sent: int) -> None:
+        request = StoreRequest(
+            self.command,
+            unquote(urlsplit(self.path).path),
+            span,
+            sent,
+            self.headers.get("Authorization"),
+        )
+        with self.server.store.lock:
+            self.server.store.requests.append(request)
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if "Content-Length" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    store: FakeObjectStore
+
+
+class FakeObjectStore:
+    """
+    A bucket kept in memory, served over HTTP on a local port.
+
+    Use as a context manager, which starts and stops the server.
+
+    Parameters
+    ----------
+    bucket : str, optional
+        Name of the bucket (default is ``"pdfs"``).
+
+    Attributes
+    ----------
+    objects : Dict[str, bytes]
+        The bucket's objects, by key.
+    requests : List[StoreRequest]
+        Requests served, in order.
+    """
+
+    def __init__(self, bucket: str = "pdfs") -> None:
+        self.bucket = bucket
+        self.objects: Dict[str, bytes] = {}
+        self.requests: List[StoreRequest] = []
+        self.lock = threading.Lock()
+        self._server: Optional[_Server] = None
+
+    def __enter__(self) -> FakeObjectStore:
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.store = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def url(self, prefix: str = "") -> str:
+        """
+        Return the URL of a prefix of the bucket.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            Key prefix (default is the whole bucket).
+
+        Returns
+        -------
+        str
+            A path-style URL for ``ObjectStoreSource``.
+        """
+        assert self._server is not None, "The store is not running"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{self.bucket}/{prefix}"
+
+    def upload(self, path: Path, key: str) -> None:
+        """
+        Store a file's bytes under a key.
+
+        Parameters
+        ----------
+        path : Path
+            The file.
+        key : str
+            Key of the object.
+
+        Returns
+        -------
+        None
+        """
+        self.objects[key] = Path(path).read_bytes()
+
+    def bytes_sent(self) -> int:
+        """
+        Return the object data sent so far.
+
+        Returns
+        -------
+        int
+            Bytes of object data in all responses.
+        """
+        return sum(request.sent for request in self.requests)
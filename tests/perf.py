@@ -0,0 +1,283 @@
+"""
+Throughput and peak-memory tracking for PDFusion benchmarks.
+
+This module wraps the pytest-benchmark fixture so every benchmark also reports
+pages/s, MB/s and peak traced memory, and can be checked against a stored
+baseline to fail CI on regressions. Absolute speeds differ between machines,
+so throughput is compared as the work done in the time a fixed calibration
+workload takes on the same machine in the same session.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from tests.corpus import CorpusSpec, build_pdf
+
+# Metrics checked against the baseline; the absolute ones are only reported
+GATED_METRICS = ("pages_per_cal", "mb_per_cal", "peak_mb")
+
+# Metrics where a higher value is better; everything else is lower-is-better
+HIGHER_IS_BETTER = ("pages_per_cal", "mb_per_cal")
+
+# Document parsed, decoded and written by the calibration workload, and the
+# number of timed runs whose fastest is kept
+CALIBRATION_SPEC = CorpusSpec(pages_per_file=20, font_bytes=8 * 1024, image_size=64)
+CALIBRATION_ROUNDS = 5
+
+# Session-wide store of every sample, written out by --perf-save-baseline
+PERF_RESULTS = pytest.StashKey[Dict[str, Dict[str, float]]]()
+
+# Seconds the calibration workload took, measured once per session
+CALIBRATION = pytest.StashKey[float]()
+
+
+@dataclass
+class PerfSample:
+    """
+    Metrics recorded for a single benchmark.
+
+    Attributes
+    ----------
+    seconds : float
+        Wall time of the fastest round.
+    pages_per_s : float
+        Pages processed per second.
+    mb_per_s : float
+        Megabytes processed per second.
+    pages_per_cal : float
+        Pages processed in the time of one calibration run.
+    mb_per_cal : float
+        Megabytes processed in the time of one calibration run.
+    peak_mb : float
+        Peak memory traced by ``tracemalloc`` during one round, in megabytes.
+    """
+    seconds: float
+    pages_per_s: float
+    mb_per_s: float
+    pages_per_cal: float
+    mb_per_cal: float
+    peak_mb: float
+
+
+def calibrate(rounds: int = CALIBRATION_ROUNDS) -> float:
+    """
+    Time the calibration workload.
+
+    The workload parses a synthetic document, decodes its page content and
+    writes it again, like the benchmarks, so that its speed follows theirs
+    from one machine to the next.
+
+    Parameters
+    ----------
+    rounds : int, optional
+        Number of timed runs (default is ``CALIBRATION_ROUNDS``).
+
+    Returns
+    -------
+    float
+        Seconds taken by the fastest run.
+    """
+    data = build_pdf(CALIBRATION_SPEC)
+
+    def workload() -> None:
+        reader = PdfReader(BytesIO(data))
+        writer = PdfWriter()
+        for page in reader.pages:
+            page.get_contents().get_data()
+            writer.add_page(page)
+        writer.write(BytesIO())
+
+    workload()
+    fastest = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        workload()
+        fastest = min(fastest, time.perf_counter() - started)
+    return fastest
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    """
+    Load a stored baseline file.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the JSON baseline.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Metrics keyed by benchmark name; empty if the file does not exist.
+    """
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def find_regressions(
+    sample: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Compare a sample against its baseline.
+
+    Parameters
+    ----------
+    sample : Dict[str, float]
+        Metrics of the current run.
+    baseline : Dict[str, float]
+        Stored metrics for the same benchmark.
+    tolerance : float
+        Allowed relative slack, e.g. ``0.25`` for 25%.
+
+    Returns
+    -------
+    Dict[str, Tuple[float, float]]
+        ``{metric: (current, baseline)}`` for every regressed metric.
+    """
+    regressions = {}
+    for metric, expected in baseline.items():
+        if metric not in GATED_METRICS or metric not in sample or not expected:
+            continue
+        current = sample[metric]
+        if metric in HIGHER_IS_BETTER:
+            regressed = current < expected * (1 - tolerance)
+        else:
+            regressed = current > expected * (1 + tolerance)
+        if regressed:
+            regressions[metric] = (current, expected)
+    return regressions
+
+
+class PerfTracker:
+    """
+    Run a benchmark and record throughput and peak memory.
+
+    Parameters
+    ----------
+    benchmark : Any
+        The pytest-benchmark fixture.
+    name : str
+        Stable key of this benchmark in the baseline file.
+    config : pytest.Config
+        The pytest config, used for the ``--perf-*`` options and to keep the
+        session's calibration.
+    """
+
+    def __init__(self, benchmark: Any, name: str, config: pytest.Config) -> None:
+        self.benchmark = benchmark
+        self.name = name
+        self.config = config
+        self.sample: Optional[PerfSample] = None
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        *,
+        pages: int,
+        nbytes: int,
+        setup: Optional[Callable[[], Any]] = None,
+        rounds: int = 3,
+        gated: bool = True,
+    ) -> Any:
+        """
+        Benchmark ``func`` and check the result against the baseline.
+
+        Parameters
+        ----------
+        func : Callable[..., Any]
+            The operation to measure. Receives the value returned by ``setup``
+            as its only argument when ``setup`` is given.
+        pages : int
+            Pages processed by one call, for pages/s.
+        nbytes : int
+            Bytes processed by one call, for MB/s.
+        setup : Callable[[], Any], optional
+            Untimed preparation run before every round.
+        rounds : int, optional
+            Number of timed rounds (default is 3).
+        gated : bool, optional
+            Whether to check the result against, and save it to, the
+            baseline (default is True). Benchmarks whose time is mostly
+            system calls do not follow the calibration, and are only
+            reported.
+
+        Returns
+        -------
+        Any
+            The return value of the last call to ``func``.
+        """
+
+        def prepare() -> Tuple[tuple, dict]:
+            return ((setup(),) if setup else ()), {}
+
+        # Peak memory is traced in a separate round so it does not skew timings
+        args, _ = prepare()
+        tracemalloc.start()
+        try:
+            func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        started = time.perf_counter()
+        result = self.benchmark.pedantic(
+            func, setup=prepare, rounds=rounds, iterations=1
+        )
+        # A disabled benchmark fixture runs the function once without stats
+        timed_rounds = 1 if getattr(self.benchmark, "disabled", False) else rounds
+        elapsed = (time.perf_counter() - started) / timed_rounds
+        stats = getattr(self.benchmark, "stats", None)
+        seconds = stats.stats.min if stats is not None else elapsed
+
+        if CALIBRATION not in self.config.stash:
+            self.config.stash[CALIBRATION] = calibrate()
+        per_cal = self.config.stash[CALIBRATION] / seconds if seconds else 0.0
+        self.sample = PerfSample(
+            seconds=seconds,
+            pages_per_s=pages / seconds if seconds else 0.0,
+            mb_per_s=nbytes / 1e6 / seconds if seconds else 0.0,
+            pages_per_cal=pages * per_cal,
+            mb_per_cal=nbytes / 1e6 * per_cal,
+            peak_mb=peak / 1e6,
+        )
+        self.benchmark.extra_info.update(asdict(self.sample))
+        if gated:
+            self._check()
+        return result
+
+    def _check(self) -> None:
+        assert self.sample is not None
+        sample = asdict(self.sample)
+        recorded = self.config.stash.setdefault(PERF_RESULTS, {})
+        recorded[self.name] = {metric: sample[metric] for metric in GATED_METRICS}
+
+        baseline_path = self.config.getoption("--perf-baseline")
+        if not baseline_path:
+            return
+        expected = load_baseline(Path(baseline_path)).get(self.name)
+        if not expected:
+            return
+        regressions = find_regressions(
+            sample, expected, self.config.getoption("--perf-tolerance")
+        )
+        if regressions:
+            details = ", ".join(
+                f"{metric}: {current:.2f} vs baseline {base:.2f}"
+                for metric, (current, base) in regressions.items()
+            )
+            pytest.fail(f"Performance regression in {self.name}: {details}")
+
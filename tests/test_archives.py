@@ -0,0 +1,206 @@
+"""
+Tests for PDFusion archive inputs.
+
+This module contains tests for discovering and merging the PDF files stored
+in ZIP and tar archives, in name or archive order, and for reading members
+without extracting the archive.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import io
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import patch
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfusion import MergeOptions, discover_pdfs, merge_pdfs
+from pdfusion.archives import list_members, open_member
+from pdfusion.catalog import open_input
+from pdfusion.exceptions import NoPDFsFoundError, PDFusionError
+from pdfusion.pdfusion import main
+from tests.corpus import CorpusSpec, generate_corpus
+
+
+def _archive(directory: Path, kind: str, files: List[Path]) -> Path:
+    # The files stored in reverse order, below a folder
+    if kind.startswith("zip"):
+        path = directory / "inputs.zip"
+        compression = zipfile.ZIP_DEFLATED if kind == "zip-deflated" else 0
+        with zipfile.ZipFile(path, "w", compression) as archive:
+            for file in reversed(files):
+                archive.write(file, f"batch/{file.name}")
+        return path
+    path = directory / ("inputs.tar.gz" if kind == "tar-gz" else "inputs.tar")
+    with tarfile.open(path, "w:gz" if kind == "tar-gz" else "w") as archive:
+        for file in reversed(files):
+            archive.add(file, f"batch/{file.name}")
+    return path
+
+
+def _texts(path: Path) -> List[str]:
+    return [page.extract_text() for page in PdfReader(path).pages]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        MergeOptions(),
+        MergeOptions(prefetch_depth=2),
+        MergeOptions(checkpoint_every=2),
+        MergeOptions(reduce_fanout=2, workers=1),
+    ],
+    ids=["plain", "prefetch", "checkpoint", "tree"],
+)
+@pytest.mark.parametrize("kind", ["zip-stored", "zip-deflated", "tar", "tar-gz"])
+def test_archive_merge(tmp_path: Path, kind: str, options: MergeOptions) -> None:
+    """
+    Test that merging an archive matches merging its files from a directory.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    kind : str
+        Archive format to store the inputs in.
+    options : MergeOptions
+        How to merge.
+
+    Returns
+    -------
+    None
+    """
+    files = generate_corpus(tmp_path / "in", CorpusSpec(files=5))
+    archive = _archive(tmp_path, kind, files)
+    expected = merge_pdfs(discover_pdfs(tmp_path / "in"), "expected.pdf")
+
+    result = merge_pdfs(archive, "out.pdf", options=options)
+    # Written next to the archive, from its files sorted by name
+    assert result.output_path == tmp_path / "out.pdf"
+    assert _texts(result.output_path) == _texts(expected.output_path)
+    assert result.files_merged == expected.files_merged == 5
+    assert result.input_pages == expected.input_pages
+
+
+def test_archive_order(tmp_path: Path) -> None:
+    """
+    Test discovery of archive members in name and stored order.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    files = generate_corpus(tmp_path / "in", CorpusSpec(files=3))
+    archive = _archive(tmp_path, "zip-stored", files)
+    with zipfile.ZipFile(archive, "a") as z:
+        z.writestr("__MACOSX/batch/._doc_0.pdf", b"resource fork")
+        z.writestr("batch/notes.txt", b"not a PDF")
+        z.writestr("batch/", b"")
+
+    catalog = discover_pdfs(archive)
+    assert catalog.archive == "inputs.zip" and catalog.directory == tmp_path
+    assert [item.name for item in catalog] == [f"batch/{f.name}" for f in files]
+    assert catalog.paths[0] == archive / "batch" / files[0].name
+    item = catalog[0]
+    assert item.size == files[0].stat().st_size
+    assert item.fingerprint.startswith("inputs.zip/batch/")
+    with open_input(item) as f:
+        assert f.read() == files[0].read_bytes()
+    # Member paths lie below the archive, where nothing can be opened
+    with pytest.raises(OSError):
+        open(item, "rb")
+
+    stored = discover_pdfs(archive, archive_order=True)
+    assert [item.name for item in stored] == [
+        f"batch/{f.name}" for f in reversed(files)
+    ]
+    assert stored[1:].archive == "inputs.zip"
+    assert stored[1:].paths == stored.paths[1:]
+
+
+def test_open_member_in_place(tmp_path: Path) -> None:
+    """
+    Test that opening a member reads nothing of the other members.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    files = generate_corpus(tmp_path / "in", CorpusSpec(files=3))
+    stored = _archive(tmp_path, "zip-stored", files)
+    (tmp_path / "deflated").mkdir()
+    deflated = _archive(tmp_path / "deflated", "zip-deflated", files)
+    opened: List[str] = []
+    original = zipfile.ZipFile.open
+
+    def record(self: zipfile.ZipFile, name: Any, *args: Any, **kwargs: Any) -> Any:
+        opened.append(getattr(name, "filename", name))
+        return original(self, name, *args, **kwargs)
+
+    with patch.object(zipfile.ZipFile, "open", record):
+        # Stored members are read in place, as a window onto the archive
+        with open_member(stored, "batch/doc_1.pdf") as f:
+            assert isinstance(f, io.BufferedReader)
+            assert f.name == "batch/doc_1.pdf"
+            f.seek(-5, io.SEEK_END)
+            assert f.read() == files[1].read_bytes()[-5:]
+            f.seek(0)
+            assert f.read() == files[1].read_bytes()
+        assert opened == []
+        # Compressed members are decompressed one at a time
+        with open_member(deflated, "batch/doc_2.pdf") as f:
+            assert f.read() == files[2].read_bytes()
+        assert opened == ["batch/doc_2.pdf"]
+    with pytest.raises(KeyError):
+        open_member(stored, "batch/missing.pdf")
+    assert [member.name for member in list_members(deflated)][0] == "batch/doc_2.pdf"
+
+
+def test_archive_errors_and_cli(tmp_path: Path, capsysbinary) -> None:
+    """
+    Test archive discovery errors, and merging an archive to stdout.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    capsysbinary : pytest.CaptureFixture
+        Fixture to capture binary stdout and stderr.
+
+    Returns
+    -------
+    None
+    """
+    files = generate_corpus(tmp_path / "in", CorpusSpec(files=3))
+    with pytest.raises(PDFusionError, match="Not a directory"):
+        discover_pdfs(files[0])
+    empty = tmp_path / "empty.tar"
+    with tarfile.open(empty, "w") as archive:
+        archive.add(tmp_path / "in", "in", recursive=False)
+    with pytest.raises(NoPDFsFoundError):
+        discover_pdfs(empty)
+
+    archive = _archive(tmp_path, "tar", files)
+    test_args = ["pdfusion", str(archive), "--archive-order", "-o", "-"]
+    with patch.object(sys, "argv", test_args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+    output = capsysbinary.readouterr().out
+    pages = [page.extract_text() for page in PdfReader(io.BytesIO(output)).pages]
+    assert pages == [text for f in reversed(files) for text in _texts(f)]
@@ -0,0 +1,155 @@
+"""
+Tests for PDFusion auto-tuned merges.
+
+This module contains tests for choosing the batch size and concurrency of a
+tree merge from input sizes and measured throughput, and for merging with
+them.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfusion import MergeOptions, discover_pdfs, merge_pdfs
+from pdfusion.autotune import (
+    MAX_BATCH,
+    MIN_BATCH,
+    MIN_PARALLEL_BYTES,
+    MIN_PARALLEL_INPUTS,
+    AutoTuner,
+    worth_parallel,
+)
+from tests.corpus import CorpusSpec, generate_corpus
+
+
+def test_autotuner_batches() -> None:
+    """
+    Test that batches follow input sizes, workers, memory and throughput.
+
+    Returns
+    -------
+    None
+    """
+    # Thousands of tiny inputs: large batches, but enough for every worker
+    tiny = AutoTuner([20_000] * 10_000, workers=8)
+    assert tiny.concurrency == 8
+    assert tiny.batch == 10_000 // (8 * 4) + 1
+
+    # A few giant scans: small batches, and only as many as memory allows
+    giant = AutoTuner([400 << 20] * 6, workers=8, memory_budget=4 << 30)
+    assert giant.batch == MIN_BATCH
+    assert giant.max_workers == giant.concurrency == 1
+    assert "batches of 2 on 1 worker" in giant.decisions[0]
+
+    # Fast tasks grow batches, slow ones shrink them
+    tuner = AutoTuner([100_000] * 100_000, workers=1)
+    first = tuner.batch
+    tuner.record(nbytes=first * 100_000, pages=first, seconds=0.01)
+    assert tuner.batch == MAX_BATCH
+    for _ in range(20):
+        tuner.record(nbytes=MAX_BATCH * 100_000, pages=MAX_BATCH, seconds=1000.0)
+    assert tuner.batch == MIN_BATCH
+    assert tuner.decisions[-1].startswith("measured 0.1 MB/s per worker")
+
+
+def test_autotuner_concurrency() -> None:
+    """
+    Test that concurrency steps down while pages per second rise.
+
+    The first window, slowed by starting the pool, is not compared.
+
+    Returns
+    -------
+    None
+    """
+    clock = [0.0]
+    with patch("pdfusion.autotune.perf_counter", lambda: clock[0]):
+        tuner = AutoTuner([1_000] * 1_000, workers=4)
+
+        def window(seconds: float) -> None:
+            workers = tuner.concurrency
+            for _ in range(workers):
+                clock[0] += seconds / workers
+                tuner.record(nbytes=1_000, pages=100, seconds=0.1)
+
+        # Warming up at 100 pages per second sheds no worker
+        window(4.0)
+        assert tuner.concurrency == 4
+        assert tuner.decisions[-1] == "100 pages/s while warming up; not compared"
+        # 400 pages per second on 4 workers, 500 on 3, then 400 on 2
+        for seconds in (1.0, 0.6, 0.5):
+            window(seconds)
+    assert tuner.concurrency == 3
+    assert tuner.decisions[-1].endswith("keeping 3 workers")
+
+    # Once settled, nothing changes
+    decisions = len(tuner.decisions)
+    for _ in range(10):
+        tuner.record(nbytes=1_000, pages=100, seconds=0.1)
+    assert tuner.concurrency == 3 and len(tuner.decisions) == decisions
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merge_autotune(tmp_path: Path, workers: int) -> None:
+    """
+    Test that auto-tuned merges have the pages of a serial merge.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    workers : int
+        Most worker processes to use.
+
+    Returns
+    -------
+    None
+    """
+    generate_corpus(tmp_path / "in", CorpusSpec(files=24, pages_per_file=2))
+    inputs = discover_pdfs(tmp_path / "in")
+    serial = merge_pdfs(inputs, "serial.pdf")
+
+    options = MergeOptions(autotune=True, workers=workers, page_index=True)
+    with patch("pdfusion.autotune.logger") as logger, patch(
+        "pdfusion.autotune.MIN_PARALLEL_INPUTS", 16
+    ):
+        result = merge_pdfs(inputs, "tuned.pdf", options=options)
+    assert logger.info.call_args[0][0].startswith("Auto-tuning: ")
+    assert "24 inputs of median" in logger.info.call_args_list[0][0][0]
+    assert result.input_pages == serial.input_pages
+    texts = [
+        [page.extract_text() for page in PdfReader(path).pages]
+        for path in (serial.output_path, result.output_path)
+    ]
+    assert texts[0] == texts[1]
+
+
+def test_merge_autotune_small(tmp_path: Path) -> None:
+    """
+    Test that auto-tuning merges a few small inputs without a worker pool.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    generate_corpus(tmp_path / "in", CorpusSpec(files=3))
+    options = MergeOptions(autotune=True, workers=2)
+    with patch("pdfusion.pdfusion.merge_tree", side_effect=AssertionError), patch(
+        "pdfusion.autotune.logger"
+    ) as logger:
+        result = merge_pdfs(tmp_path / "in", "tuned.pdf", options=options)
+    assert result.files_merged == 3
+    assert logger.info.call_args[0][0].endswith("merging in one process")
+    assert not worth_parallel(MIN_PARALLEL_INPUTS - 1, MIN_PARALLEL_BYTES - 1)
+    assert worth_parallel(MIN_PARALLEL_INPUTS, 0)
+    assert worth_parallel(MIN_BATCH + 1, MIN_PARALLEL_BYTES)
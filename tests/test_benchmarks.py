@@ -0,0 +1,453 @@
+"""
+Regression benchmarks for PDFusion on realistic synthetic corpora.
+
+This module benchmarks discovery, parsing, merging and writing at several
+corpus scales, recording pages/s, MB/s and peak memory for each. Run with
+``--perf-baseline tests/benchmarks/baseline.json`` to fail on regressions and
+``--perf-save-baseline`` to refresh the stored numbers.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import builtins
+import io
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject
+
+from pdfusion import MergeOptions, merge_pdfs, merge_streams
+from pdfusion.catalog import Catalog
+from pdfusion.compression import compress_streams
+from pdfusion.pdfusion import get_pdf_files
+from tests.corpus import SCALES
+
+pytestmark = pytest.mark.benchmark
+
+SCALE_PARAMS = [
+    "small",
+    "medium",
+    pytest.param("large", marks=pytest.mark.slow),
+]
+
+OUTLINE_PARAMS = [
+    pytest.param(entries, fanout, id=f"{entries}-fanout{fanout}", marks=marks)
+    for entries, marks in ((1_000, ()), (12_000, pytest.mark.slow))
+    for fanout in (0, 32)
+]
+
+# Round trip added to every open and read, like network storage
+STORAGE_LATENCY = 0.002
+
+
+class _SlowFileIO(io.FileIO):
+    def readinto(self, buffer: Any) -> Any:
+        time.sleep(STORAGE_LATENCY)
+        return super().readinto(buffer)
+
+    def readall(self) -> bytes:
+        time.sleep(STORAGE_LATENCY)
+        return super().readall()
+
+
+def _corpus_bytes(paths: List[Path]) -> int:
+    return sum(path.stat().st_size for path in paths)
+
+
+@pytest.mark.parametrize("scale", SCALE_PARAMS)
+def test_discovery(scale: str, corpora: Dict[str, List[Path]], perf) -> None:
+    """
+    Benchmark PDF discovery.
+
+    Listing takes microseconds, mostly in system calls, so it is reported
+    but not checked against the baseline.
+
+    Parameters
+    ----------
+    scale : str
+        Corpus scale name.
+    corpora : Dict[str, List[Path]]
+        Session-scoped synthetic corpora.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    paths = corpora[scale]
+    files = perf.run(
+        lambda: get_pdf_files(paths[0].parent),
+        pages=SCALES[scale].total_pages,
+        nbytes=_corpus_bytes(paths),
+        rounds=10,
+        gated=False,
+    )
+    assert len(files) == len(paths)
+
+
+@pytest.mark.parametrize(
+    "entries", [100_000, pytest.param(1_000_000, marks=pytest.mark.slow)]
+)
+def test_catalog_memory(entries: int, perf) -> None:
+    """
+    Benchmark cataloguing inputs, checking memory per entry.
+
+    Parameters
+    ----------
+    entries : int
+        Number of inputs to catalog.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    listing = [
+        (f"document_{i:07d}.pdf", 250_000 + i, 1_700_000_000_000_000_000 + i)
+        for i in range(entries)
+    ]
+
+    def build() -> Catalog:
+        catalog = Catalog("/corpus")
+        catalog.extend(listing)
+        return catalog
+
+    catalog = perf.run(build, pages=0, nbytes=0, rounds=1)
+    assert len(catalog) == entries
+    # Names are 20 bytes; a Path and a stat result take over 500
+    assert perf.sample.peak_mb * 1e6 / entries < 64
+
+
+@pytest.mark.parametrize("scale", SCALE_PARAMS)
+def test_parse(scale: str, corpora: Dict[str, List[Path]], perf) -> None:
+    """
+    Benchmark parsing every input and decoding its page content.
+
+    Parameters
+    ----------
+    scale : str
+        Corpus scale name.
+    corpora : Dict[str, List[Path]]
+        Session-scoped synthetic corpora.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    paths = corpora[scale]
+
+    def parse() -> int:
+        pages = 0
+        for path in paths:
+            reader = PdfReader(path)
+            for page in reader.pages:
+                page["/Contents"].get_object().get_data()
+                pages += 1
+        return pages
+
+    pages = perf.run(
+        parse, pages=SCALES[scale].total_pages, nbytes=_corpus_bytes(paths)
+    )
+    assert pages == SCALES[scale].total_pages
+
+
+@pytest.mark.parametrize("scale", SCALE_PARAMS)
+def test_merge(scale: str, corpora: Dict[str, List[Path]], perf) -> None:
+    """
+    Benchmark the end-to-end ``merge_pdfs`` call.
+
+    Parameters
+    ----------
+    scale : str
+        Corpus scale name.
+    corpora : Dict[str, List[Path]]
+        Session-scoped synthetic corpora.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    paths = corpora[scale]
+    directory = paths[0].parent
+    output = directory / "benchmark_merged.pdf"
+
+    def clean() -> None:
+        output.unlink(missing_ok=True)
+
+    try:
+        result = perf.run(
+            lambda _: merge_pdfs(directory, output.name),
+            setup=clean,
+            pages=SCALES[scale].total_pages,
+            nbytes=_corpus_bytes(paths),
+        )
+    finally:
+        clean()
+    assert result.files_merged == len(paths)
+    assert result.total_pages == SCALES[scale].total_pages
+
+
+@pytest.mark.parametrize("depth", [0, 8])
+def test_merge_slow_storage(
+    depth: int, corpora: Dict[str, List[Path]], perf, monkeypatch
+) -> None:
+    """
+    Benchmark ``merge_pdfs`` with and without read-ahead on slow storage.
+
+    Most of the time is spent waiting on the simulated storage, so it is
+    reported but not checked against the baseline.
+
+    Parameters
+    ----------
+    depth : int
+        Number of inputs to prefetch; 0 reads inputs as they are parsed.
+    corpora : Dict[str, List[Path]]
+        Session-scoped synthetic corpora.
+    perf : PerfTracker
+        Throughput/memory tracker.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to slow down reads of the corpus.
+
+    Returns
+    -------
+    None
+    """
+    paths = corpora["small"]
+    directory = paths[0].parent
+    output = directory / "benchmark_merged.pdf"
+    real_open = builtins.open
+
+    def slow_open(file: Any, mode: str = "r", *args: Any, **kwargs: Any) -> Any:
+        if mode != "rb" or Path(file).parent != directory:
+            return real_open(file, mode, *args, **kwargs)
+        time.sleep(STORAGE_LATENCY)
+        return io.BufferedReader(_SlowFileIO(file))
+
+    def clean() -> None:
+        output.unlink(missing_ok=True)
+
+    monkeypatch.setattr(builtins, "open", slow_open)
+    options = MergeOptions(prefetch_depth=depth)
+    try:
+        result = perf.run(
+            lambda _: merge_pdfs(directory, output.name, options=options),
+            setup=clean,
+            pages=SCALES["small"].total_pages,
+            nbytes=_corpus_bytes(paths),
+            gated=False,
+        )
+    finally:
+        clean()
+    assert result.total_pages == SCALES["small"].total_pages
+
+
+@pytest.mark.parametrize("scale", SCALE_PARAMS)
+def test_write(scale: str, corpora: Dict[str, List[Path]], perf) -> None:
+    """
+    Benchmark serializing an already assembled merge.
+
+    Parameters
+    ----------
+    scale : str
+        Corpus scale name.
+    corpora : Dict[str, List[Path]]
+        Session-scoped synthetic corpora.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    paths = corpora[scale]
+
+    def assemble() -> PdfMerger:
+        merger = PdfMerger()
+        for path in paths:
+            merger.append(str(path))
+        return merger
+
+    def write(merger: PdfMerger) -> int:
+        buffer = BytesIO()
+        try:
+            merger.write(buffer)
+        finally:
+            merger.close()
+        return buffer.tell()
+
+    written = perf.run(
+        write,
+        setup=assemble,
+        pages=SCALES[scale].total_pages,
+        nbytes=_corpus_bytes(paths),
+    )
+    assert written > 0
+
+
+@pytest.mark.parametrize(
+    "threads, megabytes",
+    [(1, 32), (0, 32), pytest.param(0, 2048, marks=pytest.mark.slow)],
+)
+def test_compress(threads: int, megabytes: int, perf) -> None:
+    """
+    Benchmark Flate-compressing the unfiltered streams of an output.
+
+    Parameters
+    ----------
+    threads : int
+        Compression threads; 0 means one per CPU.
+    megabytes : int
+        Total size of the streams, spread over 64 of them.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    text = b"".join(
+        b"BT /F1 9 Tf 72 %d Td (Invoice line %d, amount %d) Tj ET\n"
+        % (i % 700, i, i * 7919 % 100_000)
+        for i in range(40_000)
+    )
+    size = megabytes * 1024 * 1024 // 64
+    streams = []
+    for index in range(64):
+        stream = DecodedStreamObject()
+        offset = index * 1009 % len(text)
+        stream.set_data((text[offset:] + text * (size // len(text) + 1))[:size])
+        streams.append(stream)
+
+    stats = perf.run(
+        lambda objects: compress_streams(objects, threads=threads),
+        setup=lambda: list(streams),
+        pages=0,
+        nbytes=64 * size,
+        rounds=1 if megabytes > 100 else 3,
+    )
+    assert stats.streams == 64
+    assert stats.bytes_after < stats.bytes_before / 4
+
+
+def _outlined_inputs(entries: int) -> List[BytesIO]:
+    # Three-page inputs with a nested outline of three items; with a bookmark
+    # for each, every input adds four outline entries
+    writer = PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(width=100, height=100)
+    chapter = writer.add_outline_item("Chapter 1", 0)
+    writer.add_outline_item("Section 1.1", 1, parent=chapter)
+    writer.add_outline_item("Chapter 2", 2)
+    buffer = BytesIO()
+    writer.write(buffer)
+    sources = []
+    for index in range(entries // 4):
+        source = BytesIO(buffer.getvalue())
+        source.name = f"invoice_{index:05}.pdf"  # type: ignore[attr-defined]
+        sources.append(source)
+    return sources
+
+
+@pytest.mark.parametrize("entries, fanout", OUTLINE_PARAMS)
+def test_outline_build(entries: int, fanout: int, perf) -> None:
+    """
+    Benchmark merging outlined inputs under a bookmark each.
+
+    Parameters
+    ----------
+    entries : int
+        Outline entries in the output, before any groups.
+    fanout : int
+        Most bookmarks per outline level; 0 keeps one flat list.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(bookmarks=True, bookmark_fanout=fanout)
+
+    def setup() -> List[BytesIO]:
+        return _outlined_inputs(entries)
+
+    result = perf.run(
+        lambda sources: merge_streams(sources, options=options),
+        setup=setup,
+        pages=entries // 4 * 3,
+        nbytes=sum(len(source.getvalue()) for source in setup()),
+        rounds=1 if entries > 1_000 else 3,
+    )
+    assert result.total_pages == entries // 4 * 3
+
+
+@pytest.mark.parametrize("entries, fanout", OUTLINE_PARAMS)
+def test_outline_open(entries: int, fanout: int, perf) -> None:
+    """
+    Benchmark opening a merged output and reading its top-level outline.
+
+    This is the work a viewer does before showing the outline pane.
+
+    Parameters
+    ----------
+    entries : int
+        Outline entries in the output, before any groups.
+    fanout : int
+        Most bookmarks per outline level; 0 keeps one flat list.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(bookmarks=True, bookmark_fanout=fanout)
+    data = merge_streams(_outlined_inputs(entries), options=options).output.getvalue()
+
+    def top_level() -> List[str]:
+        outline = PdfReader(BytesIO(data)).trailer["/Root"]["/Outlines"]
+        titles = []
+        item = outline.get("/First")
+        while item is not None:
+            item = item.get_object()
+            titles.append(item["/Title"])
+            item = item.get("/Next")
+        return titles
+
+    titles = perf.run(top_level, pages=entries // 4 * 3, nbytes=len(data))
+    assert len(titles) == entries // 4 if fanout == 0 else len(titles) <= fanout
+    assert titles[0].startswith("invoice_00000")
+
+
+def test_find_regressions() -> None:
+    """
+    Test the baseline comparison used to fail CI.
+
+    Returns
+    -------
+    None
+    """
+    from tests.perf import find_regressions
+
+    baseline = {"pages_per_cal": 100.0, "mb_per_cal": 10.0, "peak_mb": 50.0}
+
+    assert find_regressions(dict(baseline), baseline, 0.1) == {}
+    slower = {**baseline, "pages_per_cal": 80.0}
+    assert set(find_regressions(slower, baseline, 0.1)) == {"pages_per_cal"}
+    # Absolute speeds depend on the machine, and are never compared
+    elsewhere = {**baseline, "pages_per_s": 1.0, "seconds": 9.0}
+    assert find_regressions(elsewhere, {**elsewhere, "pages_per_s": 100.0}, 0.1) == {}
+    heavier = {**baseline, "peak_mb": 70.0}
+    assert set(find_regressions(heavier, baseline, 0.1)) == {"peak_mb"}
+    assert find_regressions(heavier, baseline, 0.5) == {}
@@ -0,0 +1,255 @@
+"""
+Tests for the PDFusion output cache.
+
+This module contains tests for reusing the output of an earlier merge of the
+same inputs, invalidation, eviction and deterministic output.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdfusion import (
+    MergeMetrics,
+    MergeOptions,
+    PasswordMap,
+    PDFusionPasswordError,
+    merge_pdfs,
+)
+from pdfusion.cache import CACHE_ENV, OutputCache
+from pdfusion.pdfusion import PdfusionMerger, main
+
+
+def test_cache_hit(sample_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test that merging unchanged inputs again is served from the cache.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    metrics = MergeMetrics()
+    options = MergeOptions(cache_dir=tmp_path / "cache", metrics=metrics)
+    first = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    content = first.output_path.read_bytes()
+
+    # The earlier output, left among the inputs, is not merged back in
+    second = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    assert second == first
+    assert second.files_merged == 3
+    assert second.total_pages == first.total_pages
+    assert second.output_path.read_bytes() == content
+    assert metrics.cache_hits.value == 1
+    assert metrics.merges.value == 2
+
+    # Served from the same file on disk, not a copy
+    [(key, size, _)] = OutputCache(tmp_path / "cache", 1 << 30).entries()
+    assert size == len(content)
+    cached = tmp_path / "cache" / "outputs" / f"{key}.pdf"
+    assert os.path.samefile(cached, second.output_path)
+
+
+def test_cache_cli(sample_pdfs: Path, tmp_path: Path, monkeypatch) -> None:
+    """
+    Test that running the CLI twice with the cache merges once.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture to set the cache directory.
+
+    Returns
+    -------
+    None
+    """
+    monkeypatch.setenv(CACHE_ENV, str(tmp_path / "cache"))
+    test_args = ["pdfusion", str(sample_pdfs), "-o", "merged.pdf", "--cache"]
+    with patch.object(sys, "argv", test_args), pytest.raises(SystemExit) as exc:
+        main()
+    assert exc.value.code == 0
+    content = (sample_pdfs / "merged.pdf").read_bytes()
+
+    # The second run finds the first's output among the inputs and merges
+    # nothing
+    merging = patch.object(PdfusionMerger, "append_files", side_effect=AssertionError)
+    with patch.object(sys, "argv", test_args), merging:
+        with pytest.raises(SystemExit) as exc:
+            main()
+    assert exc.value.code == 0
+    assert (sample_pdfs / "merged.pdf").read_bytes() == content
+    assert len(OutputCache(tmp_path / "cache", 1 << 30).entries()) == 1
+
+
+def test_cache_skips_encrypted_inputs(tmp_path: Path) -> None:
+    """
+    Test that a merge of encrypted inputs is never served from the cache.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    for i in range(2):
+        writer = PdfWriter()
+        writer.add_blank_page(width=100, height=100)
+        writer.encrypt("secret", use_128bit=True)
+        with open(inputs / f"doc_{i}.pdf", "wb") as f:
+            writer.write(f)
+    cache_dir = tmp_path / "cache"
+    unlocked = MergeOptions(
+        cache_dir=cache_dir, passwords=PasswordMap(fallback=["secret"])
+    )
+    first = merge_pdfs(inputs, "merged.pdf", options=unlocked)
+    assert first.total_pages == 2
+    assert OutputCache(cache_dir, 1 << 30).entries() == []
+    first.output_path.unlink()
+
+    # Without the password, the decrypted merge is not handed out
+    with pytest.raises(PDFusionPasswordError):
+        merge_pdfs(inputs, "merged.pdf", options=MergeOptions(cache_dir=cache_dir))
+    assert not first.output_path.exists()
+
+
+def test_cache_miss(sample_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test that changed inputs or options are merged again.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    metrics = MergeMetrics()
+    options = MergeOptions(cache_dir=tmp_path / "cache", metrics=metrics)
+    merge_pdfs(sample_pdfs, "merged.pdf", options=options).output_path.unlink()
+
+    changed = sample_pdfs / "test_2.pdf"
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    merge_pdfs(sample_pdfs, "merged.pdf", options=options).output_path.unlink()
+
+    options.digest = "md5"
+    result = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    assert len(result.digest) == 32
+    assert metrics.cache_hits.value == 0
+    assert len(OutputCache(tmp_path / "cache", 1 << 30).entries()) == 3
+
+
+def test_cache_discards_modified_entry(sample_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test that an output edited in place through its hard link is not served.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(cache_dir=tmp_path / "cache")
+    result = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    content = result.output_path.read_bytes()
+    with open(result.output_path, "ab") as f:
+        f.write(b"% edited\n")
+    result.output_path.unlink()
+
+    again = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    assert again.output_path.read_bytes() == content
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    """
+    Test that least recently used entries are evicted above the size cap.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    cache = OutputCache(tmp_path / "cache", max_bytes=250)
+
+    def output(key: str, size: int) -> Path:
+        # A new file per entry: entries are hard links to what was stored
+        path = tmp_path / f"{key}.pdf"
+        path.write_bytes(b"x" * size)
+        return path
+
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.store(key, output(key, 100), {"files_merged": index})
+        # Distinct last-use times even on coarse clocks
+        meta = tmp_path / "cache" / "outputs" / f"{key}.json"
+        os.utime(meta, ns=(0, index * 10**9))
+    assert [key for key, _, _ in cache.entries()] == ["b", "c"]
+
+    assert cache.fetch("b", tmp_path / "hit.pdf") == {"files_merged": 1}
+    cache.store("d", output("d", 100), {})
+    assert [key for key, _, _ in cache.entries()] == ["b", "d"]
+    assert cache.fetch("c", tmp_path / "miss.pdf") is None
+
+    cache.store("e", output("e", 300), {})
+    assert [key for key, _, _ in cache.entries()] == ["b", "d"]
+
+
+def test_deterministic_output(sample_pdfs: Path) -> None:
+    """
+    Test that the same inputs produce the same bytes, with a stable /ID.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    first = merge_pdfs(sample_pdfs, "first.pdf")
+    first.output_path.unlink()
+    second = merge_pdfs(sample_pdfs, "second.pdf")
+    assert second.digest == first.digest
+
+    reader = PdfReader(second.output_path)
+    original, current = reader.trailer["/ID"]
+    assert original == current and len(original) == 16
+
+    second.output_path.unlink()
+    parts = merge_pdfs(sample_pdfs, "parts.pdf", options=MergeOptions(checkpoint_every=2))
+    assert PdfReader(parts.output_path).trailer["/ID"][0] == original
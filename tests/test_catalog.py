@@ -0,0 +1,182 @@
+"""
+Tests for the PDFusion input catalog.
+
+This module contains tests for discovering inputs into a catalog, recording
+validation results, and reusing what discovery recorded in later stages.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+import pickle
+import tracemalloc
+from pathlib import Path
+
+from pdfusion import inspect_pdfs, merge_pdfs
+from pdfusion.catalog import Catalog, InputStatus, PdfInput, as_input, discover_pdfs
+from pdfusion.checkpoint import fingerprint_inputs
+from pdfusion.scheduler import BASE_FOOTPRINT, estimate_footprint
+
+
+def test_discover_pdfs(sample_pdfs: Path) -> None:
+    """
+    Test that discovery records each PDF file's size and modification time.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    (sample_pdfs / "A_first.pdf").write_bytes(b"%PDF-1.4\n")
+    (sample_pdfs / "notes.txt").write_text("not a pdf")
+
+    catalog = discover_pdfs(sample_pdfs)
+    assert [item.name for item in catalog] == [
+        "A_first.pdf",
+        "test_1.pdf",
+        "test_2.pdf",
+        "test_3.pdf",
+    ]
+    for item in catalog:
+        stat = item.path.stat()
+        assert (item.size, item.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+        assert item.status is InputStatus.UNKNOWN and item.pages is None
+
+    # Records stand in for paths
+    first = catalog[0]
+    with open(first, "rb") as f:
+        assert f.read() == b"%PDF-1.4\n"
+    assert str(first) == str(sample_pdfs / "A_first.pdf")
+    assert catalog[-1] == catalog[3]
+    assert catalog.total_bytes == sum(item.size for item in catalog)
+
+
+def test_catalog_slices_and_records(tmp_path: Path) -> None:
+    """
+    Test recording validation results, subsetting and pickling a catalog.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    catalog = Catalog(tmp_path)
+    catalog.extend((f"doc_{i}.pdf", i * 100, i) for i in range(6))
+    catalog.record(2, InputStatus.VALID, pages=7, version="1.7")
+    catalog.record(3, InputStatus.INVALID, version="%PDF-garbage")
+
+    assert catalog[2] == PdfInput(
+        tmp_path, "doc_2.pdf", 200, 2, 7, "1.7", InputStatus.VALID
+    )
+    assert catalog[3].version is None and catalog[3].status is InputStatus.INVALID
+
+    subset = catalog[1:5:2]
+    assert isinstance(subset, Catalog)
+    assert list(subset) == [catalog[1], catalog[3]]
+    rest = catalog.without({"doc_2.pdf", "doc_4.pdf", "other.pdf"})
+    assert list(rest) == [catalog[i] for i in (0, 1, 3, 5)]
+    assert list(pickle.loads(pickle.dumps(catalog))) == list(catalog)
+
+
+def test_catalog_reuses_discovery(sample_pdfs: Path, monkeypatch) -> None:
+    """
+    Test that fingerprinting and footprint estimates do not stat inputs again.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Pytest monkeypatch fixture.
+
+    Returns
+    -------
+    None
+    """
+    catalog = discover_pdfs(sample_pdfs)
+    expected = fingerprint_inputs(catalog.paths)
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("input stat'ed again")
+
+    monkeypatch.setattr(Path, "stat", no_stat)
+    monkeypatch.setattr(os, "stat", no_stat)
+    assert fingerprint_inputs(catalog) == expected
+    footprint = estimate_footprint(catalog[0], overhead=1.0)
+    assert footprint == BASE_FOOTPRINT + catalog[0].size
+    monkeypatch.undo()
+
+    assert as_input(catalog[0].path) == catalog[0]
+
+
+def test_catalog_through_stages(sample_pdfs: Path) -> None:
+    """
+    Test that inspection fills in a catalog which is then merged.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    catalog = discover_pdfs(sample_pdfs)
+    inspection = inspect_pdfs(catalog, workers=1)
+    assert [item.pages for item in catalog] == [
+        stats.pages for stats in inspection.files
+    ]
+    assert {item.status for item in catalog} == {InputStatus.VALID}
+    assert [item.version for item in catalog] == [
+        stats.version for stats in inspection.files
+    ]
+    assert catalog[0].version is not None
+
+    result = merge_pdfs(catalog, "merged.pdf")
+    assert result.output_path.parent == sample_pdfs
+    assert result.files_merged == 3
+    assert result.total_pages == inspection.total_pages
+
+
+def test_catalog_memory(tmp_path: Path) -> None:
+    """
+    Test that a catalog takes a fraction of the memory of paths and stats.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    count = 20_000
+    stat = tmp_path.stat()
+    names = [f"document_{i:07d}.pdf" for i in range(count)]
+
+    tracemalloc.start()
+    try:
+        paths = [(tmp_path / name, os.stat(tmp_path)) for name in names]
+        as_paths, _ = tracemalloc.get_traced_memory()
+        del paths
+        start, _ = tracemalloc.get_traced_memory()
+        catalog = Catalog(tmp_path)
+        catalog.extend((name, stat.st_size, stat.st_mtime_ns) for name in names)
+        as_catalog = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    assert as_catalog < 64 * count
+    assert as_catalog * 5 < as_paths
+    assert catalog.nbytes() <= as_catalog
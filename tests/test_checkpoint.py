@@ -0,0 +1,220 @@
+"""
+Tests for PDFusion checkpointed merges.
+
+This module contains tests for merging in journaled parts, assembling the
+parts into the final output, and resuming interrupted merges.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+import pdfusion.checkpoint as checkpoint
+from pdfusion import MergeOptions, PDFusionError, merge_pdfs
+from pdfusion.checkpoint import JOURNAL_NAME, checkpoint_dir, write_part
+
+
+def _heights(path: Path) -> List[int]:
+    return [int(page.mediabox.height) for page in PdfReader(path).pages]
+
+
+def _interrupt_after(monkeypatch, parts: int) -> List[int]:
+    # Let `parts` parts through, then fail like a Ctrl-C would
+    written: List[int] = []
+
+    def flaky(journal, paths, first_input, options, **kwargs):
+        if len(written) == parts:
+            raise KeyboardInterrupt
+        written.append(first_input)
+        return write_part(journal, paths, first_input, options, **kwargs)
+
+    monkeypatch.setattr(checkpoint, "write_part", flaky)
+    return written
+
+
+def test_checkpointed_merge(outlined_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test that a merge in parts matches a plain merge.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    plain = merge_pdfs(outlined_pdfs, "plain.pdf")
+    plain.output_path.rename(tmp_path / "plain.pdf")
+    result = merge_pdfs(
+        outlined_pdfs,
+        "parts.pdf",
+        options=MergeOptions(checkpoint_every=3, page_tree_fanout=2),
+    )
+
+    assert result.files_merged == 11
+    assert result.total_pages == plain.total_pages == 21
+    assert _heights(result.output_path) == _heights(tmp_path / "plain.pdf")
+    assert not checkpoint_dir(result.output_path).exists()
+
+    reader = PdfReader(result.output_path, strict=True)
+    bookmarks = [
+        (item.title, reader.get_destination_page_number(item))
+        for item in reader.outline
+    ]
+    starts = [sum(i % 3 + 1 for i in range(n)) for n in range(11)]
+    assert bookmarks == [(f"doc {i}", starts[i] + i % 3) for i in range(11)]
+    assert len(reader.named_destinations) == 11
+
+
+def test_checkpointed_dests_sorted(tmp_path: Path) -> None:
+    """
+    Test that the parts' named destinations are sorted as in a plain merge.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    for i, name in enumerate(["zeta", "alpha", "mid", "beta"]):
+        writer = PdfWriter()
+        writer.add_blank_page(width=100, height=100)
+        writer.add_named_destination(name, 0)
+        with open(inputs / f"doc_{i}.pdf", "wb") as f:
+            writer.write(f)
+
+    plain = merge_pdfs(inputs, str(tmp_path / "plain.pdf"))
+    parts = merge_pdfs(
+        inputs, str(tmp_path / "parts.pdf"), options=MergeOptions(checkpoint_every=2)
+    )
+    expected = list(PdfReader(plain.output_path).named_destinations)
+    assert expected == ["alpha", "beta", "mid", "zeta"]
+    assert list(PdfReader(parts.output_path).named_destinations) == expected
+
+
+def test_resume(outlined_pdfs: Path, monkeypatch) -> None:
+    """
+    Test that an interrupted merge resumes after its last checkpoint.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to interrupt the merge.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(checkpoint_every=3)
+    written = _interrupt_after(monkeypatch, 2)
+    with pytest.raises(KeyboardInterrupt):
+        merge_pdfs(outlined_pdfs, options=options)
+    assert written == [0, 3]
+
+    # Resume without an output name picks up the timestamped checkpoint
+    written = _interrupt_after(monkeypatch, 10)
+    result = merge_pdfs(outlined_pdfs, options=options, resume=True)
+
+    assert written == [6, 9]
+    assert result.total_pages == 21
+    heights = [100 * (i + 1) + j for i in range(11) for j in range(i % 3 + 1)]
+    assert _heights(result.output_path) == heights
+    assert len(PdfReader(result.output_path).outline) == 11
+
+
+def test_resume_recovery(outlined_pdfs: Path, monkeypatch) -> None:
+    """
+    Test resuming with a lost part, a torn journal line and changed inputs.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to interrupt the merge.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(checkpoint_every=2)
+    _interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=options)
+
+    directory = checkpoint_dir(outlined_pdfs / "out.pdf")
+    (directory / "part_00002.pdf").unlink()
+    with open(directory / JOURNAL_NAME, "a") as f:
+        f.write('{"part": "part_0000')
+    written = _interrupt_after(monkeypatch, 10)
+    result = merge_pdfs(outlined_pdfs, "out.pdf", options=options, resume=True)
+    assert written == [4, 6, 8, 10]
+    assert result.total_pages == 21
+
+    _interrupt_after(monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=options)
+    header = json.loads((directory / JOURNAL_NAME).read_text().splitlines()[0])
+    assert header["chunk_size"] == 2
+    (outlined_pdfs / "doc_05.pdf").write_bytes(b"%PDF-1.3\n")
+    with pytest.raises(PDFusionError, match="different inputs"):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=options, resume=True)
+
+
+def test_resume_torn_journal_and_options(outlined_pdfs: Path, monkeypatch) -> None:
+    """
+    Test resuming twice after a torn journal line, and with changed options.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to interrupt the merge.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(checkpoint_every=2)
+    _interrupt_after(monkeypatch, 2)
+    with pytest.raises(KeyboardInterrupt):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=options)
+    directory = checkpoint_dir(outlined_pdfs / "out.pdf")
+    with open(directory / JOURNAL_NAME, "a") as f:
+        f.write('{"part": "part_0000')
+
+    # The part recorded after the torn line is kept on the next resume
+    written = _interrupt_after(monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=options, resume=True)
+    assert written == [4]
+    lines = (directory / JOURNAL_NAME).read_text().splitlines()
+    assert [json.loads(line).get("first_input") for line in lines] == [
+        None, 0, 2, 4
+    ]
+
+    changed = MergeOptions(checkpoint_every=2, drop_duplicate_pages=True)
+    with pytest.raises(PDFusionError, match="different drop_duplicate_pages"):
+        merge_pdfs(outlined_pdfs, "out.pdf", options=changed, resume=True)
+    written = _interrupt_after(monkeypatch, 10)
+    result = merge_pdfs(outlined_pdfs, "out.pdf", options=options, resume=True)
+    assert written == [6, 8, 10]
+    assert result.total_pages == 21
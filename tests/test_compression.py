@@ -0,0 +1,132 @@
+"""
+Tests for PDFusion output stream compression.
+
+This module contains tests for deflating data in chunks compressed by a
+thread pool, and for compressing unfiltered streams of merged outputs.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, NameObject
+
+from pdfusion import MergeOptions, PDFusionError, ReaderCache, merge_pdfs
+from pdfusion.compression import adler32_combine, deflate
+
+
+def _write_uncompressed(path: Path, lines: int = 2000) -> None:
+    # One page drawing text from an unfiltered content stream
+    writer = PdfWriter()
+    page = PageObject.create_blank_page(width=612, height=792)
+    content = DecodedStreamObject()
+    name = path.stem.encode()
+    content.set_data(
+        b"".join(
+            b"BT /F1 9 Tf 72 %d Td (Line %d of %s) Tj ET\n" % (i % 700, i, name)
+            for i in range(lines)
+        )
+    )
+    page[NameObject("/Contents")] = content
+    writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+@pytest.mark.parametrize("chunk_size", [1000, 64 * 1024, 1 << 20])
+def test_deflate_chunks(chunk_size: int) -> None:
+    """
+    Test that chunked output is one zlib stream, whoever compresses it.
+
+    Parameters
+    ----------
+    chunk_size : int
+        Bytes compressed per task.
+
+    Returns
+    -------
+    None
+    """
+    data = os.urandom(50_000) + b"compressible " * 40_000
+    with ThreadPoolExecutor(3) as pool:
+        threaded = deflate(data, chunk_size=chunk_size, pool=pool)
+    assert threaded == deflate(data, chunk_size=chunk_size)
+    assert zlib.decompress(threaded) == data
+    assert zlib.decompress(deflate(b"", 9)) == b""
+    if chunk_size >= 64 * 1024:
+        # Chunks primed with the data before them lose little
+        assert len(threaded) < len(zlib.compress(data)) * 1.01
+
+    first, second = data[:12345], data[12345:]
+    assert adler32_combine(
+        zlib.adler32(first), zlib.adler32(second), len(second)
+    ) == zlib.adler32(data)
+
+
+def test_compress_streams(tmp_path: Path) -> None:
+    """
+    Test that unfiltered streams are compressed in every kind of merge.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    for index in range(3):
+        _write_uncompressed(tmp_path / f"doc_{index}.pdf")
+    plain = merge_pdfs(tmp_path, "plain.pdf")
+    texts = [page.extract_text() for page in PdfReader(plain.output_path).pages]
+    plain.output_path.unlink()
+
+    digests = set()
+    for options in (
+        MergeOptions(compress_level=6, compress_threads=1),
+        MergeOptions(compress_level=6, compress_threads=3),
+        MergeOptions(compress_level=6, checkpoint_every=2),
+    ):
+        result = merge_pdfs(tmp_path, "small.pdf", options=options)
+        assert result.bytes_written < plain.bytes_written / 4
+        reader = PdfReader(result.output_path)
+        assert [page.extract_text() for page in reader.pages] == texts
+        assert all(
+            page["/Contents"]["/Filter"] == "/FlateDecode" for page in reader.pages
+        )
+        digests.add(result.digest)
+        result.output_path.unlink()
+    # Serial and checkpointed outputs differ in layout, not in thread count
+    assert len(digests) == 2
+
+
+def test_compress_streams_shared_readers(tmp_path: Path) -> None:
+    """
+    Test that compressing leaves cached readers and bad levels alone.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    path = tmp_path / "doc.pdf"
+    _write_uncompressed(path)
+    cache = ReaderCache()
+    options = MergeOptions(compress_level=9, reader_cache=cache)
+    merge_pdfs(tmp_path, "first.pdf", options=options).output_path.unlink()
+    content = cache.fetch(path).pages[0]["/Contents"]
+    assert "/Filter" not in content and content.get_data().startswith(b"BT")
+
+    with pytest.raises(PDFusionError, match="Compression level"):
+        merge_pdfs(tmp_path, options=MergeOptions(compress_level=10))
@@ -0,0 +1,222 @@
+"""
+Tests for PDFusion encrypted-input support.
+
+This module contains tests for password maps, the derived-key cache, and
+merging encrypted inputs in-process and in worker processes.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdfusion import (
+    MergeOptions,
+    PasswordMap,
+    PDFusionError,
+    PDFusionPasswordError,
+    merge_pdfs,
+    merge_streams,
+)
+from pdfusion.crypto import KeyCache, is_encrypted
+
+
+def _encrypted_pdf(pages: int, user: str, owner: Optional[str] = None) -> bytes:
+    writer = PdfWriter()
+    for i in range(pages):
+        writer.add_blank_page(width=100, height=100 + i)
+    writer.add_outline_item("Start", 0)
+    writer.encrypt(user, owner, use_128bit=True)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def encrypted_pdfs(tmp_path: Path) -> Path:
+    """
+    Create a directory mixing plain and encrypted PDF files.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    Path
+        Directory with a_plain.pdf (1 page), b_secret.pdf (2 pages, user
+        password "b-pass"), c_open.pdf (3 pages, empty user password) and
+        d_shared.pdf (4 pages, user password "shared").
+    """
+    writer = PdfWriter()
+    writer.add_blank_page(width=100, height=100)
+    with open(tmp_path / "a_plain.pdf", "wb") as f:
+        writer.write(f)
+    (tmp_path / "b_secret.pdf").write_bytes(_encrypted_pdf(2, "b-pass"))
+    (tmp_path / "c_open.pdf").write_bytes(_encrypted_pdf(3, "", "owner"))
+    (tmp_path / "d_shared.pdf").write_bytes(_encrypted_pdf(4, "shared"))
+    return tmp_path
+
+
+def test_password_map_parse(tmp_path: Path) -> None:
+    """
+    Test the JSON object, JSON list and line-based formats.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    passwords = PasswordMap.parse('{"a.pdf": "one", "b.pdf": ["two"], "*": "any"}')
+    assert passwords.candidates("/in/a.pdf") == ("one", "any")
+    assert passwords.candidates("c.pdf") == ("any",)
+
+    assert PasswordMap.parse('["x", "y"]').fallback == ["x", "y"]
+    assert PasswordMap.parse("x\n\ny:z\n").fallback == ["x", "y:z"]
+
+    path = tmp_path / "passwords.json"
+    path.write_text('{"a.pdf": "file"}')
+    passwords = PasswordMap.from_env(
+        {"PDFUSION_PASSWORD_FILE": str(path), "PDFUSION_PASSWORDS": '["env"]'}
+    )
+    assert passwords.candidates("a.pdf") == ("file", "env")
+    assert PasswordMap.from_env({}) == PasswordMap()
+
+    for bad in ('{"a.pdf": 1}', "[1", "[1, 2]"):
+        with pytest.raises(PDFusionError):
+            PasswordMap.parse(bad)
+    with pytest.raises(PDFusionError):
+        PasswordMap.from_file(tmp_path / "missing.json")
+
+
+def test_is_encrypted() -> None:
+    """
+    Test encryption sniffing at both ends of the file.
+
+    Returns
+    -------
+    None
+    """
+    data = _encrypted_pdf(1, "pw")
+    assert is_encrypted(BytesIO(data))
+    assert is_encrypted(BytesIO(data), window=512)
+
+    writer = PdfWriter()
+    writer.add_blank_page(width=100, height=100)
+    buffer = BytesIO()
+    writer.write(buffer)
+    assert not is_encrypted(buffer)
+    assert buffer.tell() == 0
+
+
+def test_key_cache() -> None:
+    """
+    Test that keys are reused per document and recent passwords tried first.
+
+    Returns
+    -------
+    None
+    """
+    cache = KeyCache()
+    data = _encrypted_pdf(1, "right")
+
+    reader = PdfReader(BytesIO(data))
+    assert not cache.unlock(reader, ["wrong"])
+    assert cache.unlock(reader, ["wrong", "right"])
+    assert reader.pages[0].mediabox.height == 100
+
+    # Same document again: no password needed
+    reader = PdfReader(BytesIO(data))
+    assert cache.unlock(reader, [])
+    assert reader.pages[0].mediabox.height == 100
+
+    # A different document with the same password is tried with it first
+    reader = PdfReader(BytesIO(_encrypted_pdf(1, "right")))
+    assert cache.unlock(reader, ["wrong", "right"])
+    assert cache._recent[0] == "right"
+
+
+@pytest.mark.parametrize("workers, memory_budget", [(1, 0), (2, 0), (2, 1)])
+def test_merge_pdfs_encrypted(
+    encrypted_pdfs: Path, workers: int, memory_budget: int
+) -> None:
+    """
+    Test merging encrypted inputs, in-process and in worker processes.
+
+    Parameters
+    ----------
+    encrypted_pdfs : Path
+        Directory with plain and encrypted PDF files.
+    workers : int
+        Number of decryption workers.
+    memory_budget : int
+        Memory budget for decryption; 1 byte decrypts one file at a time.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(
+        passwords=PasswordMap(files={"b_secret.pdf": ["b-pass"]}, fallback=["shared"]),
+        workers=workers,
+        memory_budget=memory_budget,
+    )
+    result = merge_pdfs(encrypted_pdfs, "merged.pdf", options=options)
+
+    assert result.files_merged == 4
+    assert result.total_pages == 10
+    reader = PdfReader(result.output_path)
+    assert not reader.is_encrypted
+    heights = [int(page.mediabox.height) for page in reader.pages]
+    assert heights == [100, 100, 101, 100, 101, 102, 100, 101, 102, 103]
+    assert len(reader.outline) == 3
+
+
+def test_merge_pdfs_wrong_password(encrypted_pdfs: Path) -> None:
+    """
+    Test that a missing password names the file that could not be unlocked.
+
+    Parameters
+    ----------
+    encrypted_pdfs : Path
+        Directory with plain and encrypted PDF files.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(passwords=PasswordMap(fallback=["b-pass"]), workers=2)
+    with pytest.raises(PDFusionPasswordError) as exc_info:
+        merge_pdfs(encrypted_pdfs, "merged.pdf", options=options)
+    assert exc_info.value.filename.endswith("d_shared.pdf")
+    assert not (encrypted_pdfs / "merged.pdf").exists()
+
+
+def test_merge_streams_encrypted() -> None:
+    """
+    Test merging encrypted in-memory inputs.
+
+    Returns
+    -------
+    None
+    """
+    inputs = [_encrypted_pdf(2, "pw"), BytesIO(_encrypted_pdf(1, ""))]
+    result = merge_streams(
+        inputs, options=MergeOptions(passwords=PasswordMap(fallback=["pw"]))
+    )
+    assert result.total_pages == 3
+    assert len(PdfReader(BytesIO(result.output.getvalue())).pages) == 3
+
+    with pytest.raises(PDFusionPasswordError) as exc_info:
+        merge_streams(inputs)
+    assert exc_info.value.filename == "<input 0>"
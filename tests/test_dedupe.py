@@ -0,0 +1,112 @@
+"""
+Tests for PDFusion duplicate page detection.
+
+This module contains tests for hashing pages canonically and for leaving out
+pages identical to one merged earlier.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from pdfusion import MergeOptions, discover_pdfs, merge_pdfs, merge_streams
+from pdfusion.dedupe import PageHasher
+
+_FONT = DictionaryObject(
+    {
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }
+)
+
+
+def _page(text: str) -> PageObject:
+    page = PageObject.create_blank_page(width=200, height=200)
+    content = DecodedStreamObject()
+    content.set_data(f"BT /F1 12 Tf 10 100 Td ({text}) Tj ET".encode())
+    page[NameObject("/Contents")] = content
+    page[NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/F1"): _FONT})}
+    )
+    return page
+
+
+def _write_statement(path: Path, texts, outline: bool = False) -> None:
+    writer = PdfWriter()
+    for text in texts:
+        writer.add_page(_page(text))
+    if outline:
+        writer.add_outline_item("Disclaimer", len(texts) - 1)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_drop_duplicate_pages(tmp_path: Path) -> None:
+    """
+    Test that pages identical to an earlier page are left out.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    for index in range(3):
+        _write_statement(
+            tmp_path / f"statement_{index}.pdf",
+            [f"Statement {index}", "Disclaimer", "Disclaimer"],
+            outline=index == 2,
+        )
+    inputs = discover_pdfs(tmp_path)
+    plain = merge_pdfs(inputs, "plain.pdf")
+    assert (plain.total_pages, plain.duplicate_pages) == (9, 0)
+
+    options = MergeOptions(drop_duplicate_pages=True)
+    result = merge_pdfs(inputs, "unique.pdf", options=options)
+    assert (result.total_pages, result.duplicate_pages) == (4, 5)
+    reader = PdfReader(result.output_path)
+    texts = [page.extract_text() for page in reader.pages]
+    assert texts == ["Statement 0", "Disclaimer", "Statement 1", "Statement 2"]
+    # The last statement's outline item points at the kept disclaimer
+    [item] = reader.outline
+    assert reader.get_destination_page_number(item) == 1
+
+    for options in (
+        MergeOptions(drop_duplicate_pages=True, checkpoint_every=2),
+        MergeOptions(drop_duplicate_pages=True, reduce_fanout=2, workers=1),
+    ):
+        # Duplicates are found within each part
+        parts = merge_pdfs(inputs, "parts.pdf", options=options)
+        assert (parts.total_pages, parts.duplicate_pages) == (5, 4)
+
+    streamed = merge_streams(
+        [path.read_bytes() for path in inputs.paths], options=options
+    )
+    assert streamed.duplicate_pages == 5
+
+
+def test_page_hasher() -> None:
+    """
+    Test that page hashes ignore object numbering but not content.
+
+    Returns
+    -------
+    None
+    """
+    hasher = PageHasher()
+    first, second = _page("Same"), _page("Same")
+    assert hasher.page_digest(first) == hasher.page_digest(second)
+    second[NameObject("/Parent")] = DictionaryObject()
+    assert hasher.page_digest(first) == hasher.page_digest(second)
+    assert hasher.page_digest(first) != hasher.page_digest(_page("Other"))
+    rotated = _page("Same")
+    rotated.rotate(90)
+    assert hasher.page_digest(first) != hasher.page_digest(rotated)
@@ -13,6 +13,8 @@ from pdfusion.exceptions import (
     PDFusionError,
     NoPDFsFoundError,
     PDFusionMergeError,
+    PDFusionPasswordError,
+    PDFusionQuarantineError,
 )
 
 
@@ -114,3 +116,48 @@ def test_exception_hierarchy() -> None:
 
     with pytest.raises(PDFusionMergeError):
         raise merge_error
+
+
+def test_password_error() -> None:
+    """
+    Test the PDFusionPasswordError exception, including pickling.
+
+    Returns
+    -------
+    None
+    """
+    import pickle
+
+    error = PDFusionPasswordError("secret.pdf")
+
+    assert isinstance(error, PDFusionMergeError)
+    assert error.filename == "secret.pdf"
+    assert "secret.pdf" in str(error)
+
+    restored = pickle.loads(pickle.dumps(error))
+    assert restored.filename == "secret.pdf"
+    assert str(restored) == str(error)
+
+
+def test_merge_error_pickling() -> None:
+    """
+    Test that a PDFusionMergeError survives a trip out of a worker process.
+
+    Returns
+    -------
+    None
+    """
+    import pickle
+
+    error = PDFusionMergeError(filename="bad.pdf", original_error=ValueError("eof"))
+    restored = pickle.loads(pickle.dumps(error))
+
+    assert restored.filename == "bad.pdf"
+    assert str(restored) == str(error)
+    assert isinstance(restored.original_error, ValueError)
+
+    quarantined = PDFusionQuarantineError("slow.pdf", "parse took longer than 5s")
+    restored = pickle.loads(pickle.dumps(quarantined))
+    assert isinstance(restored, PDFusionMergeError)
+    assert restored.reason == quarantined.reason
+    assert str(restored) == "Quarantined slow.pdf: parse took longer than 5s"
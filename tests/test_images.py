@@ -0,0 +1,176 @@
+"""
+Tests for PDFusion image downsampling.
+
+This module contains tests for downsampling page images above a target
+resolution while inputs are merged, and for reporting the bytes saved.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import zlib
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PageObject, PdfReader, PdfWriter
+from PyPDF2.generic import (
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    NumberObject,
+)
+
+from pdfusion import MergeOptions, PDFusionError, merge_pdfs, merge_streams
+from pdfusion import images
+from pdfusion.images import ImageJob, resample_image
+
+
+def _write_scan(path: Path, size: int = 600, pages: int = 2) -> None:
+    # One-inch pages, each drawing a size x size RGB image across the page
+    writer = PdfWriter()
+    samples = bytes((x * 7 + y * 3) % 256 for y in range(size) for x in range(size))
+    for _ in range(pages):
+        page = PageObject.create_blank_page(width=72, height=72)
+        image = DecodedStreamObject()
+        image._data = zlib.compress(samples * 3)
+        image.update(
+            {
+                NameObject("/Type"): NameObject("/XObject"),
+                NameObject("/Subtype"): NameObject("/Image"),
+                NameObject("/Width"): NumberObject(size),
+                NameObject("/Height"): NumberObject(size),
+                NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+                NameObject("/BitsPerComponent"): NumberObject(8),
+                NameObject("/Filter"): NameObject("/FlateDecode"),
+            }
+        )
+        content = DecodedStreamObject()
+        content.set_data(b"q 72 0 0 72 0 0 cm /Im0 Do Q")
+        page[NameObject("/Contents")] = content
+        page[NameObject("/Resources")] = DictionaryObject(
+            {
+                NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): image})
+            }
+        )
+        writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def _image_sizes(path: Path):
+    reader = PdfReader(path)
+    return [
+        (image["/Width"], image["/Height"])
+        for page in reader.pages
+        for ref in page["/Resources"]["/XObject"].values()
+        for image in [ref.get_object()]
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_downsample_images(tmp_path: Path, workers: int) -> None:
+    """
+    Test that images above the target resolution shrink in the output.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    workers : int
+        Number of worker processes resampling images.
+
+    Returns
+    -------
+    None
+    """
+    _write_scan(tmp_path / "scan_1.pdf")
+    _write_scan(tmp_path / "scan_2.pdf", size=100)
+    plain = merge_pdfs(tmp_path, "plain.pdf")
+    plain.output_path.unlink()
+
+    options = MergeOptions(image_dpi=150, workers=workers)
+    result = merge_pdfs(tmp_path, "small.pdf", options=options)
+    assert result.total_pages == 4
+    assert 0 < result.image_bytes_after < result.image_bytes_before
+    assert result.bytes_written < plain.bytes_written
+    # The 100 DPI images are already below the target
+    sizes = _image_sizes(result.output_path)
+    assert sizes[2:] == [(100, 100), (100, 100)]
+    assert all(150 <= width <= 300 and width == height for width, height in sizes[:2])
+
+    streamed = merge_streams([(tmp_path / "scan_1.pdf").read_bytes()], options=options)
+    assert streamed.image_bytes_before == result.image_bytes_before
+    assert plain.image_bytes_before == 0
+
+
+def test_downsample_images_in_parts(tmp_path: Path) -> None:
+    """
+    Test that checkpointed and tree merges add up the images of their parts.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    for index in range(3):
+        _write_scan(tmp_path / f"scan_{index}.pdf", size=300, pages=1)
+    serial = merge_pdfs(tmp_path, "serial.pdf", options=MergeOptions(image_dpi=100))
+    serial.output_path.unlink()
+
+    for options in (
+        MergeOptions(image_dpi=100, checkpoint_every=2),
+        MergeOptions(image_dpi=100, reduce_fanout=2, workers=2),
+    ):
+        result = merge_pdfs(tmp_path, "parts.pdf", options=options)
+        assert result.image_bytes_before == serial.image_bytes_before > 0
+        assert result.image_bytes_after == serial.image_bytes_after
+        assert len(PdfReader(result.output_path).pages) == 3
+        result.output_path.unlink()
+
+
+def test_resample_image_jpeg() -> None:
+    """
+    Test that images are re-encoded as JPEG with Pillow installed.
+
+    Returns
+    -------
+    None
+    """
+    pytest.importorskip("PIL")
+    samples = bytes((x + y) % 256 for y in range(400) for x in range(400))
+    job = ImageJob(samples, None, {}, 400, 400, 1, 0.25, "jpeg", 50)
+    result = resample_image(job)
+    assert result.filter == "/DCTDecode"
+    assert (result.width, result.height) == (100, 100)
+
+
+def test_image_options_errors(tmp_path: Path, monkeypatch) -> None:
+    """
+    Test that unusable image options are rejected before merging.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    monkeypatch : pytest.MonkeyPatch
+        Pytest monkeypatch fixture.
+
+    Returns
+    -------
+    None
+    """
+    _write_scan(tmp_path / "scan.pdf", size=50, pages=1)
+    with pytest.raises(PDFusionError, match="Unknown image encoding"):
+        merge_pdfs(tmp_path, options=MergeOptions(image_dpi=72, image_encoding="png"))
+
+    monkeypatch.setattr(images, "Image", None)
+    with pytest.raises(PDFusionError, match="requires Pillow"):
+        merge_pdfs(tmp_path, options=MergeOptions(image_dpi=72, image_encoding="jpeg"))
+
+    # Damaged image data is copied as it is
+    job = ImageJob(b"not flate", "/FlateDecode", {}, 10, 10, 3, 0.5, "flate", 75)
+    assert resample_image(job) is None
@@ -0,0 +1,140 @@
+"""
+Tests for the PDFusion page index.
+
+This module contains tests for writing a page index next to merged outputs
+and for extracting the pages of some inputs through it.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfusion import MergeOptions, PDFusionError, discover_pdfs, merge_pdfs
+from pdfusion.index import PageIndex, extract_pages, index_path
+from pdfusion.pdfusion import main
+from tests.corpus import CorpusSpec, generate_corpus
+
+
+def _texts(path: Path, pages: range) -> list:
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() for number in pages]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        MergeOptions(page_index=True),
+        MergeOptions(page_index=True, checkpoint_every=2),
+        MergeOptions(page_index=True, reduce_fanout=2, workers=1),
+    ],
+)
+def test_extract_pages(tmp_path: Path, options: MergeOptions) -> None:
+    """
+    Test that extracted pages match the inputs they came from.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    options : MergeOptions
+        Options of a plain, checkpointed or tree merge.
+
+    Returns
+    -------
+    None
+    """
+    paths = generate_corpus(tmp_path / "in", CorpusSpec(files=5, pages_per_file=3))
+    result = merge_pdfs(discover_pdfs(tmp_path / "in"), "merged.pdf", options=options)
+    assert result.input_pages == (3, 3, 3, 3, 3)
+
+    with PageIndex(result.output_path) as index:
+        assert [item.name for item in index.inputs] == [path.name for path in paths]
+        assert index.find(paths[3].name).first_page == 9
+        assert index.input_of(10).name == paths[3].name
+        assert index.object_range(index.num_objects) is None
+
+    target = tmp_path / "extracted.pdf"
+    names = [paths[3].name, paths[1].name]
+    extracted = extract_pages(result.output_path, names, target)
+    assert extracted.pages == 6
+    assert extracted.bytes_read < result.bytes_written / 2
+    assert _texts(target, range(6)) == (
+        _texts(paths[3], range(3)) + _texts(paths[1], range(3))
+    )
+
+
+def test_page_index_errors(tmp_path: Path) -> None:
+    """
+    Test that missing, stale and unrelated indexes are reported.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    paths = generate_corpus(tmp_path / "in", CorpusSpec(files=2, pages_per_file=2))
+    inputs = discover_pdfs(tmp_path / "in")
+    plain = merge_pdfs(inputs, "plain.pdf")
+    with pytest.raises(PDFusionError, match="Cannot read page index"):
+        PageIndex(plain.output_path)
+    index_path(plain.output_path).write_bytes(b"%PDF-1.3")
+    with pytest.raises(PDFusionError, match="Not a PDFusion page index"):
+        PageIndex(plain.output_path)
+
+    # A cached output gets an index of its own
+    options = MergeOptions(page_index=True, cache_dir=tmp_path / "cache")
+    merge_pdfs(inputs, "first.pdf", options=options)
+    result = merge_pdfs(inputs, "second.pdf", options=options)
+    with PageIndex(result.output_path) as index:
+        assert index.find(paths[1].name).pages == 2
+        with pytest.raises(PDFusionError, match="is not an input"):
+            index.find("missing.pdf")
+
+    os.utime(result.output_path, ns=(0, 0))
+    with pytest.raises(PDFusionError, match="is older than"):
+        extract_pages(result.output_path, [paths[0].name], tmp_path / "out.pdf")
+
+
+def test_cli_extract(tmp_path: Path) -> None:
+    """
+    Test the ``pdfusion extract`` command.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    paths = generate_corpus(tmp_path, CorpusSpec(files=3, pages_per_file=2))
+    args = ["pdfusion", str(tmp_path), "-o", "merged.pdf", "--page-index"]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+
+    target = tmp_path / "out" / "doc.pdf"
+    target.parent.mkdir()
+    merged = str(tmp_path / "merged.pdf")
+    args = ["pdfusion", "extract", merged, paths[2].name, "-o", str(target)]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+    assert _texts(target, range(2)) == _texts(paths[2], range(2))
+
+    args = ["pdfusion", "extract", merged, "missing.pdf", "-o", str(target)]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
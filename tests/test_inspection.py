@@ -0,0 +1,160 @@
+"""
+Tests for PDFusion directory inspection.
+
+This module contains tests for gathering input statistics without merging,
+the statistics cache and the ``pdfusion inspect`` command.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PyPDF2 import PdfWriter
+
+from pdfusion import inspect_pdfs
+from pdfusion.inspection import StatsCache, format_table
+from pdfusion.pdfusion import main
+
+
+@pytest.fixture
+def mixed_pdfs(sample_pdfs: Path) -> Path:
+    """
+    Add an encrypted and an invalid file to the sample PDFs.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    Path
+        Directory with 3 plain, 1 encrypted and 1 invalid PDF file.
+    """
+    writer = PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=100, height=100)
+    writer.encrypt("secret", "owner")
+    with open(sample_pdfs / "locked.pdf", "wb") as f:
+        writer.write(f)
+    (sample_pdfs / "broken.pdf").write_bytes(b"not a pdf")
+    return sample_pdfs
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_inspect_pdfs(mixed_pdfs: Path, workers: int) -> None:
+    """
+    Test totals, encrypted and invalid files, in-process and in workers.
+
+    Parameters
+    ----------
+    mixed_pdfs : Path
+        Directory with plain, encrypted and invalid PDF files.
+    workers : int
+        Number of worker processes.
+
+    Returns
+    -------
+    None
+    """
+    result = inspect_pdfs(mixed_pdfs, workers=workers)
+
+    names = [stats.path.name for stats in result.files]
+    assert names == ["broken.pdf", "locked.pdf", "test_1.pdf", "test_2.pdf", "test_3.pdf"]
+    assert [stats.pages for stats in result.files] == [None, 5, 1, 2, 1]
+    assert result.total_pages == 9
+    assert result.total_bytes == sum(p.stat().st_size for p in mixed_pdfs.glob("*.pdf"))
+    assert [stats.path.name for stats in result.encrypted] == ["locked.pdf"]
+    assert [stats.path.name for stats in result.invalid] == ["broken.pdf"]
+    assert result.largest(1)[0].path.name == "locked.pdf"
+
+    report = format_table(result, top=2)
+    assert "Pages:       9" in report
+    assert "broken.pdf: PdfReadError" in report
+
+
+def test_stats_cache(mixed_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test that unchanged files are answered from the cache.
+
+    Parameters
+    ----------
+    mixed_pdfs : Path
+        Directory with plain, encrypted and invalid PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    cache_path = tmp_path / "cache" / "inspect.json"
+    cold = inspect_pdfs(mixed_pdfs, cache=StatsCache(cache_path))
+    assert cold.cache_hits == 0
+    assert not cache_path.exists()
+
+    cache = StatsCache(cache_path)
+    inspect_pdfs(mixed_pdfs, cache=cache)
+    cache.save()
+    warm = inspect_pdfs(mixed_pdfs, cache=StatsCache(cache_path))
+    assert warm.cache_hits == 5
+    assert warm.files == cold.files
+
+    changed = mixed_pdfs / "test_1.pdf"
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert inspect_pdfs(mixed_pdfs, cache=StatsCache(cache_path)).cache_hits == 4
+
+    cache_path.write_text("{corrupt")
+    assert inspect_pdfs(mixed_pdfs, cache=StatsCache(cache_path)).cache_hits == 0
+
+
+def test_cli_inspect(mixed_pdfs: Path, tmp_path: Path, capsys, monkeypatch) -> None:
+    """
+    Test the ``pdfusion inspect`` command's JSON and table reports.
+
+    Parameters
+    ----------
+    mixed_pdfs : Path
+        Directory with plain, encrypted and invalid PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    capsys : pytest.CaptureFixture
+        Fixture to capture stdout and stderr.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to redirect the cache directory.
+
+    Returns
+    -------
+    None
+    """
+    monkeypatch.setenv("PDFUSION_CACHE_DIR", str(tmp_path / "cache"))
+    args = ["pdfusion", "inspect", str(mixed_pdfs), "--json", "--top", "2"]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["files"] == 5
+    assert report["total_pages"] == 9
+    assert report["encrypted"] == ["locked.pdf"]
+    assert [entry["file"] for entry in report["invalid"]] == ["broken.pdf"]
+    assert len(report["largest"]) == 2
+    assert (tmp_path / "cache" / "inspect.json").exists()
+
+    args = ["pdfusion", "inspect", str(mixed_pdfs), "--no-cache"]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 0
+    assert "Invalid:     1" in capsys.readouterr().out
+
+    args = ["pdfusion", "inspect", str(tmp_path / "missing")]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
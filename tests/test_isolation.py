@@ -0,0 +1,133 @@
+"""
+Tests for PDFusion isolated parsing.
+
+This module contains tests for quarantining inputs whose parse overruns its
+time or memory limit while the rest of the batch is merged.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import NameObject
+
+from pdfusion import MergeMetrics, MergeOptions, PDFusionQuarantineError, merge_pdfs
+from pdfusion import isolation
+from pdfusion.isolation import screen_files
+
+
+def _write_cyclic_outline(path: Path) -> None:
+    # PyPDF2 follows /Next forever, growing the outline as it goes
+    writer = PdfWriter()
+    writer.add_blank_page(width=100, height=100)
+    first = writer.add_outline_item("first", 0)
+    second = writer.add_outline_item("second", 0)
+    second.get_object()[NameObject("/Next")] = first
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+@pytest.mark.parametrize(
+    "timeout, memory, reason",
+    [(1.0, 0, "longer than 1s"), (60.0, 64 * 1024 * 1024, "memory limit")],
+)
+def test_quarantine(
+    sample_pdfs: Path, timeout: float, memory: int, reason: str
+) -> None:
+    """
+    Test that an input overrunning a limit is left out of the merge.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    timeout : float
+        Seconds a parse may take.
+    memory : int
+        Bytes a parse may take.
+    reason : str
+        Expected part of the quarantine reason.
+
+    Returns
+    -------
+    None
+    """
+    _write_cyclic_outline(sample_pdfs / "test_2a.pdf")
+    metrics = MergeMetrics()
+    options = MergeOptions(
+        parse_timeout=timeout, parse_memory=memory, workers=2, metrics=metrics
+    )
+
+    result = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    assert result.files_merged == 3
+    assert result.quarantined == ("test_2a.pdf",)
+    assert len(PdfReader(result.output_path).pages) == result.total_pages
+    assert metrics.quarantined.value == 1
+
+    screening = screen_files(
+        sorted(sample_pdfs.glob("test_*.pdf")), timeout=timeout, memory=memory
+    )
+    [error] = screening.quarantined
+    assert error.filename.endswith("test_2a.pdf") and reason in error.reason
+    assert [path.name for path in screening.passed] == [
+        "test_1.pdf",
+        "test_2.pdf",
+        "test_3.pdf",
+    ]
+
+
+def test_quarantine_everything(tmp_path: Path) -> None:
+    """
+    Test that a merge with no input left raises the quarantine error.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    _write_cyclic_outline(tmp_path / "cyclic.pdf")
+    with pytest.raises(PDFusionQuarantineError, match="cyclic.pdf"):
+        merge_pdfs(tmp_path, options=MergeOptions(parse_timeout=0.5))
+
+
+def test_screen_files_failures(
+    sample_pdfs: Path, invalid_pdf_dir: Path, monkeypatch
+) -> None:
+    """
+    Test that parse errors pass screening and parser crashes are quarantined.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    invalid_pdf_dir : Path
+        Directory with an invalid PDF file.
+    monkeypatch : pytest.MonkeyPatch
+        Pytest monkeypatch fixture.
+
+    Returns
+    -------
+    None
+    """
+    invalid = sorted(invalid_pdf_dir.glob("*.pdf"))
+    assert screen_files(invalid, timeout=30) == (invalid, [])
+
+    def crash(path: str) -> int:
+        # Workers are forked, so they run the patched function
+        if path.endswith("test_2.pdf"):
+            os._exit(3)
+        return 0
+
+    monkeypatch.setattr(isolation, "screen_file", crash)
+    paths = sorted(sample_pdfs.glob("test_*.pdf"))
+    passed, [error] = screen_files(paths, timeout=30, workers=1)
+    assert passed == [paths[0], paths[2]]
+    assert error.reason == "parser process exited with code 3"
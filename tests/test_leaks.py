@@ -0,0 +1,131 @@
+"""
+Tests for PDFusion memory leak detection.
+
+This module contains tests for detecting sustained memory growth and its
+allocation sites, and soak tests that merge varied corpora repeatedly in one
+process and fail if memory grows from one merge to the next.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+from pdfusion import MergeOptions, discover_pdfs, merge_pdfs, merge_streams
+from pdfusion.leaks import LeakDetector, soak
+from tests.corpus import CorpusSpec, generate_corpus
+
+# Corpus and options of each soak variant
+SOAK_VARIANTS: Dict[str, tuple] = {
+    "plain": (CorpusSpec(files=6), MergeOptions()),
+    "images": (
+        CorpusSpec(files=4, image_size=96, seed=1),
+        MergeOptions(image_dpi=36, drop_duplicate_pages=True),
+    ),
+    "xref-streams": (
+        CorpusSpec(files=6, object_streams=True, tree_fanout=2, seed=2),
+        MergeOptions(checkpoint_every=2, bookmarks=True, bookmark_fanout=2),
+    ),
+    "fonts": (
+        CorpusSpec(files=6, font_bytes=4096, seed=3),
+        MergeOptions(reduce_fanout=2, workers=1, compress_level=1, page_index=True),
+    ),
+}
+
+
+def test_leak_detector() -> None:
+    """
+    Test that steady growth is reported with the site that allocated it.
+
+    Returns
+    -------
+    None
+    """
+    held: List[bytearray] = []
+
+    def leak() -> None:
+        held.append(bytearray(16 * 1024))
+
+    report = soak(leak, iterations=12)
+    assert report.growing
+    assert 15_000 < report.traced_growth < 18_000
+    assert len(report.samples) == 12 and report.warmup == 3
+    site = report.sites[0]
+    assert site.frames[-1].startswith(__file__)
+    # Each bytearray is its object and its buffer
+    assert site.count == 18 and site.size >= 9 * 16 * 1024
+    assert "+16," in report.format().splitlines()[0]
+
+
+def test_leak_detector_steady() -> None:
+    """
+    Test that memory used and released, or cached once, is not a leak.
+
+    Returns
+    -------
+    None
+    """
+    cache: List[bytearray] = []
+
+    def work() -> None:
+        data = [bytearray(1024) for _ in range(64)]
+        if len(cache) < 4:
+            cache.append(data[0])
+
+    with LeakDetector(warmup=0) as detector:
+        for _ in range(10):
+            work()
+            detector.sample()
+        report = detector.report()
+    assert not report.growing
+    assert report.sites == [] and report.warmup == 0
+    # Growth is reported only once enough iterations are measured
+    assert not soak(lambda: cache.append(bytearray(1 << 20)), iterations=6).growing
+
+
+@pytest.mark.parametrize(
+    "iterations", [8, pytest.param(200, marks=pytest.mark.slow)]
+)
+@pytest.mark.parametrize("variant", sorted(SOAK_VARIANTS))
+def test_merge_soak(
+    tmp_path_factory: pytest.TempPathFactory, variant: str, iterations: int
+) -> None:
+    """
+    Test that repeated merges in one process do not grow its memory.
+
+    Parameters
+    ----------
+    tmp_path_factory : pytest.TempPathFactory
+        Temporary directory factory provided by pytest.
+    variant : str
+        Corpus and options to merge, from ``SOAK_VARIANTS``.
+    iterations : int
+        Number of merges.
+
+    Returns
+    -------
+    None
+    """
+    spec, options = SOAK_VARIANTS[variant]
+    directory = tmp_path_factory.mktemp(variant)
+    generate_corpus(directory, spec)
+    # Discovered once, so that outputs are not merged as inputs
+    catalog = discover_pdfs(directory)
+    sources = [path.read_bytes() for path in sorted(directory.glob("*.pdf"))]
+
+    merges: List[Callable[[], object]] = [
+        lambda: merge_pdfs(catalog, "soak.pdf", options=options),
+        lambda: merge_streams(sources, options=options).output.close(),
+    ]
+    count = [0]
+
+    def merge() -> None:
+        merges[count[0] % 2]()
+        count[0] += 1
+
+    report = soak(merge, iterations=iterations)
+    assert not report.growing, report.format()
+    assert Path(directory / "soak.pdf").is_file()
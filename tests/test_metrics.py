@@ -0,0 +1,148 @@
+"""
+Tests for PDFusion merge metrics.
+
+This module contains tests for the metrics registry, its text exposition
+formats, and the metrics recorded by merges.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import sys
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pdfusion import (
+    MergeMetrics,
+    MergeOptions,
+    PDFusionMergeError,
+    Registry,
+    merge_pdfs,
+    merge_streams,
+)
+from pdfusion.metrics import Counter, Gauge, Histogram, Metric
+from pdfusion.pdfusion import main
+
+
+def test_registry_render() -> None:
+    """
+    Test the Prometheus text and OpenMetrics expositions.
+
+    Returns
+    -------
+    None
+    """
+    registry = Registry()
+    files = registry.register(Counter("files", "Files read"))
+    errors = registry.register(Counter("errors", 'Errors "by" class', ("kind",)))
+    running = registry.register(Gauge("running", "Running jobs"))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1)))
+
+    files.inc()
+    files.inc(2)
+    errors.labels("OSError").inc()
+    errors.labels('Bad"Name').inc()
+    running.set(3)
+    running.inc(-1)
+    for value in (0.05, 0.1, 0.5, 7):
+        latency.observe(value)
+
+    assert registry.render() == (
+        "# HELP files_total Files read\n"
+        "# TYPE files_total counter\n"
+        "files_total 3\n"
+        '# HELP errors_total Errors \\"by\\" class\n'
+        "# TYPE errors_total counter\n"
+        'errors_total{kind="Bad\\"Name"} 1\n'
+        'errors_total{kind="OSError"} 1\n'
+        "# HELP running Running jobs\n"
+        "# TYPE running gauge\n"
+        "running 2\n"
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 2\n'
+        'latency_seconds_bucket{le="1"} 3\n'
+        'latency_seconds_bucket{le="+Inf"} 4\n'
+        "latency_seconds_count 4\n"
+        "latency_seconds_sum 7.65\n"
+    )
+    openmetrics = registry.render(openmetrics=True)
+    assert "# TYPE files counter\nfiles_total 3\n" in openmetrics
+    assert openmetrics.endswith("# EOF\n")
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(Gauge("files", "Again"))
+    with pytest.raises(ValueError, match="takes labels"):
+        errors.labels()
+    assert registry.get("running") is running
+    # A metric kind must say how it samples itself
+    with pytest.raises(TypeError, match="abstract"):
+        Metric("bare", "No samples")
+
+
+def test_merge_metrics(sample_pdfs: Path) -> None:
+    """
+    Test the metrics recorded by successful and failed merges.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    metrics = MergeMetrics()
+    options = MergeOptions(metrics=metrics)
+    inputs = sorted(sample_pdfs.glob("*.pdf"))
+    result = merge_pdfs(sample_pdfs, "merged.pdf", options=options)
+    merge_streams([path.read_bytes() for path in inputs], options=options)
+
+    assert metrics.merges.value == 2
+    assert metrics.files.value == 6
+    assert metrics.pages.value == 8
+    assert metrics.input_bytes.value == 2 * sum(p.stat().st_size for p in inputs)
+    assert metrics.output_bytes.value > result.bytes_written
+    assert metrics.parse_seconds.count == 6
+    assert metrics.write_seconds.count == 2
+    assert metrics.last_success.value > 0
+
+    result.output_path.write_bytes(b"not a pdf")
+    with pytest.raises(PDFusionMergeError):
+        merge_pdfs(sample_pdfs, options=options)
+    with pytest.raises(PDFusionMergeError):
+        merge_streams([BytesIO(b"not a pdf")], options=options)
+    assert metrics.failures.labels("PDFusionMergeError").value == 2
+    assert metrics.merges.value == 2
+    assert metrics.in_progress.value == 0
+
+
+def test_cli_metrics_file(sample_pdfs: Path, tmp_path: Path) -> None:
+    """
+    Test writing a Prometheus textfile from the command line.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with sample PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    target = tmp_path / "pdfusion.prom"
+    args = ["pdfusion", str(sample_pdfs), "-o", "out.pdf", "--metrics-file", str(target)]
+    with patch.object(sys, "argv", args), pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 0
+    text = target.read_text()
+    assert "pdfusion_files_merged_total 3\n" in text
+    assert "pdfusion_pages_merged_total 4\n" in text
+    assert 'pdfusion_parse_seconds_bucket{le="+Inf"} 3\n' in text
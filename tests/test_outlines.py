@@ -0,0 +1,186 @@
+"""
+Tests for PDFusion outlines.
+
+This module contains tests for keeping the nested outlines of merged inputs,
+adding a bookmark for each input, and gathering long outlines under groups.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import (
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    TextStringObject,
+)
+
+from pdfusion import MergeOptions, merge_pdfs
+from pdfusion.outlines import build_outline, group_items
+
+
+def _outlined_inputs(directory: Path, files: int) -> Path:
+    # Three pages each, outlined as a chapter with a section, then a chapter
+    directory.mkdir()
+    for i in range(files):
+        writer = PdfWriter()
+        for j in range(3):
+            writer.add_blank_page(width=100, height=100 * (i + 1) + j)
+        chapter = writer.add_outline_item(f"{i} Chapter 1", 0)
+        writer.add_outline_item(f"{i} Section 1.1", 1, parent=chapter)
+        writer.add_outline_item(f"{i} Chapter 2", 2)
+        with open(directory / f"doc_{i:02}.pdf", "wb") as f:
+            writer.write(f)
+    return directory
+
+
+def _tree(reader: PdfReader, outline: List[Any]) -> List[Any]:
+    # Titles and destination page numbers, nested like PyPDF2's outline
+    return [
+        _tree(reader, item)
+        if isinstance(item, list)
+        else (item.title, reader.get_destination_page_number(item))
+        for item in outline
+    ]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        MergeOptions(),
+        MergeOptions(checkpoint_every=2),
+        MergeOptions(reduce_fanout=2, workers=1),
+    ],
+    ids=["plain", "checkpoint", "tree"],
+)
+def test_nested_outlines(tmp_path: Path, options: MergeOptions) -> None:
+    """
+    Test that each input's nested outline is kept, pointing at its pages.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    options : MergeOptions
+        How to merge.
+
+    Returns
+    -------
+    None
+    """
+    inputs = _outlined_inputs(tmp_path / "in", 5)
+    result = merge_pdfs(inputs, "out.pdf", options=options)
+
+    reader = PdfReader(result.output_path)
+    expected: List[Any] = []
+    for i in range(5):
+        expected += [
+            (f"{i} Chapter 1", 3 * i),
+            [(f"{i} Section 1.1", 3 * i + 1)],
+            (f"{i} Chapter 2", 3 * i + 2),
+        ]
+    assert _tree(reader, reader.outline) == expected
+
+
+@pytest.mark.parametrize("checkpoint_every", [0, 2])
+def test_bookmarks(tmp_path: Path, checkpoint_every: int) -> None:
+    """
+    Test per-file bookmarks gathered under closed groups.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    checkpoint_every : int
+        Inputs per checkpointed part; 0 merges in one pass.
+
+    Returns
+    -------
+    None
+    """
+    inputs = _outlined_inputs(tmp_path / "in", 5)
+    options = MergeOptions(
+        bookmarks=True, bookmark_fanout=2, checkpoint_every=checkpoint_every
+    )
+    result = merge_pdfs(inputs, "out.pdf", options=options)
+
+    reader = PdfReader(result.output_path)
+    # Five bookmarks make two groups and one left over, then one group
+    assert _tree(reader, reader.outline) == [
+        ("doc_00 – doc_03", 0),
+        [
+            ("doc_00 – doc_01", 0),
+            [
+                ("doc_00", 0),
+                [("0 Chapter 1", 0), [("0 Section 1.1", 1)], ("0 Chapter 2", 2)],
+                ("doc_01", 3),
+                [("1 Chapter 1", 3), [("1 Section 1.1", 4)], ("1 Chapter 2", 5)],
+            ],
+            ("doc_02 – doc_03", 6),
+            [
+                ("doc_02", 6),
+                [("2 Chapter 1", 6), [("2 Section 1.1", 7)], ("2 Chapter 2", 8)],
+                ("doc_03", 9),
+                [("3 Chapter 1", 9), [("3 Section 1.1", 10)], ("3 Chapter 2", 11)],
+            ],
+        ],
+        ("doc_04", 12),
+        [("4 Chapter 1", 12), [("4 Section 1.1", 13)], ("4 Chapter 2", 14)],
+    ]
+    outlines = reader.trailer["/Root"]["/Outlines"]
+    assert outlines["/Count"] == 2
+    assert outlines["/First"].get_object()["/Count"] == -2
+
+
+def _item(title: str, page: int) -> DictionaryObject:
+    return DictionaryObject(
+        {
+            NameObject("/Title"): TextStringObject(title),
+            NameObject("/Page"): NumberObject(page),
+        }
+    )
+
+
+def test_build_and_group_items() -> None:
+    """
+    Test that items of unmerged pages are dropped and groups are closed.
+
+    Returns
+    -------
+    None
+    """
+    added: List[DictionaryObject] = []
+
+    def add(item: DictionaryObject) -> IndirectObject:
+        added.append(item)
+        return IndirectObject(len(added), 0, None)
+
+    def on_page(item: DictionaryObject, page: Any) -> None:
+        item[NameObject("/Dest")] = TextStringObject(f"page {page}")
+
+    # Page 9 was not merged: its item goes, and its child takes its place
+    outline = [_item("a", 0), [_item("a.1", 1)], _item("b", 9), [_item("b.1", 2)]]
+    outline[0][NameObject("/Count")] = NumberObject(1)
+    items = build_outline(outline, {0: 0, 1: 1, 2: 2}, on_page, add)
+    titles: List[Tuple[str, Any]] = [
+        (item["/Title"], item.get("/Count")) for _, item in items
+    ]
+    assert titles == [("a", 1), ("b.1", None)]
+    assert items[1][1]["/Dest"] == "page 2"
+
+    letters = [(add(_item(title, 0)), _item(title, 0)) for title in "abcde"]
+    for ref, item in letters:
+        on_page(item, ref.idnum)
+    grouped = group_items(letters, 2, add)
+    # Groups of groups, then the item left over
+    assert [item["/Title"] for _, item in grouped] == ["a – d", "e"]
+    # Closed groups count their visible children as negative
+    assert grouped[0][1]["/Count"] == -2
+    assert grouped[0][1]["/Dest"] == letters[0][1]["/Dest"]
+    assert group_items(items, 0, add) == items
@@ -0,0 +1,186 @@
+"""
+Tests for PDFusion page tree balancing.
+
+This module contains tests for rebuilding the output page tree with a fixed
+fan-out, tree-walking page lookup, and a benchmark of page-N lookup time on
+large outputs.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import random
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PdfReader
+from PyPDF2.generic import NameObject, NumberObject, RectangleObject
+
+from pdfusion import MergeOptions, merge_pdfs
+from pdfusion.exceptions import PDFusionError
+from pdfusion.pagetree import balance_page_tree, lookup_page
+from pdfusion.writer import PdfusionWriter
+
+
+def _write(num_pages: int, fanout: int) -> bytes:
+    writer = PdfusionWriter(MergeOptions(page_tree_fanout=fanout))
+    for i in range(num_pages):
+        writer.add_blank_page(width=100, height=100 + i)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _depth(reader: PdfReader) -> int:
+    depth, node = 1, reader.trailer["/Root"]["/Pages"].get_object()
+    while node["/Kids"][0].get_object()["/Type"] == "/Pages":
+        node = node["/Kids"][0].get_object()
+        depth += 1
+    return depth
+
+
+@pytest.mark.parametrize("num_pages", [1, 4, 5, 17, 100])
+def test_balance_page_tree(num_pages: int) -> None:
+    """
+    Test that balancing keeps page order, counts and parents consistent.
+
+    Parameters
+    ----------
+    num_pages : int
+        Number of pages in the document.
+
+    Returns
+    -------
+    None
+    """
+    reader = PdfReader(BytesIO(_write(num_pages, fanout=4)))
+
+    assert len(reader.pages) == num_pages
+    heights = [page.mediabox.height for page in reader.pages]
+    assert heights == [100 + i for i in range(num_pages)]
+
+    stack = [reader.trailer["/Root"]["/Pages"].get_object()]
+    while stack:
+        node = stack.pop()
+        kids = [kid.get_object() for kid in node["/Kids"]]
+        assert len(kids) <= 4
+        if kids[0]["/Type"] == "/Pages":
+            assert node["/Count"] == sum(kid["/Count"] for kid in kids)
+            stack.extend(kids)
+        for kid in kids:
+            assert kid["/Parent"].get_object() is node
+
+
+def test_balance_page_tree_depth_and_inheritance() -> None:
+    """
+    Test tree depth, idempotence and inherited root attributes.
+
+    Returns
+    -------
+    None
+    """
+    writer = PdfusionWriter(MergeOptions(page_tree_fanout=0))
+    for _ in range(100):
+        writer.add_blank_page(width=100, height=100)
+    for page in writer.pages:
+        del page[NameObject("/MediaBox")]
+    root = writer._pages.get_object()
+    root[NameObject("/MediaBox")] = RectangleObject([0, 0, 300, 400])
+    root[NameObject("/Rotate")] = NumberObject(90)
+
+    assert balance_page_tree(writer, 4) == 4
+    assert balance_page_tree(writer, 10) == 2
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    reader = PdfReader(BytesIO(buffer.getvalue()))
+    assert _depth(reader) == 2
+    assert len(reader.pages) == 100
+    assert reader.pages[57].mediabox.height == 400
+    assert reader.pages[57].get("/Rotate") == 90
+
+    with pytest.raises(PDFusionError):
+        balance_page_tree(writer, 1)
+
+
+def test_lookup_page() -> None:
+    """
+    Test tree-walking page lookup against flat and balanced trees.
+
+    Returns
+    -------
+    None
+    """
+    for fanout in (0, 3):
+        reader = PdfReader(BytesIO(_write(50, fanout)))
+        for index in (0, 1, 26, 49):
+            assert lookup_page(reader, index)["/MediaBox"][3] == 100 + index
+        with pytest.raises(IndexError):
+            lookup_page(reader, 50)
+
+
+def test_merge_pdfs_page_tree_fanout(sample_pdfs: Path) -> None:
+    """
+    Test that merge_pdfs honors the configured fan-out.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    result = merge_pdfs(
+        sample_pdfs, "tree.pdf", options=MergeOptions(page_tree_fanout=2)
+    )
+    reader = PdfReader(result.output_path)
+
+    assert _depth(reader) == 2
+    assert len(reader.pages) == result.total_pages == 4
+
+    result = merge_pdfs(
+        sample_pdfs, "flat.pdf", options=MergeOptions(page_tree_fanout=0)
+    )
+    assert _depth(PdfReader(result.output_path)) == 1
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "num_pages",
+    [10_000, pytest.param(100_000, marks=pytest.mark.slow)],
+)
+@pytest.mark.parametrize("fanout", [0, 32])
+def test_page_lookup_benchmark(num_pages: int, fanout: int, perf) -> None:
+    """
+    Benchmark random page-N lookups on large flat and balanced outputs.
+
+    Parameters
+    ----------
+    num_pages : int
+        Number of pages in the output.
+    fanout : int
+        Page tree fan-out; 0 is a single flat /Kids array.
+    perf : PerfTracker
+        Throughput/memory tracker.
+
+    Returns
+    -------
+    None
+    """
+    data = _write(num_pages, fanout)
+    indices = random.Random(0).sample(range(num_pages), 20)
+
+    def lookup(reader: PdfReader) -> int:
+        return sum(int(lookup_page(reader, i)["/MediaBox"][3]) for i in indices)
+
+    total = perf.run(
+        lookup,
+        setup=lambda: PdfReader(BytesIO(data)),
+        pages=len(indices),
+        nbytes=len(data),
+        rounds=5,
+    )
+    assert total == sum(100 + i for i in indices)
@@ -8,7 +8,9 @@ Author: Bjorn Melin
 Date: 11/23/2024
 """
 
+import hashlib
 import sys
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import patch
 
@@ -19,7 +21,9 @@ from pdfusion import (
     NoPDFsFoundError,
     PDFusionError,
     PDFusionMergeError,
+    MergeOptions,
     merge_pdfs,
+    merge_streams,
 )
 from pdfusion.pdfusion import get_pdf_files, main
 
@@ -128,6 +132,61 @@ def test_merge_pdfs_custom_output(sample_pdfs: Path) -> None:
     assert result.output_path.name == f"{output_name}.pdf"
 
 
+def test_merge_pdfs_checksum(sample_pdfs: Path) -> None:
+    """
+    Test that the output checksum and size are reported without a re-read.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    result = merge_pdfs(sample_pdfs, "checked.pdf")
+    data = result.output_path.read_bytes()
+
+    assert result.bytes_written == len(data)
+    assert result.digest == hashlib.sha256(data).hexdigest()
+
+    options = MergeOptions(digest="blake2b", fsync=True, buffer_size=0)
+    result = merge_pdfs(sample_pdfs, "checked_b2.pdf", options=options)
+    assert result.digest == hashlib.blake2b(result.output_path.read_bytes()).hexdigest()
+
+    result = merge_pdfs(sample_pdfs, "unchecked.pdf", options=MergeOptions(digest=None))
+    assert result.digest is None
+
+
+def test_merge_pdfs_write_failure_is_atomic(sample_pdfs: Path, monkeypatch) -> None:
+    """
+    Test that a failed write leaves neither a partial output nor a temp file.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture to modify builtins and other modules.
+
+    Returns
+    -------
+    None
+    """
+    before = sorted(sample_pdfs.iterdir())
+
+    def crash(self, fileobj):
+        fileobj.write(b"%PDF-1.3 truncated")
+        raise OSError("disk full")
+
+    monkeypatch.setattr("PyPDF2.PdfMerger.write", crash)
+
+    with pytest.raises(PDFusionError):
+        merge_pdfs(sample_pdfs, "crashed.pdf")
+    assert sorted(sample_pdfs.iterdir()) == before
+
+
 def test_merge_pdfs_verbose(sample_pdfs: Path, caplog) -> None:
     """
     Test verbose output during PDF merging.
@@ -252,6 +311,99 @@ def test_merge_pdfs_memory_error_handling(sample_pdfs: Path, monkeypatch) -> Non
     assert "memory" in str(exc_info.value).lower()
 
 
+def test_merge_streams(sample_pdfs: Path) -> None:
+    """
+    Test merging in-memory inputs into a new buffer.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    payloads = [path.read_bytes() for path in get_pdf_files(sample_pdfs)]
+    with open(sample_pdfs / "test_2.pdf", "rb") as stream:
+        result = merge_streams([payloads[0], stream, payloads[2]])
+        assert not stream.closed
+
+    assert isinstance(result.output, BytesIO)
+    assert result.files_merged == 3
+    assert result.total_pages == 4
+    assert result.bytes_written == len(result.output.getbuffer())
+    assert len(PdfReader(BytesIO(result.output.getvalue())).pages) == 4
+    assert not list(sample_pdfs.glob("merged_pdf_*.pdf"))
+
+
+def test_merge_streams_output_stream(sample_pdfs: Path) -> None:
+    """
+    Test writing a stream merge to a caller-provided stream.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    target = BytesIO(b"prefix")
+    target.seek(0, 2)
+    payloads = [path.read_bytes() for path in get_pdf_files(sample_pdfs)]
+
+    result = merge_streams(payloads, target)
+
+    assert result.output is target
+    assert target.getvalue().startswith(b"prefix%PDF-")
+    assert result.bytes_written == len(target.getvalue()) - len(b"prefix")
+
+
+def test_merge_streams_errors() -> None:
+    """
+    Test error handling in merge_streams.
+
+    Returns
+    -------
+    None
+    """
+    with pytest.raises(NoPDFsFoundError):
+        merge_streams([])
+
+    with pytest.raises(PDFusionMergeError) as exc_info:
+        merge_streams([b"This is not a valid PDF file"])
+    assert "<input 0>" in str(exc_info.value)
+
+
+def test_cli_stdout(sample_pdfs: Path, capsysbinary) -> None:
+    """
+    Test writing the merged PDF to stdout with ``-o -``.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+    capsysbinary : pytest.CaptureFixture
+        Fixture to capture binary stdout and stderr.
+
+    Returns
+    -------
+    None
+    """
+    test_args = ["pdfusion", str(sample_pdfs), "-o", "-"]
+
+    with patch.object(sys, "argv", test_args), pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 0
+    captured = capsysbinary.readouterr()
+    assert captured.out.startswith(b"%PDF-")
+    assert len(PdfReader(BytesIO(captured.out)).pages) == 4
+    assert b"Successfully merged" in captured.err
+
+
 def test_cli_basic(sample_pdfs: Path, capsys) -> None:
     """
     Test basic CLI functionality.
@@ -0,0 +1,106 @@
+"""
+Tests for PDFusion input read-ahead.
+
+This module contains tests for probing and prefetching input files in
+background threads and for merging from prefetched inputs.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from typing import List
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfusion import MergeOptions, PDFusionMergeError, merge_pdfs
+from pdfusion.prefetch import Probe, prefetch_files, probe_files
+from pdfusion.scheduler import MemoryBudget
+
+
+def test_prefetch_files(tmp_path: Path, monkeypatch) -> None:
+    """
+    Test that files are read in order within the depth and byte limits.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to record the bytes read ahead at each admission.
+
+    Returns
+    -------
+    None
+    """
+    sizes = [10, 10, 50, 10, 10]
+    paths = []
+    for i, size in enumerate(sizes):
+        paths.append(tmp_path / f"{i}.bin")
+        paths[-1].write_bytes(bytes([i]) * size)
+
+    in_use: List[int] = []
+    acquire = MemoryBudget.acquire
+
+    def record(self: MemoryBudget, cost: int) -> None:
+        acquire(self, cost)
+        in_use.append(self.in_use)
+
+    monkeypatch.setattr(MemoryBudget, "acquire", record)
+    streams = list(prefetch_files(paths, sizes, depth=2, max_bytes=30))
+
+    assert [stream.getvalue() for stream in streams] == [
+        path.read_bytes() for path in paths
+    ]
+    assert in_use == [10, 20, 50, 10, 20]
+    assert list(probe_files(paths[:2], depth=4)) == [Probe(False, 10)] * 2
+
+
+def test_merge_pdfs_prefetch(sample_pdfs: Path) -> None:
+    """
+    Test that a merge from prefetched inputs matches a plain merge.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    plain = merge_pdfs(sample_pdfs, "plain.pdf")
+    plain.output_path.unlink()
+    result = merge_pdfs(
+        sample_pdfs,
+        "prefetched.pdf",
+        options=MergeOptions(prefetch_depth=2, prefetch_bytes=1),
+    )
+
+    assert result.files_merged == plain.files_merged == 3
+    assert result.total_pages == plain.total_pages == 4
+    assert len(PdfReader(result.output_path).pages) == 4
+
+
+def test_merge_pdfs_prefetch_errors(invalid_pdf_dir: Path) -> None:
+    """
+    Test that read and parse errors name the failing input.
+
+    Parameters
+    ----------
+    invalid_pdf_dir : Path
+        Directory with an invalid PDF file.
+
+    Returns
+    -------
+    None
+    """
+    options = MergeOptions(prefetch_depth=4)
+    with pytest.raises(PDFusionMergeError, match="invalid.pdf"):
+        merge_pdfs(invalid_pdf_dir, options=options)
+
+    (invalid_pdf_dir / "invalid.pdf").unlink()
+    (invalid_pdf_dir / "folder.pdf").mkdir()
+    with pytest.raises(PDFusionMergeError, match="folder.pdf"):
+        merge_pdfs(invalid_pdf_dir, options=options)
@@ -0,0 +1,139 @@
+"""
+Tests for PDFusion unreferenced-object collection.
+
+This module contains tests for the reachability pass that drops orphaned
+objects before the merged output is written.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from io import BytesIO
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    NameObject,
+    StreamObject,
+)
+
+from pdfusion import MergeOptions, merge_pdfs
+from pdfusion.reachability import collect_garbage, reachable_objects
+from pdfusion.writer import PdfusionWriter
+
+
+def _writer_with_orphans(options: MergeOptions) -> PdfusionWriter:
+    writer = PdfusionWriter(options)
+    writer.add_blank_page(width=100, height=100)
+
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    live_font = writer._add_object(font)
+    writer.pages[0][NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/F1"): live_font})}
+    )
+
+    # An unused font program and a dead annotation that points at it
+    program = StreamObject()
+    program._data = b"\x00" * 5000
+    dead_font = writer._add_object(program)
+    writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Annot"),
+                NameObject("/Subtype"): NameObject("/Text"),
+                NameObject("/Extra"): ArrayObject([dead_font]),
+            }
+        )
+    )
+    return writer
+
+
+def test_reachable_objects() -> None:
+    """
+    Test that only catalog, info and page-reachable objects are marked.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer_with_orphans(MergeOptions())
+    marked = reachable_objects(writer)
+
+    assert writer._root.idnum in marked
+    assert writer._info.idnum in marked
+    assert len(writer._objects) - len(marked) == 2
+
+
+def test_collect_garbage_stats() -> None:
+    """
+    Test the dropped object and byte counts.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer_with_orphans(MergeOptions())
+    stats = collect_garbage(writer)
+
+    assert stats.objects_dropped == 2
+    assert stats.bytes_dropped > 5000
+    assert stats.objects_kept == sum(obj is not None for obj in writer._objects)
+
+
+def test_write_with_collection() -> None:
+    """
+    Test that collected output is smaller and still valid.
+
+    Returns
+    -------
+    None
+    """
+    outputs = {}
+    for collect in (True, False):
+        writer = _writer_with_orphans(MergeOptions(collect_garbage=collect))
+        buffer = BytesIO()
+        writer.write(buffer)
+        outputs[collect] = buffer.getvalue()
+        if collect:
+            assert writer.collection.objects_dropped == 2
+        else:
+            assert writer.collection is None
+
+    assert len(outputs[True]) < len(outputs[False]) - 5000
+    assert b" 00001 f \n" in outputs[True]
+
+    reader = PdfReader(BytesIO(outputs[True]), strict=True)
+    assert len(reader.pages) == 1
+    assert reader.pages[0]["/Resources"]["/Font"]["/F1"]["/BaseFont"] == "/Helvetica"
+
+
+def test_merge_pdfs_reports_collection(sample_pdfs: Path) -> None:
+    """
+    Test that merge results report the collection pass.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        A temporary directory containing sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    result = merge_pdfs(sample_pdfs, "collected.pdf")
+    assert result.objects_dropped == 0
+    assert result.bytes_dropped == 0
+    assert len(PdfReader(result.output_path).pages) == 4
+
+    result = merge_pdfs(
+        sample_pdfs, "kept.pdf", options=MergeOptions(collect_garbage=False)
+    )
+    assert result.objects_dropped == 0
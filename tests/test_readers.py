@@ -0,0 +1,125 @@
+"""
+Tests for the PDFusion parsed-reader cache.
+
+This module contains tests for reusing parsed inputs between merges, for
+evicting them by estimated memory and for sharing them between threads.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+from pdfusion import MergeOptions, discover_pdfs, merge_pdfs
+from pdfusion.readers import ReaderCache
+from pdfusion.scheduler import estimate_footprint
+
+
+def test_reader_cache_reuses_parsed_inputs(sample_pdfs: Path) -> None:
+    """
+    Test that a second merge takes every input from the cache.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    plain = merge_pdfs(sample_pdfs, "plain.pdf")
+    expected = plain.output_path.read_bytes()
+    plain.output_path.unlink()
+
+    cache = ReaderCache()
+    options = MergeOptions(reader_cache=cache)
+    for _ in range(2):
+        result = merge_pdfs(sample_pdfs, "cached.pdf", options=options)
+        assert result.output_path.read_bytes() == expected
+        result.output_path.unlink()
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (3, 3, 3)
+    assert stats.hit_ratio == 0.5
+
+    # A changed file is parsed again
+    changed = sample_pdfs / "test_2.pdf"
+    before = cache.fetch(changed)
+    os.utime(changed, ns=(0, 0))
+    assert cache.fetch(changed) is not before
+    assert cache.stats().misses == 4
+
+    # Worker processes get an empty cache of their own
+    copy = pickle.loads(pickle.dumps(options)).reader_cache
+    assert copy.max_bytes == cache.max_bytes and copy.stats().entries == 0
+
+
+def test_reader_cache_eviction(sample_pdfs: Path) -> None:
+    """
+    Test that readers are evicted least recently used first.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    paths = sorted(sample_pdfs.glob("test_*.pdf"))
+    cost = max(estimate_footprint(path) for path in paths)
+    cache = ReaderCache(max_bytes=2 * cost)
+    first = cache.fetch(paths[0])
+    cache.fetch(paths[1])
+    assert cache.fetch(paths[0]) is first
+    cache.fetch(paths[2])
+
+    stats = cache.stats()
+    assert (stats.entries, stats.evictions) == (2, 1)
+    assert stats.nbytes <= cache.max_bytes
+    assert cache.fetch(paths[0]) is first
+    assert cache.stats().misses == 3
+
+    # A reader too large for the whole cache is used but not kept
+    tiny = ReaderCache(max_bytes=1)
+    assert len(tiny.fetch(paths[0]).pages) == len(PdfReader(paths[0]).pages)
+    assert tiny.stats().entries == 0
+    cache.clear()
+    assert cache.stats().nbytes == 0
+
+
+def test_reader_cache_threads(sample_pdfs: Path) -> None:
+    """
+    Test that merges in several threads share one cache.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+
+    Returns
+    -------
+    None
+    """
+    # Merge a catalog so that outputs are not picked up as inputs
+    inputs = discover_pdfs(sample_pdfs)
+    cache = ReaderCache()
+    options = MergeOptions(reader_cache=cache)
+    first = merge_pdfs(inputs, "first.pdf", options=options)
+    expected = first.output_path.read_bytes()
+    first.output_path.unlink()
+
+    def merge(index: int) -> bytes:
+        result = merge_pdfs(inputs, f"out_{index}.pdf", options=options)
+        return result.output_path.read_bytes()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outputs = list(pool.map(merge, range(8)))
+    assert outputs == [expected] * 8
+    assert cache.stats().hits == 24
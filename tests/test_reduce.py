@@ -0,0 +1,142 @@
+"""
+Tests for PDFusion tree-reduction merges.
+
+This module contains tests for merging groups of inputs into parts, combining
+parts level by level, and the object number reservations that let parts be
+copied verbatim.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+from PyPDF2 import PdfReader
+
+import pdfusion.reduce as reduce
+from pdfusion import MergeOptions, PDFusionMergeError, merge_pdfs
+from pdfusion.reduce import object_bound
+
+
+def _layout(path: Path) -> Tuple[List[int], List[Tuple[str, int]]]:
+    # Page heights and outline targets, which identify the page order
+    reader = PdfReader(path, strict=True)
+    heights = [int(page.mediabox.height) for page in reader.pages]
+    outline = [
+        (item.title, reader.get_destination_page_number(item))
+        for item in reader.outline
+    ]
+    return heights, outline
+
+
+@pytest.mark.parametrize("fanout, workers", [(2, 1), (3, 2), (4, 1)])
+def test_tree_merge(
+    outlined_pdfs: Path, tmp_path: Path, fanout: int, workers: int
+) -> None:
+    """
+    Test that a tree merge matches a serial merge, over one or more levels.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    tmp_path : Path
+        Temporary directory provided by pytest.
+    fanout : int
+        Files per group and parts per combined part.
+    workers : int
+        Number of worker processes.
+
+    Returns
+    -------
+    None
+    """
+    serial = merge_pdfs(outlined_pdfs, "serial.pdf")
+    serial.output_path.rename(tmp_path / "serial.pdf")
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+
+    options = MergeOptions(reduce_fanout=fanout, workers=workers, temp_dir=scratch)
+    result = merge_pdfs(outlined_pdfs, "tree.pdf", options=options)
+
+    assert result.files_merged == 11
+    assert result.total_pages == serial.total_pages == 21
+    assert _layout(result.output_path) == _layout(tmp_path / "serial.pdf")
+    dests = list(PdfReader(result.output_path).named_destinations)
+    assert len(dests) == 11
+    # One name tree, sorted across the groups, as in the serial merge
+    assert dests == list(PdfReader(tmp_path / "serial.pdf").named_destinations)
+    assert list(scratch.iterdir()) == []
+
+
+def test_tree_merge_overflow(outlined_pdfs: Path, monkeypatch) -> None:
+    """
+    Test that a group outgrowing its reserved object numbers is redone.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to under-reserve object numbers.
+
+    Returns
+    -------
+    None
+    """
+    monkeypatch.setattr(reduce, "object_bound", lambda path: 1)
+    result = merge_pdfs(
+        outlined_pdfs, "tree.pdf", options=MergeOptions(reduce_fanout=4, workers=1)
+    )
+
+    heights, outline = _layout(result.output_path)
+    assert heights == [100 * (i + 1) + j for i in range(11) for j in range(i % 3 + 1)]
+    assert [title for title, _ in outline] == [f"doc {i}" for i in range(11)]
+
+
+def test_tree_merge_error(outlined_pdfs: Path) -> None:
+    """
+    Test that an unreadable input fails the merge from a worker process.
+
+    Parameters
+    ----------
+    outlined_pdfs : Path
+        Directory with outlined PDF files.
+
+    Returns
+    -------
+    None
+    """
+    (outlined_pdfs / "doc_05.pdf").write_bytes(b"not a pdf")
+    assert object_bound(outlined_pdfs / "doc_05.pdf") == 0
+
+    with pytest.raises(PDFusionMergeError, match="doc_05.pdf"):
+        merge_pdfs(
+            outlined_pdfs, "tree.pdf", options=MergeOptions(reduce_fanout=3, workers=2)
+        )
+    assert not any(path.name.endswith(".tree") for path in outlined_pdfs.iterdir())
+
+
+def test_object_bound(sample_pdfs: Path, monkeypatch) -> None:
+    """
+    Test that the bound is read from the trailer /Size, or by parsing.
+
+    Parameters
+    ----------
+    sample_pdfs : Path
+        Directory with three sample PDF files.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to hide the trailer from the tail read.
+
+    Returns
+    -------
+    None
+    """
+    paths = sorted(sample_pdfs.glob("*.pdf"))
+    sizes = [PdfReader(path).trailer["/Size"] for path in paths]
+    assert [object_bound(path) for path in paths] == sizes
+
+    monkeypatch.setattr(reduce, "TRAILER_TAIL", 8)
+    assert [object_bound(path) for path in paths] == sizes
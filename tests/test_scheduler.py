@@ -0,0 +1,136 @@
+"""
+Tests for PDFusion memory-budget scheduling.
+
+This module contains tests for size parsing, footprint estimates and
+admitting parallel work within a memory budget.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from pdfusion.parallel import ordered_map
+from pdfusion.scheduler import (
+    BASE_FOOTPRINT,
+    MemoryBudget,
+    estimate_footprint,
+    parse_size,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("0", 0),
+        ("4096", 4096),
+        ("4G", 4 * 1024**3),
+        ("512MiB", 512 * 1024**2),
+        ("1.5k", 1536),
+        (" 2 tb ", 2 * 1024**4),
+    ],
+)
+def test_parse_size(text: str, expected: int) -> None:
+    """
+    Test parsing sizes with and without binary units.
+
+    Parameters
+    ----------
+    text : str
+        The size to parse.
+    expected : int
+        The expected number of bytes.
+
+    Returns
+    -------
+    None
+    """
+    assert parse_size(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "G", "4X", "-1M", "4 G B"])
+def test_parse_size_invalid(text: str) -> None:
+    """
+    Test that malformed sizes are rejected.
+
+    Parameters
+    ----------
+    text : str
+        The malformed size.
+
+    Returns
+    -------
+    None
+    """
+    with pytest.raises(ValueError, match="Invalid size"):
+        parse_size(text)
+
+
+def test_estimate_footprint(tmp_path: Path) -> None:
+    """
+    Test that the estimate grows with the file size.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        Temporary directory provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    path = tmp_path / "input.pdf"
+    path.write_bytes(b"x" * 1000)
+
+    assert estimate_footprint(path) == BASE_FOOTPRINT + 3000
+    assert estimate_footprint(path, overhead=1.5) == BASE_FOOTPRINT + 1500
+
+
+def test_memory_budget() -> None:
+    """
+    Test admission within the budget and of work larger than it.
+
+    Returns
+    -------
+    None
+    """
+    budget = MemoryBudget(10)
+    assert budget.admits(20)
+    budget.acquire(6)
+    assert budget.admits(4)
+    assert not budget.admits(5)
+    budget.release(6)
+    assert budget.admits(20)
+    assert MemoryBudget(0).admits(10**12)
+
+
+def test_ordered_map_budget(monkeypatch) -> None:
+    """
+    Test that an oversized item runs alone while small items share the pool.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        Fixture used to record the memory in use at each admission.
+
+    Returns
+    -------
+    None
+    """
+    in_use: List[int] = []
+    acquire = MemoryBudget.acquire
+
+    def record(self: MemoryBudget, cost: int) -> None:
+        acquire(self, cost)
+        in_use.append(self.in_use)
+
+    monkeypatch.setattr(MemoryBudget, "acquire", record)
+    results = ordered_map(
+        abs, [-1, -2, -3, -4, -5], workers=2, costs=[1, 1, 10, 1, 1], budget=4
+    )
+
+    assert list(results) == [1, 2, 3, 4, 5]
+    assert in_use == [1, 2, 10, 1, 2]
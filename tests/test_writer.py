@@ -0,0 +1,164 @@
+"""
+Tests for PDFusion output writing.
+
+This module contains tests for the buffered, checksumming output stream and
+the atomic file writer.
+
+Author: Bjorn Melin
+Date: 10/19/2026
+"""
+
+import hashlib
+import os
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PdfReader
+
+from pdfusion.writer import CountingStream, PdfusionWriter, atomic_output
+
+
+def test_counting_stream_buffers_and_hashes() -> None:
+    """
+    Test that writes are coalesced, counted and checksummed.
+
+    Returns
+    -------
+    None
+    """
+    raw = BytesIO()
+    stream = CountingStream(raw, digest="blake2b", buffer_size=8)
+
+    stream.write(b"abc")
+    assert raw.getvalue() == b""
+    assert stream.tell() == 3
+
+    stream.write(b"defghij")
+    assert raw.getvalue() == b"abcdefghij"
+
+    stream.write(b"k")
+    stream.flush()
+    assert raw.getvalue() == b"abcdefghijk"
+    assert stream.bytes_written == 11
+    assert stream.hexdigest() == hashlib.blake2b(b"abcdefghijk").hexdigest()
+
+
+def test_counting_stream_without_digest() -> None:
+    """
+    Test unbuffered writes with hashing disabled.
+
+    Returns
+    -------
+    None
+    """
+    raw = BytesIO()
+    stream = CountingStream(raw)
+
+    stream.write(b"data")
+
+    assert raw.getvalue() == b"data"
+    assert stream.hexdigest() is None
+
+
+def test_atomic_output(tmp_path: Path) -> None:
+    """
+    Test that a completed write is renamed into place.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A temporary directory path provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    target = tmp_path / "out.pdf"
+
+    with atomic_output(target, buffer_size=4) as stream:
+        stream.write(b"%PDF-")
+        stream.write(b"payload")
+        assert not target.exists()
+
+    assert target.read_bytes() == b"%PDF-payload"
+    assert stream.hexdigest() == hashlib.sha256(b"%PDF-payload").hexdigest()
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_atomic_output_failure_keeps_previous_file(tmp_path: Path) -> None:
+    """
+    Test that a failed write leaves no partial output behind.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A temporary directory path provided by pytest.
+
+    Returns
+    -------
+    None
+    """
+    target = tmp_path / "out.pdf"
+    target.write_bytes(b"previous")
+
+    with pytest.raises(RuntimeError), atomic_output(target) as stream:
+        stream.write(b"partial")
+        raise RuntimeError("crash")
+
+    assert target.read_bytes() == b"previous"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_atomic_output_fsync(tmp_path: Path, monkeypatch) -> None:
+    """
+    Test that fsync covers both the file and its directory.
+
+    Parameters
+    ----------
+    tmp_path : Path
+        A temporary directory path provided by pytest.
+    monkeypatch : pytest.MonkeyPatch
+        Fixture to modify builtins and other modules.
+
+    Returns
+    -------
+    None
+    """
+    calls = []
+    real_fsync = os.fsync
+
+    def record_fsync(fd: int) -> None:
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", record_fsync)
+
+    with atomic_output(tmp_path / "out.pdf", fsync=True, digest=None) as stream:
+        stream.write(b"data")
+
+    assert len(calls) == 2
+    assert stream.hexdigest() is None
+
+
+def test_writer_object_base() -> None:
+    """
+    Test that a writer with an object base numbers objects above it.
+
+    Returns
+    -------
+    None
+    """
+    writer = PdfusionWriter(object_base=100)
+    writer.add_blank_page(width=100, height=200)
+    buffer = BytesIO()
+    writer.write_stream(buffer)
+    data = buffer.getvalue()
+
+    assert b"\n1 0 obj" not in data
+    assert b"\n101 0 obj" in data
+    assert b"xref\n0 1\n" in data
+    assert data.rfind(b"startxref") > writer.xref_location > 0
+
+    reader = PdfReader(BytesIO(data), strict=True)
+    assert reader.pages[0].mediabox.height == 200